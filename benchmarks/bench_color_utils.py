@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Measure the throughput and latency of the color_utils hot paths.
+
+The functions the UI calls on every interaction are timed over the codes
+in data/default.dircolors and over a seeded synthetic truecolor theme,
+reporting calls per second and per-call latency percentiles. Two git
+revisions can be compared by running this script against each one's src
+directory, or by comparing two saved JSON results.
+
+Usage: python3 benchmarks/bench_color_utils.py [--output results.json]
+       python3 benchmarks/bench_color_utils.py --revisions BASE [HEAD]
+       python3 benchmarks/bench_color_utils.py --compare base.json head.json
+"""
+
+import argparse
+import random
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from harness import (REPO_DIR, find_regressions, load_results, print_comparison,
+                     save_results, time_call)
+
+DEFAULT_THEME = REPO_DIR / 'data' / 'default.dircolors'
+SEED = 2024
+TRUECOLOR_CODES = 2000
+# Per-call samples taken for the latency percentiles
+LATENCY_SAMPLES = 20000
+PERCENTILES = (50, 90, 99)
+
+# Revision name of the uncommitted working tree
+WORKTREE = 'WORKTREE'
+
+_CODE_RE = re.compile(r'[\d;]+\Z')
+
+class Case(NamedTuple):
+    """A function timed over one workload of argument tuples."""
+    name: str
+    func: Callable
+    calls: List[tuple]
+    # Run before every pass over calls, to time with cold caches
+    reset: Optional[Callable[[], object]] = None
+
+def theme_codes(path: Path) -> List[str]:
+    """Get the color code of every setting in a .dircolors file, in order."""
+    codes = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split('#', 1)[0].split()
+            if len(parts) >= 2 and parts[0] != 'TERM' and _CODE_RE.match(parts[1]):
+                codes.append(parts[1])
+    return codes
+
+def truecolor_codes(count: int, seed: int = SEED) -> List[str]:
+    """Generate the codes of a truecolor theme, some with styles or backgrounds."""
+    rng = random.Random(seed)
+    codes = []
+    for _ in range(count):
+        code = "38;2;%d;%d;%d" % (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        if rng.random() < 0.3:
+            code = f"{rng.choice(('01', '03', '04'))};{code}"
+        if rng.random() < 0.1:
+            code += ";48;2;%d;%d;%d" % (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        codes.append(code)
+    return codes
+
+def build_cases(color_utils) -> List[Case]:
+    """Build the workloads of every function the revision under test has."""
+    workloads = {
+        'default': theme_codes(DEFAULT_THEME),
+        'truecolor': truecolor_codes(TRUECOLOR_CODES),
+    }
+    cases = []
+    for workload, codes in workloads.items():
+        infos = [color_utils.parse_color_code(code) for code in codes]
+        rgbs = [(info.foreground,) for info in infos if info.foreground]
+        cases.extend([
+            Case(f"parse_color_code[{workload}]", color_utils.parse_color_code,
+                 [(code,) for code in codes]),
+            Case(f"build_color_code[{workload}]", color_utils.build_color_code,
+                 [(info.foreground, info.background, list(info.styles), info.mode)
+                  for info in infos]),
+            Case(f"rgb_to_256_color[{workload}]", lambda rgb: color_utils.rgb_to_256_color(*rgb),
+                 rgbs),
+            Case(f"_rgb_to_basic_color[{workload}]",
+                 lambda rgb: color_utils._rgb_to_basic_color(*rgb), rgbs),
+            Case(f"format_color_code_display[{workload}]", color_utils.format_color_code_display,
+                 [(code,) for code in codes]),
+        ])
+        parse_sgr = getattr(color_utils, 'parse_sgr', None)
+        if parse_sgr is not None:
+            cases.append(Case(f"parse_sgr[{workload}]", parse_sgr, [(code,) for code in codes]))
+        clear = getattr(color_utils, 'clear_parse_cache', None)
+        if clear is not None:
+            cases.append(Case(f"parse_color_code[{workload}, cold]", color_utils.parse_color_code,
+                              [(code,) for code in codes], clear))
+    cases.append(Case("get_color_palette_256", color_utils.get_color_palette_256, [()]))
+    return cases
+
+def _timer_overhead() -> int:
+    """Nanoseconds perf_counter_ns adds to a measured interval."""
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(1000):
+        start = clock()
+        samples.append(clock() - start)
+    return min(samples)
+
+def latency_percentiles(case: Case, overhead: int,
+                        samples: int = LATENCY_SAMPLES) -> Dict[str, float]:
+    """Time calls one at a time; returns the percentiles in nanoseconds."""
+    clock = time.perf_counter_ns
+    func = case.func
+    times = []
+    while len(times) < samples:
+        if case.reset is not None:
+            case.reset()
+        for args in case.calls:
+            start = clock()
+            func(*args)
+            times.append(clock() - start - overhead)
+    times.sort()
+    return {f"p{p}_ns": float(max(0, times[min(len(times) - 1, len(times) * p // 100)]))
+            for p in PERCENTILES}
+
+def run_cases(cases: Sequence[Case], repeat: int) -> Dict[str, Dict[str, float]]:
+    """Measure every case, printing a row per case."""
+    overhead = _timer_overhead()
+    results = {}
+    width = max(len(case.name) for case in cases)
+    columns = ''.join(f"{f'p{p} ns':>9}" for p in PERCENTILES)
+    print(f"{'function':<{width}} {'calls/s':>13}{columns}")
+    for case in cases:
+        func, calls = case.func, case.calls
+        
+        def run_pass():
+            for args in calls:
+                func(*args)
+                
+        result = time_call(run_pass, repeat, case.reset)
+        result = {key: value / len(calls) for key, value in result.items()}
+        result['calls_per_second'] = 1 / result['seconds']
+        result.update(latency_percentiles(case, overhead))
+        results[case.name] = result
+        print(f"{case.name:<{width}} {result['calls_per_second']:>13,.0f}"
+              + ''.join(f"{result[f'p{p}_ns']:>9.0f}" for p in PERCENTILES))
+    return results
+
+def export_source(revision: str, directory: Path) -> Path:
+    """Extract the src directory of a git revision; returns its path."""
+    directory.mkdir(parents=True, exist_ok=True)
+    archive = directory / 'src.tar'
+    with open(archive, 'wb') as f:
+        subprocess.run(['git', 'archive', revision, 'src'], cwd=REPO_DIR, stdout=f, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(directory)
+    return directory / 'src'
+
+def run_revision(revision: str, directory: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Run this script against a revision's src in a fresh interpreter."""
+    name = revision.replace('/', '_')
+    output = directory / f"{name}.json"
+    if revision == WORKTREE:
+        source = REPO_DIR / 'src'
+    else:
+        source = export_source(revision, directory / name)
+    print(f"\n{revision}:")
+    subprocess.run([sys.executable, __file__, '--src', str(source), '--output', str(output),
+                    '--repeat', str(repeat), '--label', revision], check=True)
+    return load_results(output)
+
+def report_comparison(base: Dict[str, Dict[str, float]], head: Dict[str, Dict[str, float]],
+                      tolerance: float) -> int:
+    """Print head relative to base; returns 1 when head regressed."""
+    print()
+    print_comparison(head, base)
+    regressions = find_regressions(head, base, tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    return 0
+
+def main(argv):
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arguments.add_argument('--src', type=Path, default=REPO_DIR / 'src',
+                           help="source directory to import color_utils from")
+    arguments.add_argument('--repeat', type=int, default=5, help="timing repeats per function")
+    arguments.add_argument('--output', type=Path, help="write results to this JSON file")
+    arguments.add_argument('--revisions', nargs='+', metavar='REV',
+                           help="compare a base revision with a head revision "
+                                "(default head: the working tree)")
+    arguments.add_argument('--compare', nargs=2, type=Path, metavar=('BASE', 'HEAD'),
+                           help="compare two saved results instead of measuring")
+    arguments.add_argument('--label', help="name of the measured source kept in the JSON output")
+    arguments.add_argument('--time-tolerance', type=float, default=0.5)
+    options = arguments.parse_args(argv[1:])
+    
+    if options.compare:
+        base, head = (load_results(path) for path in options.compare)
+        return report_comparison(base, head, options.time_tolerance)
+        
+    if options.revisions:
+        if len(options.revisions) > 2:
+            arguments.error("--revisions takes a base and an optional head revision")
+        base_revision, head_revision = (options.revisions + [WORKTREE])[:2]
+        with tempfile.TemporaryDirectory() as tmp:
+            base = run_revision(base_revision, Path(tmp), options.repeat)
+            head = run_revision(head_revision, Path(tmp), options.repeat)
+        return report_comparison(base, head, options.time_tolerance)
+        
+    sys.path.insert(0, str(options.src))
+    import color_utils
+    
+    results = run_cases(build_cases(color_utils), options.repeat)
+    if options.output:
+        save_results(options.output, results, source=options.label or str(options.src))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
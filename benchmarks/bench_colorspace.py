@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Measure the scalar and NumPy batch color space conversions.
+
+Each direct conversion is timed per color, one call at a time and as a
+batch, with colorsys as a reference for the HSL and HSV conversions.
+
+Usage: python3 benchmarks/bench_colorspace.py [--colors N] [--output results.json]
+"""
+
+import argparse
+import colorsys
+import random
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import colorspace
+from colorspace import convert
+
+from harness import save_results, time_call
+
+# The same conversions in colorsys, which works on 0-1 channels
+COLORSYS = {
+    'rgb_to_hsl': lambda r, g, b: colorsys.rgb_to_hls(r / 255, g / 255, b / 255),
+    'rgb_to_hsv': lambda r, g, b: colorsys.rgb_to_hsv(r / 255, g / 255, b / 255),
+}
+
+def main(argv):
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arguments.add_argument('--colors', type=int, default=100000, help="colors per batch")
+    arguments.add_argument('--repeat', type=int, default=5, help="timing repeats per conversion")
+    arguments.add_argument('--output', type=Path, help="write results to this JSON file")
+    options = arguments.parse_args(argv[1:])
+    
+    rng = random.Random(42)
+    rgbs = [(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            for _ in range(options.colors)]
+    scalar_rgbs = rgbs[:10000]
+    
+    results = {}
+    print(f"{'conversion':<18} {'scalar/s':>12} {'batch/s':>14} {'speedup':>8} {'colorsys/s':>12}")
+    for (source, target), name in colorspace._STEPS.items():
+        inputs = [convert(rgb, 'rgb', source) for rgb in scalar_rgbs]
+        func = getattr(colorspace, name)
+        scalar = time_call(lambda: [func(*color) for color in inputs], options.repeat)
+        scalar = {key: value / len(inputs) for key, value in scalar.items()}
+        results[name] = scalar
+        row = f"{name:<18} {1 / scalar['seconds']:>12,.0f}"
+        
+        if colorspace.np is not None:
+            batch_inputs = colorspace.convert_array(rgbs, 'rgb', source)
+            batch_func = getattr(colorspace, name + '_array')
+            batch = time_call(lambda: batch_func(batch_inputs), options.repeat)
+            batch = {key: value / len(rgbs) for key, value in batch.items()}
+            results[name + '_array'] = batch
+            row += f" {1 / batch['seconds']:>14,.0f} {scalar['seconds'] / batch['seconds']:>7.0f}x"
+        else:
+            row += f" {'-':>14} {'-':>8}"
+            
+        reference = COLORSYS.get(name)
+        if reference is not None:
+            seconds = time_call(lambda: [reference(*rgb) for rgb in scalar_rgbs],
+                                options.repeat)['seconds'] / len(scalar_rgbs)
+            row += f" {1 / seconds:>12,.0f}"
+        print(row)
+        
+    if options.output:
+        save_results(options.output, results)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Compare the palette helpers in color_utils with their old per-call versions.
+
+The old versions parsed "38;5;N" through ColorInfo for every palette index,
+rebuilt the basic color lists on every call and picked nearest colors by
+RGB distance or thresholds. Besides speed, the mean OKLab distance between
+random colors and the color picked for them is shown for the quantizers.
+
+Usage: python3 benchmarks/bench_palette.py [calls]
+"""
+
+import sys
+import random
+import timeit
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from color_utils import (color_256_to_rgb, get_color_palette_256, rgb_to_256_color,
+                         _rgb_to_basic_color, PALETTE_16, PALETTE_256)
+from colorspace import rgb_to_oklab
+
+def legacy_color_256_to_rgb(color_index):
+    """The previous implementation: parse "38;5;N" and compute the entry."""
+    basic = [(0, 0, 0), (128, 0, 0), (0, 128, 0), (128, 128, 0),
+             (0, 0, 128), (128, 0, 128), (0, 128, 128), (192, 192, 192)]
+    bright = [(128, 128, 128), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+              (0, 0, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)]
+    parts = [int(p) for p in f"38;5;{color_index}".split(';') if p.isdigit()]
+    index = parts[2]
+    if index < 16:
+        return bright[index - 8] if index >= 8 else basic[index]
+    if index < 232:
+        index -= 16
+        component = lambda c: 0 if c == 0 else 55 + c * 40
+        return (component(index // 36 % 6), component(index // 6 % 6), component(index % 6))
+    gray = 8 + (index - 232) * 10
+    return (gray, gray, gray)
+
+def legacy_palette_256():
+    """The previous get_color_palette_256."""
+    return [legacy_color_256_to_rgb(i) for i in range(256)]
+
+def legacy_rgb_to_basic_color(r, g, b):
+    """The previous implementation: rebuild both lists and scan them."""
+    basic_colors = [(0, 0, 0), (128, 0, 0), (0, 128, 0), (128, 128, 0),
+                    (0, 0, 128), (128, 0, 128), (0, 128, 128), (192, 192, 192)]
+    bright_colors = [(128, 128, 128), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+                     (0, 0, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)]
+    
+    def color_distance(c1, c2):
+        return sum((a - b) ** 2 for a, b in zip(c1, c2))
+        
+    min_dist = float('inf')
+    best_color = 30
+    for i, color in enumerate(basic_colors):
+        dist = color_distance((r, g, b), color)
+        if dist < min_dist:
+            min_dist = dist
+            best_color = 30 + i
+    for i, color in enumerate(bright_colors):
+        dist = color_distance((r, g, b), color)
+        if dist < min_dist:
+            min_dist = dist
+            best_color = 90 + i
+    return best_color
+
+def legacy_rgb_to_256_color(r, g, b):
+    """The previous implementation: thresholds per channel or gray level."""
+    if r == g == b:
+        if r < 8:
+            return 16
+        elif r > 238:
+            return 231
+        return 232 + int((r - 8) / 10)
+    
+    def rgb_to_6(val):
+        if val < 48:
+            return 0
+        elif val < 115:
+            return 1
+        return int((val - 35) / 40)
+        
+    return 16 + 36 * rgb_to_6(r) + 6 * rgb_to_6(g) + rgb_to_6(b)
+
+def basic_code_rgb(code):
+    """Get the RGB of a 30-37 or 90-97 foreground code."""
+    return PALETTE_16[code - 30 if code < 90 else code - 82]
+
+def mean_error(colors, picked):
+    """Mean OKLab distance between colors and the palette colors picked for them."""
+    total = 0.0
+    for rgb, chosen in zip(colors, picked):
+        a, b = rgb_to_oklab(*rgb), rgb_to_oklab(*chosen)
+        total += sum((x - y) ** 2 for x, y in zip(a, b)) ** 0.5
+    return total / len(colors)
+
+def rate(func, number):
+    """Return calls per second of func()."""
+    return number / min(timeit.repeat(func, number=number, repeat=5))
+
+def main(argv):
+    number = int(argv[1]) if len(argv) > 1 else 20000
+    rng = random.Random(42)
+    colors = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(1024)]
+    indexes = list(range(256)) * 4
+    
+    # The tables must give the same palette before their speed means anything
+    assert get_color_palette_256() == legacy_palette_256()
+    
+    print(f"{'quantizer':<22} {'legacy error':>15} {'OKLab error':>15}")
+    for name, legacy, current, to_rgb in (
+        ("rgb_to_256_color", legacy_rgb_to_256_color, rgb_to_256_color, PALETTE_256.__getitem__),
+        ("_rgb_to_basic_color", legacy_rgb_to_basic_color, _rgb_to_basic_color, basic_code_rgb),
+    ):
+        legacy_error = mean_error(colors, [to_rgb(legacy(*c)) for c in colors])
+        current_error = mean_error(colors, [to_rgb(current(*c)) for c in colors])
+        print(f"{name:<22} {legacy_error:>15.4f} {current_error:>15.4f}")
+    print()
+    
+    cases = [
+        ("color_256_to_rgb", lambda: [legacy_color_256_to_rgb(i) for i in indexes],
+         lambda: [color_256_to_rgb(i) for i in indexes], len(indexes)),
+        ("get_color_palette_256", legacy_palette_256, get_color_palette_256, 1),
+        ("_rgb_to_basic_color", lambda: [legacy_rgb_to_basic_color(*c) for c in colors],
+         lambda: [_rgb_to_basic_color(*c) for c in colors], len(colors)),
+        # Timed after the error check above has filled the lookup cells
+        ("rgb_to_256_color", lambda: [legacy_rgb_to_256_color(*c) for c in colors],
+         lambda: [rgb_to_256_color(*c) for c in colors], len(colors)),
+    ]
+    
+    print(f"{'function':<22} {'legacy calls/s':>15} {'table calls/s':>15} {'speedup':>8}")
+    for name, legacy, current, calls in cases:
+        loops = max(1, number // calls)
+        legacy_rate = rate(legacy, loops) * calls
+        current_rate = rate(current, loops) * calls
+        print(f"{name:<22} {legacy_rate:>15,.0f} {current_rate:>15,.0f} "
+              f"{current_rate / legacy_rate:>7.1f}x")
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Compare DirColorsParser.parse_file with the old three-pass, list-scanning parse.
+
+Usage: python3 benchmarks/bench_parse_file.py [entries ...]
+"""
+
+import sys
+import time
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from parser import DirColorsParser
+
+SECTIONS = ['Archive', 'Document', 'Image', 'Audio', 'Video', 'Code', 'Config']
+
+def generate_theme(path: Path, entries: int) -> None:
+    """Write a synthetic theme with category sections and extension lines."""
+    per_section = max(1, entries // len(SECTIONS))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Synthetic benchmark theme\n")
+        f.write("TERM xterm*\n\n")
+        f.write("DIR 01;34\nLINK 01;36\nEXEC 01;32\n\n")
+        for s, section in enumerate(SECTIONS):
+            f.write(f"# {section} files\n")
+            for i in range(per_section):
+                f.write(f".{section.lower()[:3]}{i} 38;5;{(s * 31 + i) % 256} # entry {i}\n")
+            f.write("\n")
+
+class LegacyColorEntry:
+    """ColorEntry as it was before the streaming parser."""
+    
+    def __init__(self, file_type: str, color_code: str, comment: Optional[str] = None):
+        self.file_type = file_type
+        self.color_code = color_code.strip()
+        self.comment = comment.strip() if comment else comment
+
+class LegacyParser:
+    """A frozen copy of the parser before the streaming rewrite: readlines,
+    a stripped copy of every line, then inference over per-category lists.
+    
+    Kept here, rather than calling the current parser's helpers, so the
+    comparison does not drift as the parser changes.
+    """
+    
+    def __init__(self):
+        self.entries: Dict[str, LegacyColorEntry] = {}
+        self.terminal_types: List[str] = []
+        self.comments: List[str] = []
+        
+    def infer_categories_from_file(self) -> None:
+        self.EXTENSION_CATEGORIES = {name: list(exts)
+                                     for name, exts in DirColorsParser.EXTENSION_CATEGORIES.items()}
+        current_category = None
+        for line in self._file_lines:
+            line = line.strip()
+            if line.startswith('#') and 'files' in line.lower():
+                if 'archive' in line.lower():
+                    current_category = 'archives'
+                elif 'document' in line.lower():
+                    current_category = 'documents'
+                elif 'image' in line.lower():
+                    current_category = 'images'
+                elif 'audio' in line.lower():
+                    current_category = 'audio'
+                elif 'video' in line.lower():
+                    current_category = 'video'
+                elif 'code' in line.lower():
+                    current_category = 'code'
+                elif 'config' in line.lower():
+                    current_category = 'config'
+                else:
+                    current_category = None
+            elif line and not line.startswith('#') and current_category:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].startswith('.'):
+                    extension = parts[0]
+                    for cat_list in self.EXTENSION_CATEGORIES.values():
+                        if extension in cat_list:
+                            cat_list.remove(extension)
+                    if extension not in self.EXTENSION_CATEGORIES[current_category]:
+                        self.EXTENSION_CATEGORIES[current_category].append(extension)
+                        
+    def parse_file(self, filepath: Path) -> None:
+        self.entries.clear()
+        self.terminal_types.clear()
+        self.comments.clear()
+        
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        self._file_lines = [line.rstrip('\n\r') for line in lines]
+        for line in lines:
+            self._parse_line(line.rstrip('\n\r'))
+        self.infer_categories_from_file()
+        
+    def _parse_line(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        if line.startswith('#'):
+            self.comments.append(line)
+            return
+        if '#' in line:
+            line_part, comment = line.split('#', 1)
+            line_part = line_part.strip()
+            comment = comment.strip()
+        else:
+            line_part = line
+            comment = None
+        if not line_part:
+            return
+        if line_part.startswith('TERM '):
+            term_type = line_part[5:].strip()
+            if term_type:
+                self.terminal_types.append(term_type)
+            return
+        parts = line_part.split()
+        if len(parts) >= 2:
+            self.entries[parts[0]] = LegacyColorEntry(parts[0], ' '.join(parts[1:]), comment)
+
+def measure(parser_class, path: Path):
+    """Return (seconds, peak_bytes) for parsing path; timing runs untraced."""
+    parser = parser_class()
+    start = time.perf_counter()
+    parser.parse_file(path)
+    elapsed = time.perf_counter() - start
+    
+    parser = parser_class()
+    tracemalloc.start()
+    parser.parse_file(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main(argv):
+    sizes = [int(a) for a in argv[1:]] or [1000, 10000, 40000]
+    print(f"{'entries':>8} {'legacy ms':>10} {'stream ms':>10} {'legacy KiB':>11} {'stream KiB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"theme_{size}.dircolors"
+            generate_theme(path, size)
+            legacy_time, legacy_peak = measure(LegacyParser, path)
+            stream_time, stream_peak = measure(DirColorsParser, path)
+            print(f"{size:>8} {legacy_time * 1000:>10.1f} {stream_time * 1000:>10.1f} "
+                  f"{legacy_peak / 1024:>11.0f} {stream_peak / 1024:>11.0f}")
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Time the parser and writer on reproducible synthetic .dircolors corpora.
+
+Each corpus is generated from a fixed seed, so the same size and profile
+always give the same file. parse_file, get_categories, write_file and
+load_default_dircolors are timed and their peak memory is traced. Results
+can be saved as JSON and compared with a stored baseline; the script exits
+with status 1 when a benchmark regresses past it. Timings only compare
+on the machine the baseline was saved on; peak memory compares anywhere
+with the same Python version.
+
+Usage: python3 benchmarks/bench_suite.py [--sizes N ...] [--output results.json]
+       [--baseline benchmarks/baseline.json] [--save-baseline]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import parser as parser_module
+from parser import DirColorsParser, load_default_dircolors
+
+from harness import find_regressions, load_results, peak_memory, print_comparison, save_results, time_call
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+SEED = 2024
+
+SECTIONS = ['Archive', 'Document', 'Image', 'Audio', 'Video', 'Code', 'Config', 'Backup']
+KEYWORDS = ['NORMAL', 'FILE', 'DIR', 'LINK', 'ORPHAN', 'MISSING', 'FIFO', 'SOCK', 'DOOR',
+            'BLK', 'CHR', 'EXEC', 'SETUID', 'SETGID', 'STICKY', 'OTHER_WRITABLE',
+            'STICKY_OTHER_WRITABLE', 'CAPABILITY', 'MULTIHARDLINK']
+TERMS = ['xterm*', 'screen*', 'tmux*', 'rxvt*', 'linux', 'vt100', 'alacritty', 'kitty',
+         'foot', 'st-256color', 'konsole*', 'gnome*']
+MALFORMED = ['bogus', 'DIR', '.orphaned', 'COLOUR 01;34', '.bad 38;5;999', '.worse 38;2;1;2',
+             '.odd 01;zz', 'EXEC 01;32 trailing words']
+
+class Profile(NamedTuple):
+    """How a corpus mixes comments, duplicates and malformed lines."""
+    # Chance an entry has a trailing comment; half as many comment lines
+    comment_density: float
+    # Chance an extension redefines one written before
+    duplicate_rate: float
+    # Chance of a malformed line after an entry
+    malformed_rate: float
+    # Entries between repeated TERM blocks
+    term_every: int
+
+PROFILES = {
+    'sparse': Profile(0.02, 0.01, 0.002, 5000),
+    'commented': Profile(0.5, 0.03, 0.01, 1000),
+}
+
+def random_code(rng: random.Random) -> str:
+    """Pick a color code in one of the forms themes use."""
+    kind = rng.random()
+    if kind < 0.4:
+        return f"{rng.choice(('00', '01', '04'))};{rng.randrange(30, 38)}"
+    if kind < 0.75:
+        return f"38;5;{rng.randrange(256)}"
+    if kind < 0.95:
+        return f"38;2;{rng.randrange(256)};{rng.randrange(256)};{rng.randrange(256)}"
+    return f"01;{rng.randrange(30, 38)};{rng.randrange(40, 48)}"
+
+def generate_corpus(path: Path, entries: int, profile: str, seed: int = SEED) -> None:
+    """Write a synthetic theme of about entries setting lines."""
+    rng = random.Random(f"{seed}:{entries}:{profile}")
+    lines = ["# Synthetic benchmark corpus", f"# {entries} entries, {profile} profile", ""]
+    profile = PROFILES[profile]
+    
+    def term_block():
+        lines.extend(f"TERM {term}" for term in rng.sample(TERMS, rng.randrange(3, len(TERMS))))
+        lines.append("")
+        
+    term_block()
+    for keyword in KEYWORDS[:min(len(KEYWORDS), entries)]:
+        lines.append(f"{keyword} {random_code(rng)}")
+    lines.append("")
+    
+    written = []
+    remaining = max(0, entries - len(KEYWORDS))
+    per_section = max(1, remaining // len(SECTIONS))
+    count = 0
+    while count < remaining:
+        section = SECTIONS[(count // per_section) % len(SECTIONS)]
+        if count % per_section == 0:
+            lines.extend(["", f"# {section} files"])
+        if count and count % profile.term_every == 0:
+            term_block()
+            
+        if rng.random() < profile.comment_density / 2:
+            lines.append(f"# note {count}")
+        if written and rng.random() < profile.duplicate_rate:
+            extension = rng.choice(written)
+        else:
+            extension = f".{section.lower()[:3]}{count}"
+            written.append(extension)
+        line = f"{extension} {random_code(rng)}"
+        if rng.random() < profile.comment_density:
+            line += f" # entry {count}"
+        lines.append(line)
+        if rng.random() < profile.malformed_rate:
+            lines.append(rng.choice(MALFORMED))
+        count += 1
+        
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def bench_corpus(path: Path, target: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time and trace each operation on one corpus file."""
+    results = {}
+    
+    def parse():
+        DirColorsParser().parse_file(path)
+        
+    parsed = DirColorsParser()
+    parsed.parse_file(path)
+    
+    def forget_save():
+        # Without the last saved state write_file cannot skip the write
+        parsed.saved_state = None
+        
+    operations = [
+        ('parse_file', parse, None),
+        ('get_categories', parsed.get_categories, None),
+        ('write_file', lambda: parsed.write_file(target), forget_save),
+        ('write_file_unchanged', lambda: parsed.write_file(target), None),
+    ]
+    parsed.write_file(target)
+    for name, func, setup in operations:
+        result = time_call(func, repeat, setup)
+        if setup is not None:
+            setup()
+        result['peak_bytes'] = peak_memory(func)
+        results[name] = result
+    return results
+
+def bench_default_database(repeat: int) -> Dict[str, float]:
+    """Time load_default_dircolors without its session cache."""
+    clear = parser_module._default_database_cache.clear
+    result = time_call(load_default_dircolors, repeat, clear)
+    clear()
+    result['peak_bytes'] = peak_memory(load_default_dircolors)
+    return result
+
+def main(argv):
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arguments.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                           help="corpus sizes in entries")
+    arguments.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=sorted(PROFILES))
+    arguments.add_argument('--repeat', type=int, default=5, help="timing repeats per benchmark")
+    arguments.add_argument('--output', type=Path, help="write results to this JSON file")
+    arguments.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                           help="results to compare with (default: %(default)s)")
+    arguments.add_argument('--save-baseline', action='store_true',
+                           help="store this run as the baseline instead of comparing")
+    arguments.add_argument('--time-tolerance', type=float, default=0.5)
+    arguments.add_argument('--memory-tolerance', type=float, default=0.10)
+    options = arguments.parse_args(argv[1:])
+    
+    results = {}
+    print(f"{'benchmark':<40} {'ms':>10} {'median ms':>10} {'peak KiB':>10}")
+    
+    def report(name, result):
+        results[name] = result
+        print(f"{name:<40} {result['seconds'] * 1000:>10.3f} {result['median'] * 1000:>10.3f} "
+              f"{result['peak_bytes'] / 1024:>10.0f}")
+              
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in options.sizes:
+            for profile_name in options.profiles:
+                corpus = f"{profile_name}-{size}"
+                path = Path(tmp) / f"{corpus}.dircolors"
+                generate_corpus(path, size, profile_name)
+                for name, result in bench_corpus(path, Path(tmp) / 'written.dircolors',
+                                                 options.repeat).items():
+                    report(f"{name}[{corpus}]", result)
+    report('load_default_dircolors', bench_default_database(options.repeat))
+    
+    if options.output:
+        save_results(options.output, results)
+    if options.save_baseline:
+        save_results(options.baseline, results)
+        print(f"\nBaseline saved to {options.baseline}")
+        return 0
+    if not options.baseline.exists():
+        print(f"\nNo baseline at {options.baseline}; run with --save-baseline to store one")
+        return 0
+        
+    baseline = load_results(options.baseline)
+    print()
+    print_comparison(results, baseline)
+    regressions = find_regressions(results, baseline, options.time_tolerance, options.memory_tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
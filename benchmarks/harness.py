@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Timing, memory and baseline helpers shared by the benchmark scripts.
+
+Results are JSON objects of the form
+{"environment": {...}, "results": {name: {"seconds": ..., ...}}}, where
+seconds is the fastest of several repeats per call.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_DIR = Path(__file__).parent.parent
+
+def time_call(func: Callable[[], object], repeat: int = 5,
+              setup: Optional[Callable[[], object]] = None) -> Dict[str, float]:
+    """Time func(), returning the fastest and median seconds per call.
+    
+    Each repeat runs enough calls to take at least 0.2 seconds. setup, if
+    given, runs untimed before every call.
+    """
+    if setup is None:
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        totals = timer.repeat(repeat=repeat, number=number)
+        times = [total / number for total in totals]
+    else:
+        times = []
+        budget = 0.0
+        while len(times) < repeat or budget < 0.2:
+            setup()
+            start = timeit.default_timer()
+            func()
+            times.append(timeit.default_timer() - start)
+            budget += times[-1]
+    return {'seconds': min(times), 'median': statistics.median(times)}
+
+def peak_memory(func: Callable[[], object]) -> int:
+    """Peak bytes allocated by one traced call of func()."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def environment() -> Dict[str, object]:
+    """Describe the machine and revision a run was made on."""
+    info: Dict[str, object] = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+    }
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                  capture_output=True, text=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                cwd=REPO_DIR, capture_output=True, text=True)
+        if revision.returncode == 0:
+            info['revision'] = revision.stdout.strip()
+            info['dirty'] = bool(status.stdout.strip())
+    except OSError:
+        pass
+    try:
+        import numpy
+        info['numpy'] = numpy.__version__
+    except ImportError:
+        info['numpy'] = None
+    return info
+
+def save_results(path: Path, results: Dict[str, Dict[str, float]], **details) -> None:
+    """Write results with the environment they were measured in.
+    
+    details are added to the environment, e.g. which source was measured.
+    """
+    data = {'environment': dict(environment(), **details), 'results': results}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def load_results(path: Path) -> Dict[str, Dict[str, float]]:
+    """Read the results of a file written by save_results."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('results'), dict):
+        raise ValueError(f"{path} holds no benchmark results")
+    return data['results']
+
+def find_regressions(results: Dict[str, Dict[str, float]],
+                     baseline: Dict[str, Dict[str, float]],
+                     time_tolerance: float = 0.5,
+                     memory_tolerance: float = 0.10) -> List[str]:
+    """Compare results with a baseline; returns a message per regression.
+    
+    A benchmark regresses when it is more than time_tolerance slower, or
+    its peak memory more than memory_tolerance larger, than the baseline.
+    Benchmarks missing from either side are not compared.
+    """
+    regressions = []
+    for name in sorted(results.keys() & baseline.keys()):
+        current, base = results[name], baseline[name]
+        for key, tolerance, unit in (('seconds', time_tolerance, 'time'),
+                                     ('peak_bytes', memory_tolerance, 'peak memory')):
+            if key not in current or not base.get(key):
+                continue
+            ratio = current[key] / base[key]
+            if ratio > 1 + tolerance:
+                regressions.append(f"{name}: {unit} {ratio:.2f}x the baseline")
+    return regressions
+
+def format_seconds(seconds: float) -> str:
+    """Format a duration in the unit that suits it."""
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+def print_comparison(results: Dict[str, Dict[str, float]],
+                     baseline: Dict[str, Dict[str, float]]) -> None:
+    """Print time and peak memory of each benchmark relative to a baseline."""
+    width = max((len(name) for name in results), default=10)
+    print(f"{'benchmark':<{width}} {'baseline':>10} {'current':>10} {'time':>7} {'memory':>7}")
+    for name in sorted(results.keys() & baseline.keys()):
+        current, base = results[name], baseline[name]
+        time_ratio = current['seconds'] / base['seconds'] if base.get('seconds') else float('nan')
+        memory = ''
+        if current.get('peak_bytes') is not None and base.get('peak_bytes'):
+            memory = f"{current['peak_bytes'] / base['peak_bytes']:.2f}x"
+        print(f"{name:<{width}} {format_seconds(base['seconds']):>10} "
+              f"{format_seconds(current['seconds']):>10} {time_ratio:>6.2f}x {memory:>7}")
@@ -14,6 +14,9 @@ setup(
         "PyGObject>=3.42.0",
         "pycairo>=1.20.0",
     ],
+    extras_require={
+        "fast": ["numpy>=1.20"],
+    },
     python_requires=">=3.8",
     entry_points={
         "console_scripts": [
@@ -1,9 +1,28 @@
 #!/usr/bin/env python3
 
 import re
-from typing import Tuple, Optional, Dict, List
+import sys
+from functools import lru_cache
+from typing import Tuple, Optional, Dict, List, NamedTuple
 from enum import Enum
 
+from colorspace import (linear_to_rgb, linear_to_rgb_array, rgb_to_linear, rgb_to_linear_array,
+                        rgb_to_oklab, rgb_to_oklab_array, to_rgb8, to_rgb8_array)
+from quantize import PaletteQuantizer
+from palettes import DEFAULT_PROFILE, PaletteProfile
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: CVD simulation transforms one color at a time without it
+    np = None
+
+# Distinct color codes parse_color_code keeps parsed results for; a
+# truecolor theme can use thousands, at under 300 bytes each
+PARSE_CACHE_SIZE = 16384
+# Distinct color codes canonical_color_code remembers the result for
+CANONICAL_CACHE_SIZE = 8192
+
 class ColorMode(Enum):
     """Color mode enumeration."""
     BASIC_8 = "8-bit"
@@ -18,177 +37,480 @@ class Style(Enum):
     ITALIC = 3
     UNDERLINE = 4
     BLINK = 5
+    RAPID_BLINK = 6
     REVERSE = 7
+    HIDDEN = 8
     STRIKETHROUGH = 9
+    DOUBLE_UNDERLINE = 21
+    OVERLINE = 53
 
-class ColorInfo:
-    """Information about a parsed color code."""
+# RGB of the basic SGR colors 30-37 and of their bright variants 90-97
+# in the default palette profile
+BASIC_COLORS = DEFAULT_PROFILE.colors[:8]
+BRIGHT_COLORS = DEFAULT_PROFILE.colors[8:]
+PALETTE_16 = DEFAULT_PROFILE.colors
+PALETTE_256 = DEFAULT_PROFILE.palette_256
+
+# Color used for indexes outside a palette
+FALLBACK_RGB = (128, 128, 128)
+
+# Cube or gray ramp index of each extended color; these are the same in
+# every profile
+_PALETTE_256_INDEX = {rgb: i for i, rgb in enumerate(PALETTE_256) if i >= 16}
+
+# Profile whose colors parsed codes are shown in, and its 256-color palette
+_profile = DEFAULT_PROFILE
+_palette_256 = DEFAULT_PROFILE.palette_256
+
+# Quantizer for the theme-independent part of the 256-color palette,
+# created on first use
+_quantizer_256: Optional[PaletteQuantizer] = None
+
+# Packed colors: COLOR_DEFAULT when unset, 0-15 for the basic and bright
+# colors, INDEXED_COLOR | n for 256-color index n, TRUECOLOR | 0xRRGGBB
+COLOR_DEFAULT = -1
+INDEXED_COLOR = 0x100
+TRUECOLOR = 0x1000000
+
+# Bit of each style in PackedSGR.styles
+STYLE_BITS = {style: 1 << i for i, style in enumerate(Style) if style is not Style.NORMAL}
+
+class PackedSGR(NamedTuple):
+    """An SGR code reduced to a style bitmask and packed colors."""
+    styles: int = 0
+    fg: int = COLOR_DEFAULT
+    bg: int = COLOR_DEFAULT
+    underline: int = COLOR_DEFAULT
+
+# Creates PackedSGRs without the NamedTuple argument handling
+_new_tuple = tuple.__new__
+
+# What each SGR parameter does: (action, color target or style bits, value)
+_STYLE_ON, _STYLE_OFF, _SET_COLOR, _EXTENDED, _RESET, _NONE = range(6)
+_FG, _BG, _UNDERLINE = range(3)
+_IGNORED = (_NONE, 0, 0)
+
+def _build_sgr_actions() -> Dict[int, Tuple[int, int, int]]:
+    """Build the SGR parameter table."""
+    bits = STYLE_BITS
+    actions = {0: (_RESET, 0, 0)}
+    for style, bit in bits.items():
+        actions[style.value] = (_STYLE_ON, bit, 0)
+    for value, styles in (
+        (22, (Style.BOLD, Style.DIM)), (23, (Style.ITALIC,)),
+        (24, (Style.UNDERLINE, Style.DOUBLE_UNDERLINE)), (25, (Style.BLINK, Style.RAPID_BLINK)),
+        (27, (Style.REVERSE,)), (28, (Style.HIDDEN,)), (29, (Style.STRIKETHROUGH,)),
+        (55, (Style.OVERLINE,)),
+    ):
+        actions[value] = (_STYLE_OFF, sum(bits[style] for style in styles), 0)
+    for i in range(8):
+        actions[30 + i] = (_SET_COLOR, _FG, i)
+        actions[40 + i] = (_SET_COLOR, _BG, i)
+        actions[90 + i] = (_SET_COLOR, _FG, 8 + i)
+        actions[100 + i] = (_SET_COLOR, _BG, 8 + i)
+    for value, target in ((38, _FG), (48, _BG), (58, _UNDERLINE)):
+        actions[value] = (_EXTENDED, target, 0)
+        actions[value + 1] = (_SET_COLOR, target, COLOR_DEFAULT)
+    return actions
+
+_SGR_ACTIONS = _build_sgr_actions()
+
+# One parameter or sub-parameter and the separator after it
+_SGR_FIELD_RE = re.compile(r'([^;:]*)([;:]|\Z)')
+
+# Value of every parameter a code commonly holds, with or without leading
+# zeros, so most fields are looked up instead of converted
+_SGR_VALUES = {'': 0}
+for _value in range(256):
+    for _width in (1, 2, 3):
+        _SGR_VALUES[f"{_value:0{_width}d}"] = _value
+del _value, _width
+
+# Action of each parameter in _SGR_VALUES, looked up by its text
+_SGR_FIELD_ACTIONS = {field: _SGR_ACTIONS.get(value, _IGNORED)
+                      for field, value in _SGR_VALUES.items()}
+
+def _sgr_value(field: str) -> int:
+    """Get the value of a parameter; empty counts as 0, malformed as -1."""
+    value = _SGR_VALUES.get(field)
+    if value is None:
+        value = int(field) if field.isascii() and field.isdigit() else -1
+    return value
+
+def _parse_plain_sgr(code: str) -> PackedSGR:
+    """Parse a stripped SGR code that has no ':' sub-parameters."""
+    styles = 0
+    colors = [COLOR_DEFAULT, COLOR_DEFAULT, COLOR_DEFAULT]
+    field_actions = _SGR_FIELD_ACTIONS
+    values = _SGR_VALUES
+    # A missing field reads as 'x', which is malformed
+    fields = iter(code.split(';'))
+    for field in fields:
+        action = field_actions.get(field)
+        if action is None:
+            action = _SGR_ACTIONS.get(_sgr_value(field), _IGNORED)
+        kind, arg, color = action
+        if kind == _SET_COLOR:
+            colors[arg] = color
+        elif kind == _STYLE_ON:
+            styles |= arg
+        elif kind == _EXTENDED:
+            field = next(fields, 'x')
+            selector = values.get(field)
+            if selector is None:
+                selector = _sgr_value(field)
+            if selector == 5:
+                value = _sgr_value(next(fields, 'x'))
+                if 0 <= value <= 255:
+                    colors[arg] = INDEXED_COLOR | value
+            elif selector == 2:
+                rgb = (next(fields, 'x'), next(fields, 'x'), next(fields, 'x'))
+                red, green, blue = values.get(rgb[0]), values.get(rgb[1]), values.get(rgb[2])
+                if red is None or green is None or blue is None:
+                    red, green, blue = (_sgr_value(field) for field in rgb)
+                if 0 <= red <= 255 and 0 <= green <= 255 and 0 <= blue <= 255:
+                    colors[arg] = TRUECOLOR | red << 16 | green << 8 | blue
+        elif kind == _STYLE_OFF:
+            styles &= ~arg
+        elif kind == _RESET:
+            styles = 0
+            colors = [COLOR_DEFAULT, COLOR_DEFAULT, COLOR_DEFAULT]
+    return _new_tuple(PackedSGR, (styles, colors[0], colors[1], colors[2]))
+
+# Parser states: plain parameters, the ';' forms of extended colors, a ':'
+# sub-parameter group of an extended color, an underline style (4:n), and
+# a sub-parameter group that is ignored
+_PARAM, _SELECTOR, _INDEX, _RED, _GREEN, _BLUE, _SUBPARAMS, _UNDERLINE_STYLE, _SKIP = range(9)
+
+def parse_sgr(code: str) -> PackedSGR:
+    """Parse an SGR parameter string in a single pass.
     
-    def __init__(self, code: str):
-        self.original_code = code
-        self.styles: List[Style] = []
-        self.foreground: Optional[Tuple[int, int, int]] = None
-        self.background: Optional[Tuple[int, int, int]] = None
-        self.fg_256: Optional[int] = None
-        self.bg_256: Optional[int] = None
-        self.mode = ColorMode.BASIC_8
+    Handles the ECMA-48 styles and their resets, basic and bright colors,
+    and 256-color and truecolor foreground, background and underline (58)
+    colors, both as 38;5;n / 38;2;r;g;b and as ITU T.416 sub-parameters
+    (38:5:n, 38:2::r:g:b, 38:2:r:g:b). Empty parameters count as 0;
+    unknown or malformed ones are ignored, as terminals do. Codes without
+    ':' sub-parameters, the form themes use, take a table-driven fast path.
+    """
+    code = code.strip()
+    if ':' not in code:
+        return _parse_plain_sgr(code)
         
-        self._parse_code(code)
-        
-    def _parse_code(self, code: str) -> None:
-        """Parse an ANSI color code into components."""
-        if not code or not code.strip():
-            return
-            
-        # Split by semicolon
-        parts = [int(p) for p in code.split(';') if p.isdigit()]
+    styles = 0
+    colors = [COLOR_DEFAULT, COLOR_DEFAULT, COLOR_DEFAULT]
+    state = _PARAM
+    target = count = selector = 0
+    red = green = 0
+    subs = [0, 0, 0, 0]
+    actions = _SGR_ACTIONS
+    for match in _SGR_FIELD_RE.finditer(code):
+        field, separator = match.groups()
+        value = _sgr_value(field)
+        group_ends = separator != ':'
         
-        i = 0
-        while i < len(parts):
-            part = parts[i]
+        if state == _PARAM:
+            kind, arg, color = actions.get(value, _IGNORED)
+            if kind == _EXTENDED:
+                target = arg
+                state = _SELECTOR if group_ends else _SUBPARAMS
+                count = 0
+            elif not group_ends:
+                # Only extended colors and underline take sub-parameters
+                state = _UNDERLINE_STYLE if value == 4 else _SKIP
+            elif kind == _STYLE_ON:
+                styles |= arg
+            elif kind == _STYLE_OFF:
+                styles &= ~arg
+            elif kind == _SET_COLOR:
+                colors[arg] = color
+            elif kind == _RESET:
+                styles = 0
+                colors = [COLOR_DEFAULT, COLOR_DEFAULT, COLOR_DEFAULT]
+        elif state == _SELECTOR:
+            state = _INDEX if value == 5 else _RED if value == 2 else _PARAM
+        elif state == _INDEX:
+            if 0 <= value <= 255:
+                colors[target] = INDEXED_COLOR | value
+            state = _PARAM
+        elif state == _RED:
+            red, state = value, _GREEN
+        elif state == _GREEN:
+            green, state = value, _BLUE
+        elif state == _BLUE:
+            if 0 <= red <= 255 and 0 <= green <= 255 and 0 <= value <= 255:
+                colors[target] = TRUECOLOR | red << 16 | green << 8 | value
+            state = _PARAM
+        elif state == _SUBPARAMS:
+            if count == 0:
+                selector = value
+            elif count <= 4:
+                subs[count - 1] = value
+            count += 1
+            if group_ends:
+                if selector == 5 and count >= 2 and 0 <= subs[0] <= 255:
+                    colors[target] = INDEXED_COLOR | subs[0]
+                elif selector == 2 and count >= 4:
+                    # A color space id comes first when all four are given
+                    red, green, blue = subs[1:4] if count >= 5 else subs[0:3]
+                    if 0 <= red <= 255 and 0 <= green <= 255 and 0 <= blue <= 255:
+                        colors[target] = TRUECOLOR | red << 16 | green << 8 | blue
+                state = _PARAM
+        elif state == _UNDERLINE_STYLE:
+            styles &= ~(STYLE_BITS[Style.UNDERLINE] | STYLE_BITS[Style.DOUBLE_UNDERLINE])
+            if value == 2:
+                styles |= STYLE_BITS[Style.DOUBLE_UNDERLINE]
+            elif value > 0:
+                styles |= STYLE_BITS[Style.UNDERLINE]
+            state = _PARAM if group_ends else _SKIP
+        elif group_ends:
+            state = _PARAM
             
-            # Style codes
-            if part in [0, 1, 2, 3, 4, 5, 7, 9]:
-                if part == 0:
-                    self.styles.clear()  # Reset
-                else:
-                    try:
-                        self.styles.append(Style(part))
-                    except ValueError:
-                        pass
-                        
-            # 8-bit foreground colors (30-37, 90-97)
-            elif 30 <= part <= 37:
-                self.foreground = self._basic_color_to_rgb(part - 30)
-                
-            elif 90 <= part <= 97:
-                self.foreground = self._basic_color_to_rgb(part - 90, bright=True)
-                
-            # 8-bit background colors (40-47, 100-107)
-            elif 40 <= part <= 47:
-                self.background = self._basic_color_to_rgb(part - 40)
-                
-            elif 100 <= part <= 107:
-                self.background = self._basic_color_to_rgb(part - 100, bright=True)
-                
-            # 256-color or RGB mode
-            elif part == 38:  # Foreground
-                if i + 2 < len(parts) and parts[i + 1] == 5:
-                    # 256-color mode: 38;5;n
-                    self.fg_256 = parts[i + 2]
-                    self.foreground = self._color_256_to_rgb(parts[i + 2])
-                    self.mode = ColorMode.EXTENDED_256
-                    i += 2
-                elif i + 4 < len(parts) and parts[i + 1] == 2:
-                    # RGB mode: 38;2;r;g;b
-                    self.foreground = (parts[i + 2], parts[i + 3], parts[i + 4])
-                    self.mode = ColorMode.RGB_TRUECOLOR
-                    i += 4
-                    
-            elif part == 48:  # Background
-                if i + 2 < len(parts) and parts[i + 1] == 5:
-                    # 256-color mode: 48;5;n
-                    self.bg_256 = parts[i + 2]
-                    self.background = self._color_256_to_rgb(parts[i + 2])
-                    self.mode = ColorMode.EXTENDED_256
-                    i += 2
-                elif i + 4 < len(parts) and parts[i + 1] == 2:
-                    # RGB mode: 48;2;r;g;b
-                    self.background = (parts[i + 2], parts[i + 3], parts[i + 4])
-                    self.mode = ColorMode.RGB_TRUECOLOR
-                    i += 4
-                    
-            i += 1
+        if not separator:
+            break
+    return _new_tuple(PackedSGR, (styles, colors[0], colors[1], colors[2]))
+
+def packed_color_to_rgb(color: int) -> Optional[Tuple[int, int, int]]:
+    """Get the RGB of a packed color, or None when it is unset."""
+    if color < 0:
+        return None
+    if color >= TRUECOLOR:
+        return ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+    return _palette_256[color & 0xFF]
+
+@lru_cache(maxsize=None)
+def _styles_of(mask: int) -> Tuple[Style, ...]:
+    """Get the styles set in a PackedSGR.styles bitmask."""
+    return tuple(style for style, bit in STYLE_BITS.items() if mask & bit)
+
+@lru_cache(maxsize=None)
+def _style_params(mask: int) -> Tuple[str, ...]:
+    """Get the SGR parameters of a PackedSGR.styles bitmask, in order."""
+    return tuple(str(style.value) for style, bit in STYLE_BITS.items() if mask & bit)
+
+def format_sgr(packed: PackedSGR) -> str:
+    """Write a parsed code in its shortest form.
+    
+    Styles come first in parameter order, then the foreground, background
+    and underline colors, each in the form it was given (basic, 256-color
+    or truecolor) without leading zeros. A code setting nothing is '0'.
+    """
+    params = list(_style_params(packed.styles))
+    for color, extended, basic, bright in ((packed.fg, 38, 30, 90), (packed.bg, 48, 40, 100),
+                                           (packed.underline, 58, None, None)):
+        if color < 0:
+            continue
+        if color >= TRUECOLOR:
+            params.append(f"{extended};2;{(color >> 16) & 0xFF};{(color >> 8) & 0xFF};{color & 0xFF}")
+        elif color >= INDEXED_COLOR or basic is None:
+            params.append(f"{extended};5;{color & 0xFF}")
+        elif color < 8:
+            params.append(str(basic + color))
+        else:
+            params.append(str(bright + color - 8))
+    return ';'.join(params) or '0'
+
+# Codes canonical_color_code rewrites; others, such as a LINK target or
+# OPTIONS flags, are kept as they are
+_SGR_CODE_RE = re.compile(r'[\d;:]*\Z')
+
+def _sgr_is_modelled(code: str) -> bool:
+    """Check that parse_sgr keeps the meaning of every parameter of a code."""
+    fields = iter(code.split(';'))
+    for field in fields:
+        values = [_sgr_value(part) for part in field.split(':')]
+        first = values[0]
+        if len(values) > 1:
+            # Sub-parameter groups: extended colors and underline styles
+            if first in (38, 48, 58):
+                if values[1] == 5 and len(values) == 3 and 0 <= values[2] <= 255:
+                    continue
+                if (values[1] == 2 and len(values) in (5, 6)
+                        and all(0 <= value <= 255 for value in values[-3:])):
+                    continue
+            elif first == 4 and len(values) == 2 and 0 <= values[1] <= 2:
+                continue
+            return False
+        if first in (38, 48, 58):
+            selector = _sgr_value(next(fields, 'x'))
+            count = 1 if selector == 5 else 3 if selector == 2 else 0
+            if not count:
+                return False
+            if not all(0 <= _sgr_value(next(fields, 'x')) <= 255 for _ in range(count)):
+                return False
+        elif first not in _SGR_ACTIONS:
+            return False
+    return True
+
+@lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+def canonical_color_code(code: str) -> str:
+    """Get the shortest code equivalent to an SGR code.
+    
+    '01;34', '1;34', '34;01' and '00;01;34' all become '1;34'. Results are
+    interned, so equivalent codes give the same string object and can be
+    compared with 'is' or used as exact cache keys. Text that is not an
+    SGR parameter list, or that has parameters parse_sgr does not model
+    (such as 51 or the curly underline 4:3), is only stripped, so it never
+    shares a canonical form with a code of different meaning.
+    """
+    code = code.strip()
+    if _SGR_CODE_RE.match(code) and _sgr_is_modelled(code):
+        code = format_sgr(parse_sgr(code))
+    return sys.intern(code)
+
+def pack_rgb(rgb: Optional[Tuple[int, int, int]]) -> int:
+    """Pack an RGB color as a truecolor, or None as COLOR_DEFAULT."""
+    if rgb is None:
+        return COLOR_DEFAULT
+    r, g, b = rgb
+    return TRUECOLOR | r << 16 | g << 8 | b
+
+class ColorInfo:
+    """Information about a parsed color code.
+    
+    Instances are immutable once parsed, since parse_color_code hands the
+    same object to every caller asking for the same code. Use replace()
+    to get a modified copy. packed holds the parse result the other
+    attributes are derived from.
+    """
     
-    def _basic_color_to_rgb(self, color_index: int, bright: bool = False) -> Tuple[int, int, int]:
-        """Convert basic 8-color index to RGB."""
-        basic_colors = [
-            (0, 0, 0),       # Black
-            (128, 0, 0),     # Red
-            (0, 128, 0),     # Green
-            (128, 128, 0),   # Yellow
-            (0, 0, 128),     # Blue
-            (128, 0, 128),   # Magenta
-            (0, 128, 128),   # Cyan
-            (192, 192, 192), # White
-        ]
+    __slots__ = ('original_code', 'packed', 'styles', 'fg_256', 'bg_256', 'mode')
+    
+    def __init__(self, code: str, packed: Optional[PackedSGR] = None):
+        if packed is None:
+            packed = parse_sgr(code or '')
+        styles, fg, bg, underline = packed
+        widest = max(fg, bg, underline)
+        if widest >= TRUECOLOR:
+            mode = ColorMode.RGB_TRUECOLOR
+        elif widest >= INDEXED_COLOR:
+            mode = ColorMode.EXTENDED_256
+        else:
+            mode = ColorMode.BASIC_8
+            
+        # Attributes are only set here, through the slot descriptors, since
+        # __setattr__ refuses changes
+        set_code, set_packed, set_styles, set_fg_256, set_bg_256, set_mode = _COLOR_INFO_SLOTS
+        set_code(self, code)
+        set_packed(self, packed)
+        set_styles(self, _styles_of(styles))
+        set_fg_256(self, fg & 0xFF if INDEXED_COLOR <= fg < TRUECOLOR else None)
+        set_bg_256(self, bg & 0xFF if INDEXED_COLOR <= bg < TRUECOLOR else None)
+        set_mode(self, mode)
         
-        bright_colors = [
-            (128, 128, 128), # Bright Black (Gray)
-            (255, 0, 0),     # Bright Red
-            (0, 255, 0),     # Bright Green
-            (255, 255, 0),   # Bright Yellow
-            (0, 0, 255),     # Bright Blue
-            (255, 0, 255),   # Bright Magenta
-            (0, 255, 255),   # Bright Cyan
-            (255, 255, 255), # Bright White
-        ]
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ColorInfo is immutable, cannot set {name}")
         
-        if 0 <= color_index <= 7:
-            return bright_colors[color_index] if bright else basic_colors[color_index]
-        return (128, 128, 128)  # Default gray
+    # Colors are looked up in the active palette profile on each access
+    @property
+    def foreground(self) -> Optional[Tuple[int, int, int]]:
+        """Foreground RGB, or None when unset."""
+        return packed_color_to_rgb(self.packed.fg)
         
-    def _color_256_to_rgb(self, color_index: int) -> Tuple[int, int, int]:
-        """Convert 256-color index to RGB."""
-        if color_index < 16:
-            # Standard colors (0-15)
-            if color_index < 8:
-                return self._basic_color_to_rgb(color_index, False)
-            else:
-                return self._basic_color_to_rgb(color_index - 8, True)
-                
-        elif color_index < 232:
-            # 216 color cube (16-231): 6x6x6
-            index = color_index - 16
-            r = (index // 36) % 6
-            g = (index // 6) % 6
-            b = index % 6
-            
-            # Convert 0-5 to 0-255
-            def component_to_rgb(c):
-                return 0 if c == 0 else 55 + c * 40
-                
-            return (component_to_rgb(r), component_to_rgb(g), component_to_rgb(b))
-            
-        else:
-            # Grayscale (232-255)
-            gray = 8 + (color_index - 232) * 10
-            return (gray, gray, gray)
+    @property
+    def background(self) -> Optional[Tuple[int, int, int]]:
+        """Background RGB, or None when unset."""
+        return packed_color_to_rgb(self.packed.bg)
+        
+    @property
+    def underline_color(self) -> Optional[Tuple[int, int, int]]:
+        """Underline RGB, or None when unset."""
+        return packed_color_to_rgb(self.packed.underline)
+        
+    def __repr__(self):
+        return f"ColorInfo({self.original_code!r})"
+        
+    def replace(self, **changes) -> 'ColorInfo':
+        """Get a copy with some attributes changed, e.g. foreground=None.
+        
+        styles, foreground, background and underline_color can be changed;
+        new colors are kept as truecolor.
+        """
+        packed = self.packed
+        if 'styles' in changes:
+            mask = sum(STYLE_BITS.get(style, 0) for style in set(changes.pop('styles')))
+            packed = packed._replace(styles=mask)
+        for name, field in (('foreground', 'fg'), ('background', 'bg'),
+                            ('underline_color', 'underline')):
+            if name in changes:
+                packed = packed._replace(**{field: pack_rgb(changes.pop(name))})
+        if changes:
+            raise TypeError(f"Unknown ColorInfo attributes: {', '.join(changes)}")
+        return ColorInfo(self.original_code, packed)
+
+# Setters of the ColorInfo slots, in __slots__ order
+_COLOR_INFO_SLOTS = tuple(getattr(ColorInfo, name).__set__ for name in ColorInfo.__slots__)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_normalized_code(code: str) -> ColorInfo:
+    """Parse a code already stripped of surrounding whitespace."""
+    return ColorInfo(code, parse_sgr(code) if ':' in code else _parse_plain_sgr(code))
 
 def parse_color_code(code: str) -> ColorInfo:
-    """Parse a color code string and return color information."""
-    return ColorInfo(code)
+    """Parse a color code string and return color information.
+    
+    Themes reuse a few dozen codes across thousands of entries, so results
+    are shared from a bounded LRU cache keyed on the stripped code. The
+    returned ColorInfo is immutable.
+    """
+    return _parse_normalized_code(code.strip() if code else '')
 
-def rgb_to_256_color(r: int, g: int, b: int) -> int:
-    """Convert RGB values to the closest 256-color index."""
-    # Check grayscale first
-    if r == g == b:
-        if r < 8:
-            return 16  # Black
-        elif r > 238:
-            return 231  # White
-        else:
-            return 232 + int((r - 8) / 10)
+def parse_cache_info():
+    """Get the hits, misses and size of the parse_color_code cache."""
+    return _parse_normalized_code.cache_info()
+
+def clear_parse_cache() -> None:
+    """Empty the parse_color_code cache and reset its counters."""
+    _parse_normalized_code.cache_clear()
+
+def set_palette_profile(profile: PaletteProfile) -> None:
+    """Show basic and bright colors as a terminal using profile does.
     
-    # Convert to 6x6x6 color cube
-    def rgb_to_6(val):
-        if val < 48:
-            return 0
-        elif val < 115:
-            return 1
-        else:
-            return int((val - 35) / 40)
+    Parsed codes store palette indexes, so cached results stay valid and
+    pick up the new colors without being parsed again.
+    """
+    global _profile, _palette_256
+    _profile, _palette_256 = profile, profile.palette_256
+
+def get_palette_profile() -> PaletteProfile:
+    """Get the palette profile colors are shown in."""
+    return _profile
+
+def get_quantizer(colors: int = 256) -> PaletteQuantizer:
+    """Get the shared quantizer for a target palette size.
     
-    r6 = rgb_to_6(r)
-    g6 = rgb_to_6(g)
-    b6 = rgb_to_6(b)
+    colors is the target palette: 8 and 16 give indexes into the active
+    profile's 16 colors, 256 gives indexes into the color cube or gray
+    ramp (16-255), whose colors do not depend on the terminal's theme.
+    """
+    global _quantizer_256
+    if colors == 256:
+        if _quantizer_256 is None:
+            _quantizer_256 = PaletteQuantizer(PALETTE_256[16:], range(16, 256))
+        return _quantizer_256
+    quantizer = _profile.quantizers.get(colors)
+    if quantizer is None:
+        raise ValueError(f"Unsupported palette size: {colors}")
+    return quantizer
+
+def nearest_color_index(r: int, g: int, b: int, colors: int = 256) -> int:
+    """Get the palette index perceptually nearest to an RGB color.
     
-    return 16 + (36 * r6) + (6 * g6) + b6
+    See get_quantizer for the palettes colors selects.
+    """
+    return get_quantizer(colors).nearest(r, g, b)
+
+def rgb_to_256_color(r: int, g: int, b: int) -> int:
+    """Convert RGB values to the closest 256-color index."""
+    index = _PALETTE_256_INDEX.get((r, g, b))
+    if index is not None:
+        return index
+    return nearest_color_index(r, g, b, 256)
 
 def color_256_to_rgb(color_index: int) -> Tuple[int, int, int]:
     """Convert 256-color index to RGB."""
-    info = ColorInfo(f"38;5;{color_index}")
-    return info.foreground or (128, 128, 128)
+    if 0 <= color_index < 256:
+        return _palette_256[color_index]
+    return FALLBACK_RGB
 
 def build_color_code(foreground_rgb: Optional[Tuple[int, int, int]] = None,
                     background_rgb: Optional[Tuple[int, int, int]] = None,
@@ -232,59 +554,91 @@ def build_color_code(foreground_rgb: Optional[Tuple[int, int, int]] = None,
 
 def _rgb_to_basic_color(r: int, g: int, b: int) -> int:
     """Convert RGB to closest basic 8-color."""
-    # Simple distance-based matching
-    basic_colors = [
-        (0, 0, 0),       # 30 - Black
-        (128, 0, 0),     # 31 - Red
-        (0, 128, 0),     # 32 - Green
-        (128, 128, 0),   # 33 - Yellow
-        (0, 0, 128),     # 34 - Blue
-        (128, 0, 128),   # 35 - Magenta
-        (0, 128, 128),   # 36 - Cyan
-        (192, 192, 192), # 37 - White
-    ]
-    
-    bright_colors = [
-        (128, 128, 128), # 90 - Bright Black
-        (255, 0, 0),     # 91 - Bright Red
-        (0, 255, 0),     # 92 - Bright Green
-        (255, 255, 0),   # 93 - Bright Yellow
-        (0, 0, 255),     # 94 - Bright Blue
-        (255, 0, 255),   # 95 - Bright Magenta
-        (0, 255, 255),   # 96 - Bright Cyan
-        (255, 255, 255), # 97 - Bright White
-    ]
-    
-    def color_distance(c1, c2):
-        return sum((a - b) ** 2 for a, b in zip(c1, c2))
-    
-    # Check basic colors
-    min_dist = float('inf')
-    best_color = 30
-    
-    for i, color in enumerate(basic_colors):
-        dist = color_distance((r, g, b), color)
-        if dist < min_dist:
-            min_dist = dist
-            best_color = 30 + i
-    
-    # Check bright colors
-    for i, color in enumerate(bright_colors):
-        dist = color_distance((r, g, b), color)
-        if dist < min_dist:
-            min_dist = dist
-            best_color = 90 + i
-    
-    return best_color
+    code = _profile.basic_codes.get((r, g, b))
+    if code is not None:
+        return code
+    index = nearest_color_index(r, g, b, 16)
+    return 30 + index if index < 8 else 82 + index
 
 def get_color_palette_256() -> List[Tuple[int, int, int]]:
     """Get the full 256-color palette as RGB tuples."""
-    palette = []
+    return list(_palette_256)
+
+# Machado, Oliveira and Fernandes (2009) matrices for full severity,
+# applied to linear RGB
+CVD_MATRICES = {
+    'protanopia': ((0.152286, 1.052583, -0.204868),
+                   (0.114503, 0.786281, 0.099216),
+                   (-0.003882, -0.048116, 1.051998)),
+    'deuteranopia': ((0.367322, 0.860646, -0.227968),
+                     (0.280085, 0.672501, 0.047413),
+                     (-0.011820, 0.042940, 0.968881)),
+    'tritanopia': ((1.255528, -0.076749, -0.178779),
+                   (-0.078411, 0.930809, 0.147602),
+                   (0.004733, 0.691367, 0.303900)),
+}
+
+# OKLab distance below which two colors are hard to tell apart as text
+CVD_DISTANCE_THRESHOLD = 0.05
+
+def simulate_cvd(colors: List[Tuple[int, int, int]], kind: str) -> List[Tuple[int, int, int]]:
+    """Simulate how colors look with a color vision deficiency.
     
-    for i in range(256):
-        palette.append(color_256_to_rgb(i))
+    kind is one of CVD_MATRICES. All colors are transformed in one batch
+    when NumPy is available.
+    """
+    matrix = CVD_MATRICES.get(kind)
+    if matrix is None:
+        raise ValueError(f"Unknown color vision deficiency: {kind}")
+    if not colors:
+        return []
+    if np is not None:
+        simulated = rgb_to_linear_array(colors) @ np.array(matrix).T
+        return [tuple(rgb) for rgb in to_rgb8_array(linear_to_rgb_array(simulated)).tolist()]
         
-    return palette
+    simulated = []
+    for rgb in colors:
+        r, g, b = rgb_to_linear(*rgb)
+        simulated.append(to_rgb8(*linear_to_rgb(*(
+            row[0] * r + row[1] * g + row[2] * b for row in matrix
+        ))))
+    return simulated
+
+def confusable_pairs(colors: Dict[str, Tuple[int, int, int]], kind: str,
+                     threshold: float = CVD_DISTANCE_THRESHOLD) -> List[Tuple[str, str, float]]:
+    """Find named colors that a color vision deficiency makes look alike.
+    
+    Returns (name, name, distance) for pairs at least threshold apart in
+    OKLab with normal vision but closer once simulated, closest first.
+    """
+    names = list(colors)
+    original = [colors[name] for name in names]
+    simulated = simulate_cvd(original, kind)
+    pairs = []
+    if np is not None and names:
+        labs = rgb_to_oklab_array(original)
+        simulated_labs = rgb_to_oklab_array(simulated)
+        before = np.linalg.norm(labs[:, None, :] - labs[None, :, :], axis=2)
+        after = np.linalg.norm(simulated_labs[:, None, :] - simulated_labs[None, :, :], axis=2)
+        first, second = np.nonzero(np.triu((before >= threshold) & (after < threshold), 1))
+        for i, j in zip(first.tolist(), second.tolist()):
+            pairs.append((names[i], names[j], float(after[i, j])))
+    else:
+        labs = [rgb_to_oklab(*rgb) for rgb in original]
+        simulated_labs = [rgb_to_oklab(*rgb) for rgb in simulated]
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                if _distance(labs[i], labs[j]) < threshold:
+                    continue
+                distance = _distance(simulated_labs[i], simulated_labs[j])
+                if distance < threshold:
+                    pairs.append((names[i], names[j], distance))
+    pairs.sort(key=lambda pair: pair[2])
+    return pairs
+
+def _distance(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
+    """Euclidean distance of two OKLab colors."""
+    return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2) ** 0.5
 
 def format_color_code_display(code: str) -> str:
     """Format a color code for display with description."""
@@ -308,32 +662,11 @@ def format_color_code_display(code: str) -> str:
         r, g, b = info.background
         parts.append(f"BG: rgb({r}, {g}, {b})")
         
+    if info.underline_color:
+        r, g, b = info.underline_color
+        parts.append(f"UL: rgb({r}, {g}, {b})")
+        
     if info.mode != ColorMode.BASIC_8:
         parts.append(f"Mode: {info.mode.value}")
     
-    return " | ".join(parts) if parts else "Default"
-
-# Color scheme presets
-COLOR_SCHEMES = {
-    'default': {
-        'DIR': '01;34',
-        'LINK': '01;36',
-        'EXEC': '01;32',
-        '.tar': '01;31',
-        '.txt': '00;32'
-    },
-    'dark_theme': {
-        'DIR': '01;94',
-        'LINK': '01;96',
-        'EXEC': '01;92',
-        '.tar': '01;91',
-        '.txt': '00;93'
-    },
-    'high_contrast': {
-        'DIR': '01;93;40',
-        'LINK': '01;95;40',
-        'EXEC': '01;92;40',
-        '.tar': '01;91;40',
-        '.txt': '01;97;40'
-    }
-}
\ No newline at end of file
+    return " | ".join(parts) if parts else "Default"
\ No newline at end of file
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+import math
+from typing import Callable, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: only the scalar conversions are available without it
+    np = None
+
+Color = Tuple[float, float, float]
+
+# Color spaces convert() knows. 'rgb' is sRGB with 0-255 channels, 'linear'
+# linear-light RGB in 0-1. HSL and HSV have hue in degrees and saturation,
+# lightness and value in 0-1; OKLCH has hue in degrees, which means
+# little for grays, whose chroma is within rounding of 0.
+SPACES = ('rgb', 'linear', 'hsl', 'hsv', 'oklab', 'oklch')
+
+# sRGB transfer function breakpoints, in encoded and in linear values
+_SRGB_KNEE = 0.04045
+_LINEAR_KNEE = 0.0031308
+
+# OKLab matrices from linear RGB to cone responses (LMS), and from their
+# cube roots to OKLab
+_LMS_FROM_LINEAR = (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+)
+_OKLAB_FROM_LMS = (
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+)
+
+def _invert(m: Sequence[Sequence[float]]) -> Tuple[Color, Color, Color]:
+    """Invert a 3x3 matrix."""
+    (a, b, c), (d, e, f), (g, h, i) = m
+    det = a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+    return (
+        ((e * i - f * h) / det, (c * h - b * i) / det, (b * f - c * e) / det),
+        ((f * g - d * i) / det, (a * i - c * g) / det, (c * d - a * f) / det),
+        ((d * h - e * g) / det, (b * g - a * h) / det, (a * e - b * d) / det),
+    )
+
+# Exact inverses, so conversions round-trip to floating point precision
+_LINEAR_FROM_LMS = _invert(_LMS_FROM_LINEAR)
+_LMS_FROM_OKLAB = _invert(_OKLAB_FROM_LMS)
+
+def _apply(m: Sequence[Sequence[float]], x: float, y: float, z: float) -> Color:
+    """Multiply a 3x3 matrix by a column vector."""
+    (a, b, c), (d, e, f), (g, h, i) = m
+    return (a * x + b * y + c * z, d * x + e * y + f * z, g * x + h * y + i * z)
+
+def _cbrt(value: float) -> float:
+    """Real cube root, also of negative values."""
+    return math.copysign(abs(value) ** (1 / 3), value)
+
+def srgb_to_linear(value: float) -> float:
+    """Convert an sRGB channel in 0-255 to linear light in 0-1."""
+    value /= 255.0
+    if value <= _SRGB_KNEE:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+def linear_to_srgb(value: float) -> float:
+    """Convert linear light in 0-1 to an sRGB channel in 0-255, unrounded.
+    
+    Values outside 0-1 are extended symmetrically rather than clipped.
+    """
+    if abs(value) <= _LINEAR_KNEE:
+        return value * 12.92 * 255.0
+    return math.copysign(1.055 * abs(value) ** (1 / 2.4) - 0.055, value) * 255.0
+
+def to_rgb8(r: float, g: float, b: float) -> Tuple[int, int, int]:
+    """Round an sRGB color to 0-255 integer channels, clipping to the gamut."""
+    return (min(max(int(round(r)), 0), 255), min(max(int(round(g)), 0), 255),
+            min(max(int(round(b)), 0), 255))
+
+def rgb_to_linear(r: float, g: float, b: float) -> Color:
+    """Convert an sRGB color to linear RGB."""
+    return (srgb_to_linear(r), srgb_to_linear(g), srgb_to_linear(b))
+
+def linear_to_rgb(r: float, g: float, b: float) -> Color:
+    """Convert a linear RGB color to sRGB."""
+    return (linear_to_srgb(r), linear_to_srgb(g), linear_to_srgb(b))
+
+def linear_to_oklab(r: float, g: float, b: float) -> Color:
+    """Convert a linear RGB color to OKLab."""
+    l, m, s = _apply(_LMS_FROM_LINEAR, r, g, b)
+    return _apply(_OKLAB_FROM_LMS, _cbrt(l), _cbrt(m), _cbrt(s))
+
+def oklab_to_linear(L: float, a: float, b: float) -> Color:
+    """Convert an OKLab color to linear RGB."""
+    l, m, s = _apply(_LMS_FROM_OKLAB, L, a, b)
+    return _apply(_LINEAR_FROM_LMS, l * l * l, m * m * m, s * s * s)
+
+def rgb_to_oklab(r: float, g: float, b: float) -> Color:
+    """Convert an sRGB color with 0-255 channels to OKLab."""
+    # Written out, as palette searches call this once per lookup table cell;
+    # the cone responses of colors in the gamut are never negative
+    r, g, b = srgb_to_linear(r), srgb_to_linear(g), srgb_to_linear(b)
+    if r < 0 or g < 0 or b < 0:
+        return linear_to_oklab(r, g, b)
+    (m11, m12, m13), (m21, m22, m23), (m31, m32, m33) = _LMS_FROM_LINEAR
+    l = (m11 * r + m12 * g + m13 * b) ** (1 / 3)
+    m = (m21 * r + m22 * g + m23 * b) ** (1 / 3)
+    s = (m31 * r + m32 * g + m33 * b) ** (1 / 3)
+    (k11, k12, k13), (k21, k22, k23), (k31, k32, k33) = _OKLAB_FROM_LMS
+    return (k11 * l + k12 * m + k13 * s, k21 * l + k22 * m + k23 * s, k31 * l + k32 * m + k33 * s)
+
+def oklab_to_rgb(L: float, a: float, b: float) -> Color:
+    """Convert an OKLab color to sRGB; it may be out of gamut."""
+    return linear_to_rgb(*oklab_to_linear(L, a, b))
+
+def oklab_to_oklch(L: float, a: float, b: float) -> Color:
+    """Convert an OKLab color to OKLCH."""
+    chroma = math.hypot(a, b)
+    hue = math.degrees(math.atan2(b, a)) % 360.0 if chroma else 0.0
+    return (L, chroma, hue)
+
+def oklch_to_oklab(L: float, c: float, h: float) -> Color:
+    """Convert an OKLCH color to OKLab."""
+    hue = math.radians(h)
+    return (L, c * math.cos(hue), c * math.sin(hue))
+
+def rgb_to_oklch(r: float, g: float, b: float) -> Color:
+    """Convert an sRGB color to OKLCH."""
+    return oklab_to_oklch(*rgb_to_oklab(r, g, b))
+
+def oklch_to_rgb(L: float, c: float, h: float) -> Color:
+    """Convert an OKLCH color to sRGB; it may be out of gamut."""
+    return oklab_to_rgb(*oklch_to_oklab(L, c, h))
+
+def _hue(r: float, g: float, b: float, high: float, spread: float) -> float:
+    """Get the HSL/HSV hue in degrees of 0-1 channels."""
+    if spread == 0:
+        return 0.0
+    if high == r:
+        hue = (g - b) / spread
+    elif high == g:
+        hue = (b - r) / spread + 2
+    else:
+        hue = (r - g) / spread + 4
+    return hue * 60.0 % 360.0
+
+def rgb_to_hsl(r: float, g: float, b: float) -> Color:
+    """Convert an sRGB color to HSL."""
+    r, g, b = r / 255.0, g / 255.0, b / 255.0
+    high, low = max(r, g, b), min(r, g, b)
+    spread = high - low
+    lightness = (high + low) / 2
+    saturation = 0.0
+    if spread:
+        saturation = spread / (1 - abs(high + low - 1))
+    return (_hue(r, g, b, high, spread), saturation, lightness)
+
+def hsl_to_rgb(h: float, s: float, l: float) -> Color:
+    """Convert an HSL color to sRGB."""
+    amount = s * min(l, 1 - l)
+    channels = []
+    for n in (0, 8, 4):
+        k = (n + h / 30.0) % 12
+        channels.append((l - amount * max(-1.0, min(k - 3, 9 - k, 1.0))) * 255.0)
+    return tuple(channels)
+
+def rgb_to_hsv(r: float, g: float, b: float) -> Color:
+    """Convert an sRGB color to HSV."""
+    r, g, b = r / 255.0, g / 255.0, b / 255.0
+    high, low = max(r, g, b), min(r, g, b)
+    spread = high - low
+    saturation = spread / high if high else 0.0
+    return (_hue(r, g, b, high, spread), saturation, high)
+
+def hsv_to_rgb(h: float, s: float, v: float) -> Color:
+    """Convert an HSV color to sRGB."""
+    channels = []
+    for n in (5, 3, 1):
+        k = (n + h / 60.0) % 6
+        channels.append((v - v * s * max(0.0, min(k, 4 - k, 1.0))) * 255.0)
+    return tuple(channels)
+
+def rgb_to_linear_array(rgb):
+    """Convert an (N, 3) array of sRGB colors to linear RGB."""
+    c = np.asarray(rgb, dtype=float) / 255.0
+    return np.where(c <= _SRGB_KNEE, c / 12.92, ((np.abs(c) + 0.055) / 1.055) ** 2.4)
+
+def linear_to_rgb_array(linear):
+    """Convert an (N, 3) array of linear RGB colors to unrounded sRGB."""
+    v = np.asarray(linear, dtype=float)
+    magnitude = np.abs(v)
+    encoded = np.where(magnitude <= _LINEAR_KNEE, magnitude * 12.92,
+                       1.055 * magnitude ** (1 / 2.4) - 0.055)
+    return np.copysign(encoded, v) * 255.0
+
+def to_rgb8_array(rgb):
+    """Round an (N, 3) array of sRGB colors to 0-255 integers."""
+    return np.clip(np.rint(rgb), 0, 255).astype(int)
+
+def linear_to_oklab_array(linear):
+    """Convert an (N, 3) array of linear RGB colors to OKLab."""
+    lms = np.cbrt(np.asarray(linear, dtype=float) @ np.array(_LMS_FROM_LINEAR).T)
+    return lms @ np.array(_OKLAB_FROM_LMS).T
+
+def oklab_to_linear_array(lab):
+    """Convert an (N, 3) array of OKLab colors to linear RGB."""
+    lms = np.asarray(lab, dtype=float) @ np.array(_LMS_FROM_OKLAB).T
+    return lms ** 3 @ np.array(_LINEAR_FROM_LMS).T
+
+def rgb_to_oklab_array(rgb):
+    """Convert an (N, 3) array of sRGB colors to OKLab."""
+    return linear_to_oklab_array(rgb_to_linear_array(rgb))
+
+def oklab_to_rgb_array(lab):
+    """Convert an (N, 3) array of OKLab colors to unrounded sRGB."""
+    return linear_to_rgb_array(oklab_to_linear_array(lab))
+
+def oklab_to_oklch_array(lab):
+    """Convert an (N, 3) array of OKLab colors to OKLCH."""
+    lab = np.asarray(lab, dtype=float)
+    chroma = np.hypot(lab[:, 1], lab[:, 2])
+    hue = np.where(chroma > 0, np.degrees(np.arctan2(lab[:, 2], lab[:, 1])) % 360.0, 0.0)
+    return np.stack([lab[:, 0], chroma, hue], axis=1)
+
+def oklch_to_oklab_array(lch):
+    """Convert an (N, 3) array of OKLCH colors to OKLab."""
+    lch = np.asarray(lch, dtype=float)
+    hue = np.radians(lch[:, 2])
+    return np.stack([lch[:, 0], lch[:, 1] * np.cos(hue), lch[:, 1] * np.sin(hue)], axis=1)
+
+def rgb_to_oklch_array(rgb):
+    """Convert an (N, 3) array of sRGB colors to OKLCH."""
+    return oklab_to_oklch_array(rgb_to_oklab_array(rgb))
+
+def oklch_to_rgb_array(lch):
+    """Convert an (N, 3) array of OKLCH colors to unrounded sRGB."""
+    return oklab_to_rgb_array(oklch_to_oklab_array(lch))
+
+def _hue_array(c, high, spread):
+    """Get the HSL/HSV hues in degrees of an (N, 3) array of 0-1 channels."""
+    r, g, b = c[:, 0], c[:, 1], c[:, 2]
+    safe = np.where(spread > 0, spread, 1.0)
+    hue = np.select(
+        [spread == 0, high == r, high == g],
+        [0.0, (g - b) / safe, (b - r) / safe + 2],
+        (r - g) / safe + 4,
+    )
+    return hue * 60.0 % 360.0
+
+def rgb_to_hsl_array(rgb):
+    """Convert an (N, 3) array of sRGB colors to HSL."""
+    c = np.asarray(rgb, dtype=float) / 255.0
+    high, low = c.max(axis=1), c.min(axis=1)
+    spread = high - low
+    lightness = (high + low) / 2
+    divisor = 1 - np.abs(high + low - 1)
+    saturation = np.where(spread > 0, spread / np.where(divisor > 0, divisor, 1.0), 0.0)
+    return np.stack([_hue_array(c, high, spread), saturation, lightness], axis=1)
+
+def hsl_to_rgb_array(hsl):
+    """Convert an (N, 3) array of HSL colors to sRGB."""
+    hsl = np.asarray(hsl, dtype=float)
+    h, s, l = hsl[:, 0:1], hsl[:, 1:2], hsl[:, 2:3]
+    k = (np.array([0, 8, 4]) + h / 30.0) % 12
+    amount = s * np.minimum(l, 1 - l)
+    return (l - amount * np.clip(np.minimum(k - 3, 9 - k), -1.0, 1.0)) * 255.0
+
+def rgb_to_hsv_array(rgb):
+    """Convert an (N, 3) array of sRGB colors to HSV."""
+    c = np.asarray(rgb, dtype=float) / 255.0
+    high, low = c.max(axis=1), c.min(axis=1)
+    spread = high - low
+    saturation = np.where(high > 0, spread / np.where(high > 0, high, 1.0), 0.0)
+    return np.stack([_hue_array(c, high, spread), saturation, high], axis=1)
+
+def hsv_to_rgb_array(hsv):
+    """Convert an (N, 3) array of HSV colors to sRGB."""
+    hsv = np.asarray(hsv, dtype=float)
+    h, s, v = hsv[:, 0:1], hsv[:, 1:2], hsv[:, 2:3]
+    k = (np.array([5, 3, 1]) + h / 60.0) % 6
+    return (v - v * s * np.clip(np.minimum(k, 4 - k), 0.0, 1.0)) * 255.0
+
+# Direct conversions between spaces; convert() chains them
+_STEPS: Dict[Tuple[str, str], str] = {
+    ('rgb', 'linear'): 'rgb_to_linear', ('linear', 'rgb'): 'linear_to_rgb',
+    ('rgb', 'hsl'): 'rgb_to_hsl', ('hsl', 'rgb'): 'hsl_to_rgb',
+    ('rgb', 'hsv'): 'rgb_to_hsv', ('hsv', 'rgb'): 'hsv_to_rgb',
+    ('rgb', 'oklab'): 'rgb_to_oklab', ('oklab', 'rgb'): 'oklab_to_rgb',
+    ('linear', 'oklab'): 'linear_to_oklab', ('oklab', 'linear'): 'oklab_to_linear',
+    ('oklab', 'oklch'): 'oklab_to_oklch', ('oklch', 'oklab'): 'oklch_to_oklab',
+}
+
+def _route(source: str, target: str) -> List[str]:
+    """Find the shortest chain of direct conversions from source to target."""
+    paths = {source: []}
+    queue = [source]
+    for space in queue:
+        for (step_source, step_target), name in _STEPS.items():
+            if step_source == space and step_target not in paths:
+                paths[step_target] = paths[space] + [name]
+                queue.append(step_target)
+    return paths[target]
+
+_ROUTES: Dict[Tuple[str, str], List[str]] = {
+    (source, target): _route(source, target) for source in SPACES for target in SPACES
+}
+
+def _route_of(source: str, target: str) -> List[str]:
+    """Get the conversions from source to target."""
+    route = _ROUTES.get((source, target))
+    if route is None:
+        unknown = source if source not in SPACES else target
+        raise ValueError(f"Unknown color space: {unknown}")
+    return route
+
+def convert(color: Sequence[float], source: str, target: str) -> Color:
+    """Convert one color between any two of SPACES."""
+    route = _route_of(source, target)
+    result = tuple(color)
+    for name in route:
+        result = _FUNCTIONS[name](*result)
+    return result
+
+def convert_array(colors, source: str, target: str):
+    """Convert an (N, 3) array of colors between any two of SPACES."""
+    route = _route_of(source, target)
+    result = np.asarray(colors, dtype=float).reshape(-1, 3)
+    for name in route:
+        result = _FUNCTIONS[name + '_array'](result)
+    return result
+
+_FUNCTIONS: Dict[str, Callable] = {
+    name: globals()[name] for step in _STEPS.values() for name in (step, step + '_array')
+}
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 class AppConfig:
     """Simple configuration management for the application."""
@@ -22,6 +22,17 @@ class AppConfig:
             },
             'window_width': 1200,
             'window_height': 800,
+            # Cache parsed files under ~/.cache/dircolor-editor
+            'parse_cache_enabled': True,
+            'parse_cache_max_mb': 32,
+            # Terminal palette basic colors are previewed in; more can be
+            # added as JSON files in ~/.config/dircolor-editor/palettes
+            'palette_profile': 'vga',
+            # Contrast audit thresholds (WCAG 2.x ratio, APCA Lc) and
+            # '#rrggbb' backgrounds checked besides the preview background
+            'contrast_min_ratio': 4.5,
+            'contrast_min_lc': 60.0,
+            'contrast_backgrounds': [],
         }
         
         self.config = self.load_config()
@@ -67,6 +78,11 @@ class AppConfig:
         """Get the preview background color."""
         return self.config['preview_background_color']
         
+    def get_background_rgb(self) -> Tuple[int, int, int]:
+        """Get the preview background color with 0-255 channels."""
+        color = self.get_background_color()
+        return (round(color['r'] * 255), round(color['g'] * 255), round(color['b'] * 255))
+        
     def set_background_color(self, r: float, g: float, b: float, a: float = 1.0) -> None:
         """Set the preview background color."""
         self.config['preview_background_color'] = {
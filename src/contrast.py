@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from color_utils import Style, canonical_color_code, get_palette_profile, parse_color_code
+from colorspace import rgb_to_linear_array, srgb_to_linear
+from parser import ColorEntry, DirColorsParser
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: contrast is computed one pair at a time without it
+    np = None
+
+RGB = Tuple[int, int, int]
+
+# WCAG 2.x AA minimum for normal text
+MIN_WCAG_RATIO = 4.5
+# APCA lightness contrast recommended for body text
+MIN_APCA_LC = 60.0
+
+# APCA-W3 0.0.98G-4g constants
+_APCA_EXPONENT = 2.4
+_APCA_COEFFICIENTS = (0.2126729, 0.7151522, 0.0721750)
+_APCA_BLACK_THRESHOLD = 0.022
+_APCA_BLACK_CLAMP = 1.414
+_APCA_DELTA_Y_MIN = 0.0005
+_APCA_SCALE = 1.14
+_APCA_OFFSET = 0.027
+_APCA_LOW_CLIP = 0.1
+
+def relative_luminance(rgb: RGB) -> float:
+    """Get the WCAG relative luminance of an sRGB color."""
+    r, g, b = rgb
+    return 0.2126 * srgb_to_linear(r) + 0.7152 * srgb_to_linear(g) + 0.0722 * srgb_to_linear(b)
+
+def wcag_contrast(text: RGB, background: RGB) -> float:
+    """Get the WCAG 2.x contrast ratio of two colors, from 1 to 21."""
+    lighter, darker = sorted((relative_luminance(text), relative_luminance(background)), reverse=True)
+    return (lighter + 0.05) / (darker + 0.05)
+
+def _apca_luminance(rgb: RGB) -> float:
+    """Get the APCA screen luminance of an sRGB color, soft-clamped near black."""
+    y = sum(k * (c / 255.0) ** _APCA_EXPONENT for k, c in zip(_APCA_COEFFICIENTS, rgb))
+    if y < _APCA_BLACK_THRESHOLD:
+        y += (_APCA_BLACK_THRESHOLD - y) ** _APCA_BLACK_CLAMP
+    return y
+
+def apca_contrast(text: RGB, background: RGB) -> float:
+    """Get the APCA lightness contrast (Lc) of text on a background.
+    
+    Dark text on a light background is positive, light text on a dark
+    background negative; about 106 and -108 are the extremes.
+    """
+    y_text = _apca_luminance(text)
+    y_back = _apca_luminance(background)
+    if abs(y_back - y_text) < _APCA_DELTA_Y_MIN:
+        return 0.0
+    if y_back > y_text:
+        sapc = (y_back ** 0.56 - y_text ** 0.57) * _APCA_SCALE
+        return 0.0 if sapc < _APCA_LOW_CLIP else (sapc - _APCA_OFFSET) * 100
+    sapc = (y_back ** 0.65 - y_text ** 0.62) * _APCA_SCALE
+    return 0.0 if sapc > -_APCA_LOW_CLIP else (sapc + _APCA_OFFSET) * 100
+
+def contrast_arrays(texts: List[RGB], backgrounds: List[RGB]) -> Tuple[List[float], List[float]]:
+    """Compute WCAG ratios and APCA Lc of many text/background pairs with NumPy."""
+    colors = np.array(texts + backgrounds, dtype=float)
+    luminance = rgb_to_linear_array(colors) @ np.array([0.2126, 0.7152, 0.0722])
+    count = len(texts)
+    lum_text, lum_back = luminance[:count], luminance[count:]
+    ratios = (np.maximum(lum_text, lum_back) + 0.05) / (np.minimum(lum_text, lum_back) + 0.05)
+    
+    y = (colors / 255.0) ** _APCA_EXPONENT @ np.array(_APCA_COEFFICIENTS)
+    y = np.where(y < _APCA_BLACK_THRESHOLD,
+                 y + np.abs(_APCA_BLACK_THRESHOLD - y) ** _APCA_BLACK_CLAMP, y)
+    y_text, y_back = y[:count], y[count:]
+    normal = (y_back ** 0.56 - y_text ** 0.57) * _APCA_SCALE
+    reverse = (y_back ** 0.65 - y_text ** 0.62) * _APCA_SCALE
+    lc = np.where(
+        y_back > y_text,
+        np.where(normal < _APCA_LOW_CLIP, 0.0, normal - _APCA_OFFSET),
+        np.where(reverse > -_APCA_LOW_CLIP, 0.0, reverse + _APCA_OFFSET),
+    ) * 100
+    lc[np.abs(y_back - y_text) < _APCA_DELTA_Y_MIN] = 0.0
+    return ratios.tolist(), lc.tolist()
+
+def _text_pairs(code: str, backgrounds: Sequence[RGB]) -> List[Tuple[RGB, RGB]]:
+    """Get the (text, background) color pairs a code is shown with.
+    
+    A code with its own background is shown on it alone; otherwise on each
+    terminal background. Codes without a text color, or hidden text, have
+    nothing to check.
+    """
+    info = parse_color_code(code)
+    if info.foreground is None or Style.HIDDEN in info.styles:
+        return []
+    if info.background is not None:
+        pairs = [(info.foreground, info.background)]
+    else:
+        pairs = [(info.foreground, background) for background in backgrounds]
+    if Style.REVERSE in info.styles:
+        pairs = [(back, text) for text, back in pairs]
+    return pairs
+
+class ContrastResult(NamedTuple):
+    """Worst contrast of a color code over the backgrounds it was checked on."""
+    ratio: float
+    lc: float
+    passed: bool
+    
+    def describe(self) -> str:
+        """Short text for the status bar."""
+        return f"contrast {self.ratio:.1f}:1, Lc {self.lc:.0f}"
+
+class ContrastAuditor:
+    """Checks whether every entry of a theme is readable.
+    
+    Results are cached per canonical color code, so a theme is measured
+    once per distinct meaning of a code and re-auditing after an edit only
+    measures codes not seen before. The cache is dropped when the
+    backgrounds or the active palette profile change. Codes are measured
+    in one vectorized batch when NumPy is available.
+    """
+    
+    def __init__(self, backgrounds: Sequence[RGB], min_ratio: float = MIN_WCAG_RATIO,
+                 min_lc: float = MIN_APCA_LC):
+        self.min_ratio = min_ratio
+        self.min_lc = min_lc
+        self.backgrounds: Tuple[RGB, ...] = ()
+        self._cache: Dict[str, Optional[ContrastResult]] = {}
+        self._profile = get_palette_profile()
+        # Result of each audited entry, None for entries with nothing to check
+        self.results: Dict[str, Optional[ContrastResult]] = {}
+        self.failing: Set[str] = set()
+        self.set_backgrounds(backgrounds)
+        
+    def set_backgrounds(self, backgrounds: Sequence[RGB]) -> None:
+        """Change the terminal backgrounds entries are checked against."""
+        backgrounds = tuple(tuple(background) for background in backgrounds)
+        if not backgrounds:
+            raise ValueError("At least one background is needed")
+        if backgrounds != self.backgrounds:
+            self.backgrounds = backgrounds
+            self._cache.clear()
+            
+    def measure(self, codes: Iterable[str]) -> Dict[str, Optional[ContrastResult]]:
+        """Get the results of color codes, measuring those not cached."""
+        profile = get_palette_profile()
+        if profile is not self._profile:
+            self._profile = profile
+            self._cache.clear()
+            
+        cache = self._cache
+        new_codes = [code for code in dict.fromkeys(codes) if code not in cache]
+        if new_codes:
+            spans = []
+            texts: List[RGB] = []
+            backs: List[RGB] = []
+            for code in new_codes:
+                pairs = _text_pairs(code, self.backgrounds)
+                spans.append((len(texts), len(texts) + len(pairs)))
+                texts.extend(text for text, _ in pairs)
+                backs.extend(back for _, back in pairs)
+                
+            if np is not None and texts:
+                ratios, lcs = contrast_arrays(texts, backs)
+            else:
+                ratios = [wcag_contrast(t, b) for t, b in zip(texts, backs)]
+                lcs = [apca_contrast(t, b) for t, b in zip(texts, backs)]
+                
+            for code, (start, end) in zip(new_codes, spans):
+                if start == end:
+                    cache[code] = None
+                    continue
+                ratio = min(ratios[start:end])
+                lc = min(lcs[start:end], key=abs)
+                cache[code] = ContrastResult(
+                    ratio, lc, ratio >= self.min_ratio and abs(lc) >= self.min_lc
+                )
+        return cache
+        
+    def audit(self, entries: Iterable[ColorEntry]) -> Set[str]:
+        """Audit all color entries of a theme; returns the failing file types."""
+        entries = [entry for entry in entries
+                   if entry.file_type.upper() not in DirColorsParser.NON_COLOR_KEYWORDS
+                   and entry.color_code != 'target']
+        results = self.measure(entry.canonical_code for entry in entries)
+        self.results = {entry.file_type: results[entry.canonical_code] for entry in entries}
+        self.failing = {file_type for file_type, result in self.results.items()
+                        if result is not None and not result.passed}
+        return self.failing
+        
+    def update_entry(self, file_type: str, color_code: str) -> Optional[ContrastResult]:
+        """Re-audit one entry after an edit."""
+        if file_type.upper() in DirColorsParser.NON_COLOR_KEYWORDS or color_code == 'target':
+            self.remove_entry(file_type)
+            return None
+        color_code = canonical_color_code(color_code)
+        result = self.measure((color_code,))[color_code]
+        self.results[file_type] = result
+        if result is not None and not result.passed:
+            self.failing.add(file_type)
+        else:
+            self.failing.discard(file_type)
+        return result
+        
+    def remove_entry(self, file_type: str) -> None:
+        """Forget a removed entry."""
+        self.results.pop(file_type, None)
+        self.failing.discard(file_type)
\ No newline at end of file
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+class Severity(Enum):
+    """How serious a parse problem is."""
+    WARNING = "warning"
+    ERROR = "error"
+
+class Diagnostic(NamedTuple):
+    """A problem found at a 1-based line and column of a parsed file."""
+    line: int
+    column: int
+    severity: Severity
+    message: str
+    
+    def __str__(self) -> str:
+        return f"line {self.line}, column {self.column}: {self.severity.value}: {self.message}"
+
+class DiagnosticCollector:
+    """Bounded collection of parse diagnostics.
+    
+    Every problem is counted under a kind such as 'invalid-color-code', but
+    only the first per_kind of each kind, and at most limit overall, are
+    kept as Diagnostic records. A clean file never touches the collector.
+    """
+    
+    def __init__(self, limit: int = 200, per_kind: int = 20):
+        self.limit = limit
+        self.per_kind = per_kind
+        self.diagnostics: List[Diagnostic] = []
+        # kind -> [severity, occurrences, first line]
+        self.kinds: Dict[str, List[Any]] = {}
+        
+    def report(self, kind: str, line: int, column: int,
+               severity: Severity, message: str) -> None:
+        """Record a problem."""
+        stats = self.kinds.get(kind)
+        if stats is None:
+            stats = self.kinds[kind] = [severity, 0, line]
+        stats[1] += 1
+        if stats[1] <= self.per_kind and len(self.diagnostics) < self.limit:
+            self.diagnostics.append(Diagnostic(line, column, severity, message))
+            
+    def warning(self, kind: str, line: int, column: int, message: str) -> None:
+        """Record a warning."""
+        self.report(kind, line, column, Severity.WARNING, message)
+        
+    def error(self, kind: str, line: int, column: int, message: str) -> None:
+        """Record an error."""
+        self.report(kind, line, column, Severity.ERROR, message)
+        
+    def clear(self) -> None:
+        """Forget all recorded problems."""
+        self.diagnostics.clear()
+        self.kinds.clear()
+        
+    def __len__(self) -> int:
+        return sum(stats[1] for stats in self.kinds.values())
+        
+    def __bool__(self) -> bool:
+        return bool(self.kinds)
+        
+    def __iter__(self):
+        return iter(self.diagnostics)
+        
+    def count(self, severity: Severity) -> int:
+        """Count every recorded problem of a severity, including dropped ones."""
+        return sum(stats[1] for stats in self.kinds.values() if stats[0] is severity)
+        
+    @property
+    def suppressed(self) -> int:
+        """Number of problems counted but not kept as records."""
+        return len(self) - len(self.diagnostics)
+        
+    def summary(self) -> List[str]:
+        """One line per kind of problem, most frequent first."""
+        lines = []
+        for kind, (severity, count, first_line) in sorted(
+                self.kinds.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{kind} ({severity.value}): {count} "
+                         f"occurrence{'s' if count != 1 else ''}, first on line {first_line}")
+        return lines
+        
+    def describe(self) -> str:
+        """Short human readable summary for the status bar."""
+        errors = self.count(Severity.ERROR)
+        warnings = self.count(Severity.WARNING)
+        parts = []
+        if errors:
+            parts.append(f"{errors} error{'s' if errors != 1 else ''}")
+        if warnings:
+            parts.append(f"{warnings} warning{'s' if warnings != 1 else ''}")
+        return ", ".join(parts)
+        
+    def to_payload(self) -> Tuple[List[Tuple], Dict[str, Tuple]]:
+        """Convert to marshal-friendly data for the parse cache."""
+        records = [(d.line, d.column, d.severity.value, d.message) for d in self.diagnostics]
+        kinds = {kind: (severity.value, count, first_line)
+                 for kind, (severity, count, first_line) in self.kinds.items()}
+        return records, kinds
+        
+    def restore_payload(self, payload: Tuple[List[Tuple], Dict[str, Tuple]]) -> None:
+        """Restore data produced by to_payload."""
+        records, kinds = payload
+        self.diagnostics = [Diagnostic(line, column, Severity(severity), message)
+                            for line, column, severity, message in records]
+        self.kinds = {kind: [Severity(severity), count, first_line]
+                      for kind, (severity, count, first_line) in kinds.items()}
\ No newline at end of file
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from color_utils import PALETTE_256, rgb_to_256_color
+from contrast import MIN_APCA_LC, MIN_WCAG_RATIO, apca_contrast, contrast_arrays, wcag_contrast
+from parser import DirColorsParser
+from colorspace import rgb_to_oklab, rgb_to_oklab_array
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: without it a coarser grid is searched and not refined
+    np = None
+
+RGB = Tuple[int, int, int]
+
+# Levels per channel of the truecolor candidate grid
+GRID_LEVELS = 24
+FALLBACK_GRID_LEVELS = 12
+
+# Largest OKLab distance of an extension's shade from its category color
+MAX_SHADE_DISTANCE = 0.08
+
+class GeneratedColors(NamedTuple):
+    """Colors chosen for extension categories and their extensions."""
+    categories: Dict[str, RGB]
+    extensions: Dict[str, RGB]
+    # Smallest OKLab distance between two category colors
+    min_distance: float
+    palette_256: bool
+    
+    def codes(self, existing: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Get the color code of each extension.
+        
+        existing maps extensions to their current codes. Their foreground
+        parameter is replaced in place and every other parameter is kept
+        as written.
+        """
+        existing = existing or {}
+        codes = {}
+        for ext, rgb in self.extensions.items():
+            if self.palette_256:
+                foreground = f"38;5;{rgb_to_256_color(*rgb)}"
+            else:
+                foreground = "38;2;%d;%d;%d" % rgb
+            codes[ext] = _replace_foreground(existing.get(ext, ''), foreground)
+        return codes
+
+def _sgr_number(field: str) -> int:
+    """Get the value of an SGR parameter; empty counts as 0, malformed as -1."""
+    if not field:
+        return 0
+    return int(field) if field.isascii() and field.isdigit() else -1
+
+def _replace_foreground(code: str, foreground: str) -> str:
+    """Put a foreground parameter in place of the one a code sets.
+    
+    The effective foreground parameter is replaced; when there is none, or a
+    reset follows it, the new one is appended. Styles, backgrounds,
+    underline colors and parameters the editor does not model are kept.
+    """
+    code = code.strip()
+    if not code:
+        return foreground
+    fields = code.split(';')
+    span = None
+    i = 0
+    while i < len(fields):
+        value = _sgr_number(fields[i].split(':', 1)[0])
+        length = 1
+        if value in (38, 48, 58) and ':' not in fields[i]:
+            # The ';' form consumes its selector and the color after it
+            selector = _sgr_number(fields[i + 1]) if i + 1 < len(fields) else -1
+            length = 3 if selector == 5 else 5 if selector == 2 else 2
+        if value == 38 or 30 <= value <= 37 or value == 39 or 90 <= value <= 97:
+            span = (i, min(i + length, len(fields)))
+        elif value == 0:
+            span = None
+        i += length
+    if span is None:
+        return f"{code};{foreground}"
+    start, end = span
+    return ';'.join(fields[:start] + [foreground] + fields[end:])
+
+def _candidates(backgrounds: Sequence[RGB], palette_256: bool,
+                min_ratio: float, min_lc: float) -> List[RGB]:
+    """Get the colors readable on every background."""
+    if palette_256:
+        # The first 16 colors differ between terminals
+        colors = list(dict.fromkeys(PALETTE_256[16:]))
+    else:
+        count = GRID_LEVELS if np is not None else FALLBACK_GRID_LEVELS
+        levels = [round(i * 255 / (count - 1)) for i in range(count)]
+        colors = [(r, g, b) for r in levels for g in levels for b in levels]
+        
+    texts = colors * len(backgrounds)
+    backs = [background for background in backgrounds for _ in colors]
+    if np is not None:
+        ratios, lcs = contrast_arrays(texts, backs)
+    else:
+        ratios = [wcag_contrast(t, b) for t, b in zip(texts, backs)]
+        lcs = [apca_contrast(t, b) for t, b in zip(texts, backs)]
+    readable = [True] * len(colors)
+    for position, (ratio, lc) in enumerate(zip(ratios, lcs)):
+        if ratio < min_ratio or abs(lc) < min_lc:
+            readable[position % len(colors)] = False
+    return [rgb for rgb, ok in zip(colors, readable) if ok]
+
+def _distances(labs, lab):
+    """Distances from every color in labs to one color."""
+    if np is not None:
+        return np.sqrt(((labs - lab) ** 2).sum(axis=1))
+    return [((l - lab[0]) ** 2 + (a - lab[1]) ** 2 + (b - lab[2]) ** 2) ** 0.5 for l, a, b in labs]
+
+def _distance(a, b) -> float:
+    """Euclidean distance of two OKLab colors."""
+    return float(((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2) ** 0.5)
+
+def _farthest_points(labs, start: int, count: int) -> List[int]:
+    """Pick up to count positions, each as far as possible from those before.
+    
+    Stops early once only colors already picked are left.
+    """
+    chosen = [start]
+    nearest = _distances(labs, labs[start])
+    while len(chosen) < count:
+        if np is not None:
+            position = int(nearest.argmax())
+        else:
+            position = max(range(len(nearest)), key=nearest.__getitem__)
+        if nearest[position] <= 0:
+            break
+        chosen.append(position)
+        distances = _distances(labs, labs[position])
+        if np is not None:
+            nearest = np.minimum(nearest, distances)
+        else:
+            nearest = [min(a, b) for a, b in zip(nearest, distances)]
+    return chosen
+
+def _spread_apart(labs, chosen: List[int]) -> None:
+    """Move the closest two chosen colors apart until neither can move.
+    
+    Each round tries to replace one color of the closest pair with the
+    candidate farthest from all other chosen colors, using a candidate by
+    chosen distance matrix updated one column per move.
+    """
+    count = len(chosen)
+    matrix = np.stack([_distances(labs, labs[c]) for c in chosen], axis=1)
+    for _ in range(4 * count):
+        pairs = matrix[chosen]
+        pairs[np.diag_indices(count)] = np.inf
+        first, second = np.unravel_index(pairs.argmin(), pairs.shape)
+        closest = pairs[first, second]
+        for moving in (first, second):
+            others = np.delete(matrix, moving, axis=1).min(axis=1)
+            position = int(others.argmax())
+            if others[position] > closest + 1e-9:
+                chosen[moving] = position
+                matrix[:, moving] = _distances(labs, labs[position])
+                break
+        else:
+            return
+
+def generate_distinct_colors(categories: Dict[str, Sequence[str]], backgrounds: Sequence[RGB],
+                             palette_256: bool = False, min_ratio: float = MIN_WCAG_RATIO,
+                             min_lc: float = MIN_APCA_LC) -> GeneratedColors:
+    """Choose a color per category and a shade of it per extension.
+    
+    Category colors are picked from the candidates readable on every
+    background to maximize the smallest OKLab distance between them:
+    greedily farthest-first, then, with NumPy, by moving the closest pair
+    apart. Each extension gets a shade within MAX_SHADE_DISTANCE of its
+    category color and nearer to it than to any other category's.
+    """
+    colors = _candidates(backgrounds, palette_256, min_ratio, min_lc)
+    if not colors:
+        raise ValueError("No colors are readable on the background")
+    if np is not None:
+        labs = rgb_to_oklab_array(colors)
+    else:
+        labs = [rgb_to_oklab(*rgb) for rgb in colors]
+        
+    names = list(categories)
+    if not names:
+        return GeneratedColors({}, {}, 0.0, palette_256)
+    # Start from the most colorful candidate
+    start = max(range(len(colors)), key=lambda p: labs[p][1] ** 2 + labs[p][2] ** 2)
+    chosen = _farthest_points(labs, start, len(names))
+    if np is not None and len(chosen) > 1:
+        _spread_apart(labs, chosen)
+    # More categories than distinct colors share them
+    chosen = [chosen[i % len(chosen)] for i in range(len(names))]
+    
+    base_labs = [labs[position] for position in chosen]
+    separation = []
+    for i, lab in enumerate(base_labs):
+        others = [_distance(lab, other) for j, other in enumerate(base_labs) if j != i]
+        separation.append(min(others) if others else float('inf'))
+        
+    category_colors = {}
+    extension_colors = {}
+    for name, base, apart in zip(names, chosen, separation):
+        category_colors[name] = colors[base]
+        extensions = sorted(categories[name])
+        if not extensions:
+            continue
+        radius = min(apart / 2, MAX_SHADE_DISTANCE)
+        distances = _distances(labs, labs[base])
+        if np is not None:
+            ball = np.flatnonzero(distances < radius).tolist() or [base]
+            ball_labs = labs[ball]
+        else:
+            ball = [p for p in range(len(colors)) if distances[p] < radius] or [base]
+            ball_labs = [labs[p] for p in ball]
+        shades = [ball[p] for p in _farthest_points(ball_labs, ball.index(base), len(extensions))]
+        for i, extension in enumerate(extensions):
+            extension_colors[extension] = colors[shades[i % len(shades)]]
+            
+    min_distance = min(separation) if len(names) > 1 else 0.0
+    return GeneratedColors(category_colors, extension_colors, float(min_distance), palette_256)
+
+def assign_distinct_colors(parser: DirColorsParser, backgrounds: Sequence[RGB],
+                           palette_256: bool = False, min_ratio: float = MIN_WCAG_RATIO,
+                           min_lc: float = MIN_APCA_LC) -> GeneratedColors:
+    """Recolor every extension of a parser by its category.
+    
+    Only the foreground changes: entries keep their styles, background,
+    comments and, for a loaded file, their lines.
+    """
+    categories = {
+        category[:-len('_extensions')]: extensions
+        for category, extensions in parser.get_categories().items()
+        if category.endswith('_extensions')
+    }
+    generated = generate_distinct_colors(categories, backgrounds, palette_256, min_ratio, min_lc)
+    existing = {extension: parser.get_entry(extension).color_code
+                for extension in generated.extensions}
+    for extension, code in generated.codes(existing).items():
+        entry = parser.get_entry(extension)
+        if entry.color_code != code:
+            parser.set_entry(extension, code, entry.comment)
+    return generated
\ No newline at end of file
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+import re
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from pathlib import Path
+
+from storage import new_hasher
+
+# A '#' that starts a trailing comment
+_COMMENT_RE = re.compile(r'\s#')
+
+def split_comment(text: str) -> Tuple[str, Optional[str]]:
+    """Split an entry line into its body and trailing comment, if any.
+    
+    Like dircolors, '#' only starts a comment at the beginning of a word,
+    so patterns such as *# are kept. Neither part is stripped.
+    """
+    hash_pos = text.find('#')
+    if hash_pos > 0 and not text[hash_pos - 1].isspace():
+        comment_match = _COMMENT_RE.search(text, hash_pos)
+        hash_pos = comment_match.end() - 1 if comment_match else -1
+    if hash_pos < 0:
+        return text, None
+    return text[:hash_pos], text[hash_pos + 1:]
+
+class DocumentLine:
+    """A single source line of a .dircolors document.
+    
+    text excludes the newline, which is kept separately as written. A line
+    whose text is None has been deleted.
+    """
+    
+    __slots__ = ('text', 'newline', 'key', 'dirty')
+    
+    def __init__(self, text: Optional[str], newline: str, key: Optional[str] = None,
+                 dirty: bool = False):
+        self.text = text
+        self.newline = newline
+        self.key = key
+        self.dirty = dirty
+        
+    def render(self) -> str:
+        """Render the line as it should appear in the file."""
+        if self.text is None:
+            return ''
+        return self.text + self.newline
+
+class DircolorsDocument:
+    """Lossless line-based model of a .dircolors file.
+    
+    Every source line is kept verbatim together with its newline. Editing
+    an entry only touches the line that defines it, so saving reproduces
+    the original file except for the changed lines.
+    """
+    
+    def __init__(self, source: Optional[Path] = None):
+        self.lines: List[DocumentLine] = []
+        self.source = Path(source) if source else None
+        # Fingerprint of the content read by read_lines
+        self.digest: Optional[str] = None
+        # Bytes read_lines has consumed so far
+        self.bytes_read = 0
+        # file type -> line defining it (the last definition wins)
+        self._index: Dict[str, DocumentLine] = {}
+        # section header -> last line appended under it in this session
+        self._appended_sections: Dict[str, DocumentLine] = {}
+        
+    def read_lines(self, f: BinaryIO) -> Iterator[str]:
+        """Read lines from a binary file, recording each one and yielding its text."""
+        hasher = new_hasher()
+        for raw in f:
+            hasher.update(raw)
+            self.bytes_read += len(raw)
+            if raw.endswith(b'\r\n'):
+                text, newline = raw[:-2], '\r\n'
+            elif raw.endswith(b'\n'):
+                text, newline = raw[:-1], '\n'
+            else:
+                text, newline = raw, ''
+            text = text.decode('utf-8')
+            self.lines.append(DocumentLine(text, newline))
+            yield text
+            
+        self.digest = hasher.hexdigest()
+            
+    def bind_last(self, key: str) -> None:
+        """Record that the most recently read line defines key."""
+        self.bind(len(self.lines) - 1, key)
+        
+    def bind(self, line_index: int, key: str) -> None:
+        """Record that the line at line_index defines key."""
+        line = self.lines[line_index]
+        line.key = key
+        self._index[key] = line
+        
+    def bindings(self) -> List[Tuple[int, str]]:
+        """Get (line_index, key) pairs for every entry line, in file order."""
+        return [(i, line.key) for i, line in enumerate(self.lines) if line.key is not None]
+        
+    def has_entry(self, key: str) -> bool:
+        """Check whether a line in the document defines key."""
+        return key in self._index
+        
+    @property
+    def dirty(self) -> bool:
+        """Whether any line has changed since loading or the last save."""
+        return any(line.dirty for line in self.lines)
+        
+    def set_entry(self, key: str, color_code: str, comment: Optional[str] = None,
+                  after: Optional[str] = None, section: Optional[str] = None) -> None:
+        """Update the line defining key, or insert a new one.
+        
+        New lines go after the line defining after when given, otherwise at
+        the end of the document under the optional section header.
+        """
+        line = self._index.get(key)
+        if line is not None:
+            line.text = self._edit_text(line.text, key, color_code, comment)
+            line.dirty = True
+            return
+            
+        line = DocumentLine(_format_entry(key, color_code, comment), '\n', key, True)
+        anchor = self._index.get(after) if after else None
+        if anchor is not None:
+            self._insert_after(anchor, [line])
+        else:
+            self._append(line, section)
+        self._index[key] = line
+        
+    def remove_entry(self, key: str) -> bool:
+        """Delete the line defining key. Returns True if it existed."""
+        line = self._index.pop(key, None)
+        if line is None:
+            return False
+        line.text = None
+        line.dirty = True
+        return True
+        
+    def move_entry(self, key: str, after: Optional[str] = None,
+                   section: Optional[str] = None) -> bool:
+        """Move the line defining key after another entry or into a section."""
+        line = self._index.get(key)
+        if line is None or (after is not None and after == key):
+            return False
+        text = line.text
+        self.remove_entry(key)
+        
+        moved = DocumentLine(text, line.newline or '\n', key, True)
+        anchor = self._index.get(after) if after else None
+        if anchor is not None:
+            self._insert_after(anchor, [moved])
+        else:
+            self._append(moved, section)
+        self._index[key] = moved
+        return True
+        
+    def _edit_text(self, text: str, key: str, color_code: str, comment: Optional[str]) -> str:
+        """Change the color code of an entry line, keeping its layout."""
+        body, old_comment = split_comment(text)
+        if old_comment is not None:
+            old_comment = old_comment.strip()
+        key_pos = body.find(key)
+        if comment == old_comment and key_pos >= 0:
+            tokens = body[key_pos + len(key):].split()
+            if len(tokens) == 1:
+                code_pos = body.find(tokens[0], key_pos + len(key))
+                return text[:code_pos] + color_code + text[code_pos + len(tokens[0]):]
+        # Comment changed or unusual layout: re-render the whole line
+        indent = text[:len(text) - len(text.lstrip())]
+        return indent + _format_entry(key, color_code, comment)
+        
+    def _insert_after(self, anchor: DocumentLine, new_lines: List[DocumentLine]) -> None:
+        """Insert lines directly after anchor."""
+        position = self.lines.index(anchor) + 1
+        # Skip lines deleted right after the anchor
+        while position < len(self.lines) and self.lines[position].text is None:
+            position += 1
+        if anchor.newline == '':
+            anchor.newline = '\n'
+            anchor.dirty = True
+        self.lines[position:position] = new_lines
+        
+    def _append(self, line: DocumentLine, section: Optional[str]) -> None:
+        """Append a line at the end of the document, under a section header."""
+        if section is not None and section in self._appended_sections:
+            self._insert_after(self._appended_sections[section], [line])
+            self._appended_sections[section] = line
+            return
+            
+        new_lines = [line]
+        if section is not None:
+            new_lines = [
+                DocumentLine('', '\n', dirty=True),
+                DocumentLine(section, '\n', dirty=True),
+                line,
+            ]
+            self._appended_sections[section] = line
+            
+        last = next((existing for existing in reversed(self.lines) if existing.text is not None), None)
+        if last is not None and last.newline == '':
+            last.newline = '\n'
+            last.dirty = True
+        self.lines.extend(new_lines)
+        
+    def render(self) -> bytes:
+        """Serialize the whole document."""
+        return ''.join(line.render() for line in self.lines).encode('utf-8')
+        
+    def mark_saved(self, filepath: Path) -> None:
+        """Drop deleted lines and mark the rest as matching the saved file."""
+        kept = []
+        for line in self.lines:
+            if line.text is None:
+                continue
+            line.dirty = False
+            kept.append(line)
+        self.lines = kept
+        self._appended_sections.clear()
+        self.source = Path(filepath)
+
+def _format_entry(key: str, color_code: str, comment: Optional[str]) -> str:
+    """Format an entry line without a newline."""
+    if comment:
+        return f"{key} {color_code} # {comment}"
+    return f"{key} {color_code}"
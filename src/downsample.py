@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from color_utils import PALETTE_256, get_quantizer
+from parser import DirColorsParser
+from storage import SaveResult
+
+# Palette sizes a theme can be downsampled to
+TARGET_COLORS = (256, 16, 8)
+
+# A whole 38/48/58 extended color or bright color parameter sequence; the
+# ':' forms may give a color space id before r:g:b
+_COLOR_PARAM_RE = re.compile(r"""(?<![^;])(?:
+    0*([345])8;0*(?:2;(\d*);(\d*);(\d*)|5;(\d*))
+  | 0*([345])8:0*(?:2:(?:\d*:)?(\d*):(\d*):(\d*)|5:(\d*))
+  | 0*(9[0-7]|10[0-7])
+)(?![^;])""", re.VERBOSE)
+
+# Basic parameter offset for the ground digit of 38, 48 and 58
+_GROUND_OFFSETS = {'3': 30, '4': 40, '5': 50}
+
+def _plan_code(code: str, colors: int, rgbs: List[Tuple[int, int, int]]) -> Optional[list]:
+    """Split a code into parts, queuing colors that need quantizing.
+    
+    Parts are strings kept as they are, or (offset, slot) pairs for the
+    color in rgbs[slot], where offset is 30 for foreground, 40 for
+    background and 50 for underline color. Returns None when nothing in
+    the code changes.
+    """
+    parts = None
+    last = 0
+    for match in _COLOR_PARAM_RE.finditer(code):
+        ground, r, g, b, index, sub_ground, sub_r, sub_g, sub_b, sub_index, bright = match.groups()
+        if sub_ground is not None:
+            ground, r, g, b, index = sub_ground, sub_r, sub_g, sub_b, sub_index
+        offset = _GROUND_OFFSETS.get(ground)
+        if r is not None:
+            # Truecolor is never available in a smaller palette
+            part = (offset, len(rgbs))
+            rgbs.append((min(int(r or 0), 255), min(int(g or 0), 255), min(int(b or 0), 255)))
+        elif index is not None:
+            if colors == 256:
+                continue
+            index = min(int(index or 0), 255)
+            if index < 16:
+                part = _basic_code(index, offset, colors)
+            else:
+                part = (offset, len(rgbs))
+                rgbs.append(PALETTE_256[index])
+        else:
+            if colors != 8:
+                continue
+            # Bright colors become their normal counterpart
+            part = str(int(bright) - 60)
+        if parts is None:
+            parts = []
+        parts.append(code[last:match.start()])
+        parts.append(part)
+        last = match.end()
+    if parts is not None:
+        parts.append(code[last:])
+    return parts
+
+def _basic_code(index: int, offset: int, colors: int) -> str:
+    """Format the SGR parameter of a 0-15 palette index."""
+    if colors == 8 and index >= 8:
+        index -= 8
+    if offset == 50:
+        # Underline color has no basic parameter, only the indexed form
+        return f"58;5;{index}"
+    if index < 8:
+        return str(offset + index)
+    return str(offset + 52 + index)
+
+def downsample_codes(codes: Iterable[str], colors: int) -> List[str]:
+    """Convert color codes for a terminal with fewer colors.
+    
+    Truecolor and, below 256 colors, 256-color parameters are replaced by
+    the perceptually nearest color of the target palette, underline colors
+    included; styles and all other parameters are kept as written. Every
+    distinct code is planned once and all colors needing quantization are
+    looked up in one batch.
+    """
+    if colors not in TARGET_COLORS:
+        raise ValueError(f"Unsupported palette size: {colors}")
+    codes = list(codes)
+    rgbs: List[Tuple[int, int, int]] = []
+    plans: Dict[str, Optional[list]] = {}
+    for code in codes:
+        if code not in plans:
+            plans[code] = _plan_code(code, colors, rgbs)
+            
+    indexes = get_quantizer(colors).nearest_many(rgbs)
+    converted = {}
+    for code, plan in plans.items():
+        if plan is None:
+            converted[code] = code
+            continue
+        parts = []
+        for part in plan:
+            if isinstance(part, tuple):
+                offset, slot = part
+                index = indexes[slot]
+                if colors == 256:
+                    part = f"{offset + 8};5;{index}"
+                else:
+                    part = _basic_code(index, offset, colors)
+            parts.append(part)
+        converted[code] = ''.join(parts)
+    return [converted[code] for code in codes]
+
+def downsample_parser(parser: DirColorsParser, colors: int) -> int:
+    """Convert every color entry of a parser in place.
+    
+    Entries keep their comments and, for a loaded file, their lines.
+    Returns the number of entries changed.
+    """
+    entries = [entry for entry in parser.entries.values()
+               if entry.file_type.upper() not in DirColorsParser.NON_COLOR_KEYWORDS]
+    changed = 0
+    for entry, code in zip(entries, downsample_codes([e.color_code for e in entries], colors)):
+        if code != entry.color_code:
+            parser.set_entry(entry.file_type, code, entry.comment)
+            changed += 1
+    return changed
+
+def downsample_file(source: Path, target: Path, colors: int, cache=None) -> SaveResult:
+    """Write a copy of a .dircolors file converted for fewer colors."""
+    parser = DirColorsParser()
+    parser.parse_file(source, cache=cache)
+    downsample_parser(parser, colors)
+    return parser.write_file(target)
\ No newline at end of file
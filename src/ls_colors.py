@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parser import ColorEntry, KEYWORD_INDICATORS
+
+# Shells shell_snippet() can write for
+SHELLS = ('sh', 'bash', 'zsh', 'csh', 'tcsh', 'fish')
+
+# Keyword written for each LS_COLORS indicator when importing, using the
+# names of the dircolors default database
+INDICATOR_KEYWORDS = {
+    'no': 'NORMAL', 'fi': 'FILE', 'rs': 'RESET', 'di': 'DIR', 'ln': 'LINK',
+    'or': 'ORPHAN', 'mi': 'MISSING', 'pi': 'FIFO', 'so': 'SOCK', 'bd': 'BLK',
+    'cd': 'CHR', 'do': 'DOOR', 'ex': 'EXEC', 'lc': 'LEFTCODE', 'rc': 'RIGHTCODE',
+    'ec': 'ENDCODE', 'su': 'SETUID', 'sg': 'SETGID', 'st': 'STICKY',
+    'ow': 'OTHER_WRITABLE', 'tw': 'STICKY_OTHER_WRITABLE', 'ca': 'CAPABILITY',
+    'mh': 'MULTIHARDLINK', 'cl': 'CLRTOEOL',
+}
+
+# Characters that matter when splitting an LS_COLORS value
+_SPECIAL_RE = re.compile(r'[\\^:=]')
+
+# Backslashes dircolors put before ':' and '=', and other escape pairs,
+# which are kept as they are
+_UNESCAPE_RE = re.compile(r'\\([:=])|([\\^].)', re.S)
+
+# Start of an LS_COLORS assignment in sh, csh or fish syntax
+_ASSIGNMENT_RE = re.compile(
+    r'(?:^|(?<=[\s;]))(?:(?:export|declare\s+-x)\s+)?LS_COLORS=()'
+    r'|(?:^|(?<=[\s;]))setenv\s+LS_COLORS\s+()'
+    r'|(?:^|(?<=[\s;]))set\s+(?:-[a-zA-Z]+\s+)*LS_COLORS\s+()',
+    re.M
+)
+
+def escape_field(text: str) -> str:
+    """Escape ':' and '=' in a key or value the way dircolors does.
+    
+    A backslash or caret escapes the character after it, so those
+    separators are only escaped when not already escaped.
+    """
+    if ':' not in text and '=' not in text:
+        return text
+    out = []
+    need_backslash = True
+    for char in text:
+        if char == '\\' or char == '^':
+            need_backslash = not need_backslash
+        elif char == ':' or char == '=':
+            if need_backslash:
+                out.append('\\')
+            need_backslash = True
+        else:
+            need_backslash = True
+        out.append(char)
+    return ''.join(out)
+
+def ls_colors_item(file_type: str, color_code: str) -> Optional[str]:
+    """Convert an entry to its LS_COLORS item, without the trailing ':'.
+    
+    Returns None for entries dircolors does not export, such as TERM,
+    COLORTERM, OPTIONS and unknown keywords.
+    """
+    if file_type.startswith('.'):
+        key = '*' + escape_field(file_type)
+    elif file_type.startswith('*'):
+        key = escape_field(file_type)
+    else:
+        key = KEYWORD_INDICATORS.get(file_type.upper())
+        if key is None:
+            return None
+    return f"{key}={escape_field(color_code)}"
+
+class LsColorsSerializer:
+    """Cached LS_COLORS value for a set of entries.
+    
+    Each entry owns one segment of the value, in entry order. Changing an
+    entry only re-serializes its own segment; removed entries leave an
+    empty segment behind so the positions of the others stay valid.
+    """
+    
+    def __init__(self, entries: Iterable[ColorEntry]):
+        self._segments: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._value: Optional[str] = None
+        for entry in entries:
+            self.set_entry(entry.file_type, entry.color_code)
+            
+    def set_entry(self, file_type: str, color_code: str) -> None:
+        """Update or add the segment for an entry."""
+        item = ls_colors_item(file_type, color_code)
+        segment = item + ':' if item is not None else ''
+        position = self._positions.get(file_type)
+        if position is None:
+            self._positions[file_type] = len(self._segments)
+            self._segments.append(segment)
+        elif self._segments[position] == segment:
+            return
+        else:
+            self._segments[position] = segment
+        self._value = None
+        
+    def remove_entry(self, file_type: str) -> None:
+        """Drop the segment for an entry."""
+        position = self._positions.pop(file_type, None)
+        if position is not None:
+            self._segments[position] = ''
+            self._value = None
+            
+    @property
+    def value(self) -> str:
+        """The LS_COLORS value, joined again only after a change."""
+        if self._value is None:
+            self._value = ''.join(self._segments)
+        return self._value
+
+def shell_snippet(value: str, shell: str = 'sh') -> str:
+    """Wrap an LS_COLORS value in a shell command setting it.
+    
+    sh and csh snippets match the output of dircolors -b and -c.
+    """
+    if shell in ('sh', 'bash', 'zsh'):
+        quoted = value.replace("'", "'\\''")
+        return f"LS_COLORS='{quoted}';\nexport LS_COLORS\n"
+    if shell in ('csh', 'tcsh'):
+        quoted = value.replace("'", "'\\''")
+        return f"setenv LS_COLORS '{quoted}'\n"
+    if shell == 'fish':
+        quoted = value.replace('\\', '\\\\').replace("'", "\\'")
+        return f"set -gx LS_COLORS '{quoted}'\n"
+    raise ValueError(f"Unsupported shell: {shell}")
+
+def _unescape(text: str) -> str:
+    """Undo the escaping escape_field adds."""
+    return _UNESCAPE_RE.sub(lambda m: m.group(1) or m.group(2), text)
+
+def iter_ls_colors(value: str) -> Iterator[Tuple[Optional[str], str, int]]:
+    """Split an LS_COLORS value into (key, value, offset) items.
+    
+    The value is scanned once, jumping between separators and escape
+    characters, so megabyte-sized values split in linear time. Fields
+    without '=' are yielded with a key of None; empty fields are skipped.
+    """
+    start = 0
+    key_end = -1
+    skip_until = 0
+    escaped = False
+    for match in _SPECIAL_RE.finditer(value):
+        position = match.start()
+        if position < skip_until:
+            continue
+        char = value[position]
+        if char == ':':
+            if key_end >= 0:
+                key, field = value[start:key_end], value[key_end + 1:position]
+                if escaped:
+                    key, field = _unescape(key), _unescape(field)
+                yield key, field, start
+            elif position > start:
+                yield None, value[start:position], start
+            start = position + 1
+            key_end = -1
+            escaped = False
+        elif char == '=':
+            if key_end < 0:
+                key_end = position
+        else:
+            # A backslash or caret escapes the next character
+            skip_until = position + 2
+            escaped = True
+            
+    if key_end >= 0:
+        key, field = value[start:key_end], value[key_end + 1:]
+        if escaped:
+            key, field = _unescape(key), _unescape(field)
+        yield key, field, start
+    elif start < len(value):
+        yield None, value[start:], start
+
+def file_type_for_key(key: str) -> Optional[str]:
+    """Map an LS_COLORS key to the file type used in .dircolors files.
+    
+    *.ext patterns become .ext, other patterns are kept, and indicators
+    become keywords. Returns None for unknown indicators.
+    """
+    if key.startswith('*'):
+        if key.startswith('*.') and '*' not in key[1:]:
+            return key[1:]
+        return key
+    return INDICATOR_KEYWORDS.get(key)
+
+def _read_shell_word(text: str, position: int, fish: bool = False) -> str:
+    """Read one shell word starting at position, removing its quoting."""
+    parts = []
+    length = len(text)
+    while position < length:
+        char = text[position]
+        if char == "'":
+            if fish:
+                # fish allows \\ and \' inside single quotes
+                end = position + 1
+                chunk = []
+                while end < length and text[end] != "'":
+                    if text[end] == '\\' and end + 1 < length and text[end + 1] in "\\'":
+                        end += 1
+                    chunk.append(text[end])
+                    end += 1
+                parts.append(''.join(chunk))
+            else:
+                end = text.find("'", position + 1)
+                if end < 0:
+                    end = length
+                parts.append(text[position + 1:end])
+            position = end + 1
+        elif char == '"':
+            end = position + 1
+            chunk_start = end
+            while end < length and text[end] != '"':
+                if text[end] == '\\' and end + 1 < length and text[end + 1] in '"\\$`':
+                    parts.append(text[chunk_start:end])
+                    chunk_start = end + 1
+                    end += 1
+                end += 1
+            parts.append(text[chunk_start:end])
+            position = end + 1
+        elif char == '\\' and position + 1 < length:
+            parts.append(text[position + 1])
+            position += 2
+        elif char.isspace() or char == ';':
+            break
+        else:
+            end = position
+            while end < length and not (text[end].isspace() or text[end] in ';\'"\\'):
+                end += 1
+            parts.append(text[position:end])
+            position = end
+    return ''.join(parts)
+
+def extract_ls_colors(text: str) -> Optional[str]:
+    """Find the LS_COLORS value set by shell code.
+    
+    Understands the output of dircolors -b and -c, export/setenv lines in
+    rc files, and fish's set -gx. The last assignment wins. Returns None
+    when the text does not set LS_COLORS.
+    """
+    last = None
+    for last in _ASSIGNMENT_RE.finditer(text):
+        pass
+    if last is None:
+        return None
+    fish = last.group(3) is not None
+    return _read_shell_word(text, last.end(), fish)
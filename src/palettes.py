@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from quantize import PaletteQuantizer
+
+RGB = Tuple[int, int, int]
+
+def build_palette_256(colors: Sequence[RGB]) -> Tuple[RGB, ...]:
+    """Build a 256-color palette: 16 ANSI colors, a 6x6x6 cube and 24 grays.
+    
+    Only the first 16 colors differ between terminals.
+    """
+    levels = (0, 95, 135, 175, 215, 255)
+    cube = tuple((r, g, b) for r in levels for g in levels for b in levels)
+    grays = tuple((v, v, v) for v in range(8, 248, 10))
+    return tuple(colors) + cube + grays
+
+class PaletteProfile:
+    """The 16 ANSI colors of a terminal color scheme.
+    
+    The tables derived from them (the 256-color palette, the reverse map
+    of exact colors to SGR codes and the 8 and 16 color quantizers) are
+    built with the profile, so switching profiles is one assignment.
+    """
+    
+    def __init__(self, name: str, title: str, colors: Sequence[Sequence[int]]):
+        if len(colors) != 16:
+            raise ValueError(f"A palette needs 16 colors, got {len(colors)}")
+        rgbs = []
+        for color in colors:
+            if not isinstance(color, (list, tuple)) or len(color) != 3:
+                raise ValueError(f"Invalid palette color: {color!r}")
+            rgb = tuple(color)
+            if not all(type(c) is int and 0 <= c <= 255 for c in rgb):
+                raise ValueError(f"Invalid palette color: {color!r}")
+            rgbs.append(rgb)
+            
+        self.name = name
+        self.title = title
+        self.colors: Tuple[RGB, ...] = tuple(rgbs)
+        self.palette_256 = build_palette_256(self.colors)
+        # SGR foreground code of each color; the first of equal colors wins
+        self.basic_codes: Dict[RGB, int] = {}
+        for i, rgb in enumerate(self.colors):
+            self.basic_codes.setdefault(rgb, 30 + i if i < 8 else 82 + i)
+        self.quantizers = {
+            8: PaletteQuantizer(self.colors[:8], range(8)),
+            16: PaletteQuantizer(self.colors, range(16)),
+        }
+        
+    def __repr__(self):
+        return f"PaletteProfile({self.name!r})"
+
+def _hex(*colors: str) -> List[RGB]:
+    """Convert '#rrggbb' strings to RGB tuples."""
+    return [parse_hex_color(color) for color in colors]
+
+def parse_hex_color(text: str) -> RGB:
+    """Parse a '#rrggbb' color."""
+    value = text.strip().lstrip('#')
+    if len(value) != 6:
+        raise ValueError(f"Invalid color: {text!r}")
+    try:
+        return (int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16))
+    except ValueError:
+        raise ValueError(f"Invalid color: {text!r}")
+
+# The palette the editor has always used, close to the VGA text colors
+DEFAULT_PROFILE = PaletteProfile('vga', "VGA", [
+    (0, 0, 0),       # Black
+    (128, 0, 0),     # Red
+    (0, 128, 0),     # Green
+    (128, 128, 0),   # Yellow
+    (0, 0, 128),     # Blue
+    (128, 0, 128),   # Magenta
+    (0, 128, 128),   # Cyan
+    (192, 192, 192), # White
+    (128, 128, 128), # Bright Black (Gray)
+    (255, 0, 0),     # Bright Red
+    (0, 255, 0),     # Bright Green
+    (255, 255, 0),   # Bright Yellow
+    (0, 0, 255),     # Bright Blue
+    (255, 0, 255),   # Bright Magenta
+    (0, 255, 255),   # Bright Cyan
+    (255, 255, 255), # Bright White
+])
+
+BUILTIN_PROFILES = (
+    DEFAULT_PROFILE,
+    PaletteProfile('xterm', "xterm", _hex(
+        '#000000', '#cd0000', '#00cd00', '#cdcd00', '#0000ee', '#cd00cd', '#00cdcd', '#e5e5e5',
+        '#7f7f7f', '#ff0000', '#00ff00', '#ffff00', '#5c5cff', '#ff00ff', '#00ffff', '#ffffff',
+    )),
+    PaletteProfile('gnome', "GNOME Terminal", _hex(
+        '#171421', '#c01c28', '#26a269', '#a2734c', '#12488b', '#a347ba', '#2aa1b3', '#d0cfcc',
+        '#5e5c64', '#f66151', '#33d17a', '#e9ad0c', '#2a7bde', '#c061cb', '#33c7de', '#ffffff',
+    )),
+    PaletteProfile('tango', "Tango", _hex(
+        '#2e3436', '#cc0000', '#4e9a06', '#c4a000', '#3465a4', '#75507b', '#06989a', '#d3d7cf',
+        '#555753', '#ef2929', '#8ae234', '#fce94f', '#729fcf', '#ad7fa8', '#34e2e2', '#eeeeec',
+    )),
+    PaletteProfile('konsole', "Konsole (Breeze)", _hex(
+        '#232627', '#ed1515', '#11d116', '#f67400', '#1d99f3', '#9b59b6', '#1abc9c', '#fcfcfc',
+        '#7f8c8d', '#c0392b', '#1cdc9a', '#fdbc4b', '#3daee9', '#8e44ad', '#16a085', '#ffffff',
+    )),
+    PaletteProfile('solarized', "Solarized", _hex(
+        '#073642', '#dc322f', '#859900', '#b58900', '#268bd2', '#d33682', '#2aa198', '#eee8d5',
+        '#002b36', '#cb4b16', '#586e75', '#657b83', '#839496', '#6c71c4', '#93a1a1', '#fdf6e3',
+    )),
+)
+
+def load_palette_file(path: Path) -> PaletteProfile:
+    """Load a palette profile from a JSON file.
+    
+    The file holds an object with "colors", a list of 16 '#rrggbb' strings
+    or [r, g, b] lists, and optionally "name" and "title"; the name
+    defaults to the file name.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Could not read palette {path}: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get('colors'), list):
+        raise ValueError(f"Palette {path} has no list of colors")
+        
+    name = str(data.get('name') or Path(path).stem)
+    try:
+        colors = [parse_hex_color(c) if isinstance(c, str) else c for c in data['colors']]
+        return PaletteProfile(name, str(data.get('title') or name), colors)
+    except ValueError as e:
+        raise ValueError(f"Palette {path}: {e}")
+
+class PaletteRegistry:
+    """The built-in palette profiles plus any loaded from palette files."""
+    
+    def __init__(self):
+        self.profiles: Dict[str, PaletteProfile] = {p.name: p for p in BUILTIN_PROFILES}
+        # Files that could not be loaded, as messages
+        self.errors: List[str] = []
+        
+    def load_directory(self, directory: Path) -> int:
+        """Load every *.json palette in a directory; returns how many loaded.
+        
+        Files with the name of an existing profile replace it.
+        """
+        loaded = 0
+        try:
+            paths = sorted(Path(directory).glob('*.json'))
+        except OSError:
+            return 0
+        for path in paths:
+            try:
+                profile = load_palette_file(path)
+            except ValueError as e:
+                self.errors.append(str(e))
+                continue
+            self.profiles[profile.name] = profile
+            loaded += 1
+        return loaded
+        
+    def get(self, name: str) -> Optional[PaletteProfile]:
+        """Get a profile by name."""
+        return self.profiles.get(name)
+        
+    def __iter__(self) -> Iterator[PaletteProfile]:
+        return iter(self.profiles.values())
+        
+    def __len__(self) -> int:
+        return len(self.profiles)
\ No newline at end of file
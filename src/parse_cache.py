@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import os
+import marshal
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Bump when the payload layout changes so stale cache files are ignored
+CACHE_FORMAT_VERSION = 4
+
+# Setting this environment variable to a non-empty value disables caching
+DISABLE_ENV_VAR = 'DIRCOLOR_EDITOR_NO_CACHE'
+
+class ParseCache:
+    """Persistent cache of parsed .dircolors files.
+    
+    Each record is one marshal file under the cache directory, named after
+    what it caches and validated against a key. Parsed source files use
+    their resolved path, checked against the file's size, mtime and
+    content fingerprint. The directory is kept under max_bytes by evicting
+    the least recently used entries.
+    """
+    
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 max_bytes: int = 32 * 1024 * 1024, enabled: bool = True):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.enabled = enabled and not os.environ.get(DISABLE_ENV_VAR)
+        self.hits = 0
+        self.misses = 0
+        
+    @classmethod
+    def from_config(cls, config) -> 'ParseCache':
+        """Create a cache from the application configuration."""
+        return cls(
+            max_bytes=int(config.get('parse_cache_max_mb', 32)) * 1024 * 1024,
+            enabled=bool(config.get('parse_cache_enabled', True)),
+        )
+        
+    def _entry_path(self, name: str) -> Path:
+        """Get the cache file used for a record name."""
+        digest = hashlib.blake2b(name.encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{digest}.marshal"
+        
+    def load(self, source: Path, stat: Tuple[int, int], digest: str) -> Optional[Dict[str, Any]]:
+        """Get the cached payload for a source file, or None on a miss."""
+        return self.load_record(str(source), (stat[0], stat[1], digest))
+        
+    def store(self, source: Path, stat: Tuple[int, int], digest: str,
+              payload: Dict[str, Any]) -> None:
+        """Store the parsed payload for a source file."""
+        self.store_record(str(source), (stat[0], stat[1], digest), payload)
+        
+    def load_record(self, name: str, key: Tuple) -> Optional[Any]:
+        """Get the payload stored under name if it was stored with key."""
+        if not self.enabled:
+            return None
+        entry_path = self._entry_path(name)
+        try:
+            with open(entry_path, 'rb') as f:
+                version, cached_name, cached_key, payload = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+            
+        if version != CACHE_FORMAT_VERSION or cached_name != name or cached_key != key:
+            self.misses += 1
+            return None
+            
+        # Refresh the access time used for LRU eviction
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return payload
+        
+    def store_record(self, name: str, key: Tuple, payload: Any) -> None:
+        """Store a marshal-compatible payload under name and key."""
+        if not self.enabled:
+            return
+        record = (CACHE_FORMAT_VERSION, name, key, payload)
+        entry_path = self._entry_path(name)
+        tmp_path = entry_path.with_suffix('.tmp')
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(marshal.dumps(record))
+            os.replace(tmp_path, entry_path)
+            self.evict()
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not write parse cache {entry_path}: {e}")
+            
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits max_bytes."""
+        try:
+            entries = [(p.stat(), p) for p in self.cache_dir.glob('*.marshal')]
+        except OSError:
+            return
+        total = sum(st.st_size for st, _ in entries)
+        for st, path in sorted(entries, key=lambda item: item[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= st.st_size
+            except OSError:
+                pass
+                
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        for path in self.cache_dir.glob('*.marshal'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+def default_cache_dir() -> Path:
+    """Get the per-user cache directory, honoring XDG_CACHE_HOME."""
+    base = os.environ.get('XDG_CACHE_HOME')
+    root = Path(base) if base else Path.home() / '.cache'
+    return root / 'dircolor-editor'
@@ -1,10 +1,34 @@
 #!/usr/bin/env python3
 
+import io
+import os
 import re
-from typing import Dict, List, Optional, Tuple
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
+from diagnostics import DiagnosticCollector
+from document import DircolorsDocument, split_comment
+from storage import (
+    SaveResult, SavedState, atomic_write, file_digest, file_stat,
+    resolve_target, saved_state
+)
+
+# dircolors keywords and the two-letter LS_COLORS indicator each one sets,
+# as in GNU dircolors. Keywords are matched case-insensitively.
+KEYWORD_INDICATORS = {
+    'NORMAL': 'no', 'NORM': 'no', 'FILE': 'fi', 'RESET': 'rs', 'DIR': 'di',
+    'LNK': 'ln', 'LINK': 'ln', 'SYMLINK': 'ln', 'ORPHAN': 'or', 'MISSING': 'mi',
+    'FIFO': 'pi', 'PIPE': 'pi', 'SOCK': 'so', 'BLK': 'bd', 'BLOCK': 'bd',
+    'CHR': 'cd', 'CHAR': 'cd', 'DOOR': 'do', 'EXEC': 'ex', 'LEFT': 'lc',
+    'LEFTCODE': 'lc', 'RIGHT': 'rc', 'RIGHTCODE': 'rc', 'END': 'ec',
+    'ENDCODE': 'ec', 'SUID': 'su', 'SETUID': 'su', 'SGID': 'sg', 'SETGID': 'sg',
+    'STICKY': 'st', 'OTHER_WRITABLE': 'ow', 'OWR': 'ow',
+    'STICKY_OTHER_WRITABLE': 'tw', 'OWT': 'tw', 'CAPABILITY': 'ca',
+    'MULTIHARDLINK': 'mh', 'CLRTOEOL': 'cl',
+}
+
 @dataclass
 class ColorEntry:
     """Represents a single color configuration entry."""
@@ -14,9 +38,85 @@ class ColorEntry:
     
     def __post_init__(self):
         """Validate and normalize the color code."""
-        self.color_code = self.color_code.strip()
+        # Entries with the same code share one string
+        self.color_code = sys.intern(self.color_code.strip())
         if self.comment:
             self.comment = self.comment.strip()
+            
+    @property
+    def canonical_code(self) -> str:
+        """The shortest equivalent code, one shared object per meaning."""
+        from color_utils import canonical_color_code
+        return canonical_color_code(self.color_code)
+
+class ExtensionCategoryIndex:
+    """Bidirectional index between extensions and their categories.
+    
+    Each extension belongs to at most one category. Lookups in either
+    direction are constant time; categories keep insertion order.
+    """
+    
+    def __init__(self, categories: Optional[Dict[str, Iterable[str]]] = None):
+        self._by_extension: Dict[str, str] = {}
+        # dict used as an ordered set of extensions per category
+        self._by_category: Dict[str, Dict[str, None]] = {}
+        if categories:
+            for category, extensions in categories.items():
+                self.add_category(category)
+                for extension in extensions:
+                    self.assign(extension, category)
+                    
+    def __contains__(self, extension: str) -> bool:
+        return extension in self._by_extension
+        
+    def __len__(self) -> int:
+        return len(self._by_extension)
+        
+    def add_category(self, category: str) -> None:
+        """Add an empty category if it does not exist yet."""
+        self._by_category.setdefault(category, {})
+        
+    def has_category(self, category: str) -> bool:
+        """Check whether a category exists."""
+        return category in self._by_category
+        
+    def category_of(self, extension: str) -> Optional[str]:
+        """Get the category an extension belongs to."""
+        return self._by_extension.get(extension)
+        
+    def assign(self, extension: str, category: str) -> None:
+        """Move an extension into a category, creating the category if needed."""
+        previous = self._by_extension.get(extension)
+        if previous == category:
+            return
+        if previous is not None:
+            del self._by_category[previous][extension]
+        self._by_category.setdefault(category, {})[extension] = None
+        self._by_extension[extension] = category
+        
+    def discard(self, extension: str) -> Optional[str]:
+        """Remove an extension from its category. Returns the old category."""
+        previous = self._by_extension.pop(extension, None)
+        if previous is not None:
+            del self._by_category[previous][extension]
+        return previous
+        
+    def categories(self) -> List[str]:
+        """Get category names in order."""
+        return list(self._by_category)
+        
+    def extensions(self, category: str) -> List[str]:
+        """Get the extensions of a category in insertion order."""
+        return list(self._by_category.get(category, ()))
+        
+    def items(self):
+        """Iterate over (category, extensions) pairs."""
+        for category, extensions in self._by_category.items():
+            yield category, extensions.keys()
+            
+    def as_dict(self) -> Dict[str, List[str]]:
+        """Get a plain dict copy of the index."""
+        return {category: list(extensions) for category, extensions in self._by_category.items()}
 
 class DirColorsParser:
     """Parser for .dircolors configuration files."""
@@ -31,97 +131,290 @@ class DirColorsParser:
         'basic': ['NORMAL', 'FILE', 'RESET', 'MULTIHARDLINK']
     }
     
-    # File extension categories
+    # Default file extension categories. These are shared, read-only
+    # defaults; each parser tracks its own state in extension_categories.
     EXTENSION_CATEGORIES = {
-        'archives': ['.tar', '.tgz', '.zip', '.gz', '.bz2', '.xz', '.7z', '.rar'],
-        'documents': ['.pdf', '.doc', '.docx', '.txt', '.md', '.rtf'],
-        'images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.tiff'],
-        'audio': ['.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac'],
-        'video': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.webm'],
-        'code': ['.py', '.js', '.html', '.css', '.c', '.cpp', '.java', '.php'],
-        'config': ['.conf', '.cfg', '.ini', '.yaml', '.yml', '.json']
+        'archives': ('.tar', '.tgz', '.zip', '.gz', '.bz2', '.xz', '.7z', '.rar'),
+        'documents': ('.pdf', '.doc', '.docx', '.txt', '.md', '.rtf'),
+        'images': ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.tiff'),
+        'audio': ('.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac'),
+        'video': ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.webm'),
+        'code': ('.py', '.js', '.html', '.css', '.c', '.cpp', '.java', '.php'),
+        'config': ('.conf', '.cfg', '.ini', '.yaml', '.yml', '.json')
     }
     
     def __init__(self):
         self.entries: Dict[str, ColorEntry] = {}
         self.terminal_types: List[str] = []
         self.comments: List[str] = []
+        self.extension_categories = ExtensionCategoryIndex(self.EXTENSION_CATEGORIES)
+        # Lossless model of the loaded file, used to patch it on save
+        self._document: Optional[DircolorsDocument] = None
+        # Deferred document construction after a parse cache hit
+        self._pending_document = None
+        # Extensions whose line sits under a category section comment
+        self.sectioned_extensions: set = set()
+        # Fingerprint of the file as last loaded or saved
+        self.saved_state: Optional[SavedState] = None
+        # Problems found by the last parse
+        self.diagnostics = DiagnosticCollector()
+        # Bumped whenever entries change, to invalidate compiled forms
+        self.version = 0
+        self._resolver = None
+        # Cached LS_COLORS serialization, patched by set_entry/remove_entry
+        self._ls_colors = None
         
-    def infer_categories_from_file(self) -> None:
-        """Infer extension categories based on how they're organized in the file."""
-        # Reset to original categories first
-        self.EXTENSION_CATEGORIES = {
-            'archives': ['.tar', '.tgz', '.zip', '.gz', '.bz2', '.xz', '.7z', '.rar'],
-            'documents': ['.pdf', '.doc', '.docx', '.txt', '.md', '.rtf'],
-            'images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.tiff'],
-            'audio': ['.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac'],
-            'video': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.webm'],
-            'code': ['.py', '.js', '.html', '.css', '.c', '.cpp', '.java', '.php'],
-            'config': ['.conf', '.cfg', '.ini', '.yaml', '.yml', '.json']
-        }
+    # Comment keywords that mark the start of an extension category section,
+    # checked in order against lowercased comment lines containing 'files'
+    CATEGORY_COMMENT_KEYWORDS = (
+        ('archive', 'archives'),
+        ('document', 'documents'),
+        ('image', 'images'),
+        ('audio', 'audio'),
+        ('video', 'video'),
+        ('code', 'code'),
+        ('config', 'config'),
+    )
+    
+    # Lines parsed between progress callbacks
+    PROGRESS_INTERVAL = 2048
+    
+    # Keywords understood by GNU dircolors
+    KNOWN_KEYWORDS = frozenset(KEYWORD_INDICATORS) | frozenset((
+        'TERM', 'COLORTERM', 'COLOR', 'OPTIONS', 'EIGHTBIT',
+    ))
+    
+    # Keywords whose value is not an SGR color code
+    NON_COLOR_KEYWORDS = frozenset((
+        'COLORTERM', 'COLOR', 'OPTIONS', 'EIGHTBIT', 'LEFT', 'LEFTCODE',
+        'RIGHT', 'RIGHTCODE', 'END', 'ENDCODE', 'CLRTOEOL',
+    ))
+    
+    def _reset_extension_categories(self) -> None:
+        """Reset extension categories to the built-in defaults."""
+        self.extension_categories = ExtensionCategoryIndex(self.EXTENSION_CATEGORIES)
         
-        # Now read through the entries and detect patterns by comment sections
-        current_category = None
+    def _category_from_comment(self, lowered: str) -> Optional[str]:
+        """Map a lowercased section comment to an extension category.
         
-        # Parse the file content to detect category sections
-        if hasattr(self, '_file_lines'):
-            for line in self._file_lines:
-                line = line.strip()
-                if line.startswith('#') and 'files' in line.lower():
-                    # Try to detect category from comment
-                    if 'archive' in line.lower():
-                        current_category = 'archives'
-                    elif 'document' in line.lower():
-                        current_category = 'documents'
-                    elif 'image' in line.lower():
-                        current_category = 'images'
-                    elif 'audio' in line.lower():
-                        current_category = 'audio'
-                    elif 'video' in line.lower():
-                        current_category = 'video'
-                    elif 'code' in line.lower():
-                        current_category = 'code'
-                    elif 'config' in line.lower():
-                        current_category = 'config'
-                    else:
-                        current_category = None
-                        
-                elif line and not line.startswith('#') and current_category:
-                    # This is an extension line under a category
-                    parts = line.split()
-                    if len(parts) >= 2 and parts[0].startswith('.'):
-                        extension = parts[0]
-                        # Remove from other categories first
-                        for cat_list in self.EXTENSION_CATEGORIES.values():
-                            if extension in cat_list:
-                                cat_list.remove(extension)
-                        # Add to current category
-                        if extension not in self.EXTENSION_CATEGORIES[current_category]:
-                            self.EXTENSION_CATEGORIES[current_category].append(extension)
-    
-    def parse_file(self, filepath: Path) -> None:
-        """Parse a .dircolors file."""
-        self.entries.clear()
-        self.terminal_types.clear()
-        self.comments.clear()
+        An "# Other files" comment, as written by generate, maps to 'other';
+        comments that match no category, such as "# This is for files with
+        execute permission" in the stock database, map to None.
+        """
+        for keyword, category in self.CATEGORY_COMMENT_KEYWORDS:
+            if keyword in lowered:
+                return category
+        if _OTHER_SECTION_RE.match(lowered):
+            return 'other'
+        return None
+        
+    @property
+    def document(self) -> Optional[DircolorsDocument]:
+        """Lossless model of the loaded file, built on first use after a cache hit."""
+        if self._pending_document is not None:
+            build, self._pending_document = self._pending_document, None
+            self._document = build()
+        return self._document
+        
+    @document.setter
+    def document(self, document: Optional[DircolorsDocument]) -> None:
+        self._document = document
+        self._pending_document = None
         
+    def parse_file(self, filepath: Path, cache=None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """Parse a .dircolors file.
+        
+        The file is streamed line by line; entries are parsed and extension
+        categories are inferred from section comments in the same pass, while
+        each source line is kept in a DircolorsDocument for lossless saving.
+        When a ParseCache is given, a cached result for the same content is
+        used instead of parsing. progress, if given, is called periodically
+        with (bytes_read, total_bytes); exceptions it raises abort the parse.
+        """
+        self._clear()
+        
+        document = DircolorsDocument(filepath)
+        self.document = document
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            if cache is not None and cache.enabled:
+                digest = self._parse_with_cache(filepath, document, cache, progress)
+            else:
+                with open(filepath, 'rb') as f:
+                    lines = document.read_lines(f)
+                    if progress is not None:
+                        total = os.fstat(f.fileno()).st_size
+                        lines = self._with_progress(lines, document, total, progress)
+                    self._parse_stream(lines, document)
+                digest = document.digest
+            self.saved_state = saved_state(filepath, digest)
         except (IOError, UnicodeDecodeError) as e:
             raise ValueError(f"Could not read file {filepath}: {e}")
+        
+    def _clear(self) -> None:
+        """Forget the loaded configuration before loading another one."""
+        self.entries.clear()
+        self.terminal_types.clear()
+        self.comments.clear()
+        self._reset_extension_categories()
+        self.sectioned_extensions.clear()
+        self.diagnostics.clear()
+        self.version += 1
+        self._ls_colors = None
+        
+    def load_ls_colors(self, value: str) -> None:
+        """Replace the configuration with the entries of an LS_COLORS value.
+        
+        Items that cannot be understood are reported in self.diagnostics,
+        with columns counted in value. The result has no source document,
+        so saving writes a freshly generated .dircolors file.
+        """
+        from ls_colors import file_type_for_key, iter_ls_colors
+        
+        self._clear()
+        self.document = None
+        self.saved_state = None
+        entries = self.entries
+        for key, color_code, offset in iter_ls_colors(value):
+            file_type = file_type_for_key(key) if key is not None else None
+            if file_type is None:
+                if key is None:
+                    self.diagnostics.warning('missing-color-code', 1, offset + 1,
+                                             f"No '=' in LS_COLORS item: {color_code}")
+                else:
+                    self.diagnostics.warning('unknown-keyword', 1, offset + 1,
+                                             f"Unknown LS_COLORS indicator: {key}")
+                continue
+            entries[file_type] = ColorEntry(file_type, color_code)
+            
+    def load_shell_ls_colors(self, text: str) -> None:
+        """Load the LS_COLORS value set by shell code, such as dircolors -b output.
+        
+        Raises ValueError when the text does not set LS_COLORS.
+        """
+        from ls_colors import extract_ls_colors
+        
+        value = extract_ls_colors(text)
+        if value is None:
+            raise ValueError("No LS_COLORS assignment found")
+        self.load_ls_colors(value)
+        
+    def _with_progress(self, lines: Iterable[str], document: DircolorsDocument, total: int,
+                       progress: Callable[[int, int], None]) -> Iterator[str]:
+        """Pass lines through, reporting bytes read every PROGRESS_INTERVAL lines."""
+        for count, line in enumerate(lines, 1):
+            if count % self.PROGRESS_INTERVAL == 0:
+                progress(document.bytes_read, total)
+            yield line
+        progress(total, total)
+        
+    def _parse_with_cache(self, filepath: Path, document: DircolorsDocument, cache,
+                          progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """Load a file from the parse cache, parsing and storing it on a miss.
+        
+        Returns the content fingerprint of the file.
+        """
+        source = resolve_target(filepath)
+        with open(filepath, 'rb') as f:
+            stat = file_stat(source)
+            total = stat[0]
+            digest = file_digest(f)
+            payload = cache.load(source, stat, digest)
+            if payload is None:
+                # Stream the file a second time rather than keeping a copy
+                # of it next to the document's lines
+                f.seek(0)
+                lines = document.read_lines(f)
+                if progress is not None:
+                    lines = self._with_progress(lines, document, total, progress)
+                self._parse_stream(lines, document)
+                cache.store(source, stat, document.digest, self._cache_payload(document))
+                return document.digest
+                
+        self._restore_payload(payload)
+        if progress is not None:
+            progress(total, total)
+        
+        # The document is only needed for edits and saves, so read the
+        # lines lazily instead of on the startup path
+        bindings = payload['bindings']
+        
+        def build_document() -> DircolorsDocument:
+            with open(filepath, 'rb') as f:
+                for _ in document.read_lines(f):
+                    pass
+            if document.digest == digest:
+                for line_index, key in bindings:
+                    document.bind(line_index, key)
+                return document
+                
+            # The file changed after it was loaded, so the cached bindings
+            # no longer line up; bind the lines it holds now instead
+            current = DircolorsDocument(filepath)
+            with open(filepath, 'rb') as f:
+                DirColorsParser()._parse_stream(current.read_lines(f), current)
+            return current
+            
+        self._pending_document = build_document
+        return digest
+        
+    def _cache_payload(self, document: Optional[DircolorsDocument] = None) -> Dict[str, Any]:
+        """Build the marshal-friendly parse result stored in the cache."""
+        return {
+            'entries': [(e.file_type, e.color_code, e.comment) for e in self.entries.values()],
+            'terminal_types': list(self.terminal_types),
+            'comments': list(self.comments),
+            'categories': self.extension_categories.as_dict(),
+            'sectioned': sorted(self.sectioned_extensions),
+            'bindings': document.bindings() if document is not None else [],
+            'diagnostics': self.diagnostics.to_payload(),
+        }
+        
+    def _restore_payload(self, payload: Dict[str, Any]) -> None:
+        """Restore parse results produced by _cache_payload."""
+        self.version += 1
+        self._ls_colors = None
+        for file_type, color_code, comment in payload['entries']:
+            self.entries[file_type] = ColorEntry(file_type, color_code, comment)
+        self.terminal_types.extend(payload['terminal_types'])
+        self.comments.extend(payload['comments'])
+        self.extension_categories = ExtensionCategoryIndex(payload['categories'])
+        self.sectioned_extensions.update(payload['sectioned'])
+        self.diagnostics.restore_payload(payload['diagnostics'])
             
-        # Store lines for category inference
-        self._file_lines = [line.rstrip('\n\r') for line in lines]
+    def _parse_stream(self, lines: Iterable[str],
+                      document: Optional[DircolorsDocument] = None) -> None:
+        """Parse lines and infer category sections in a single pass."""
+        current_category = None
         
-        for line_num, line in enumerate(lines, 1):
+        for line_num, raw in enumerate(lines, 1):
+            line = raw.strip()
+            if not line:
+                continue
+                
+            if line[0] == '#':
+                self.comments.append(line)
+                lowered = line.lower()
+                if 'files' in lowered:
+                    # Section comment such as "# Archive files"; other
+                    # comments end the section without moving anything
+                    current_category = self._category_from_comment(lowered)
+                continue
+                
             try:
-                self._parse_line(line.rstrip('\n\r'))
+                file_type = self._parse_definition(line, line_num, raw)
             except Exception as e:
-                print(f"Warning: Error parsing line {line_num}: {e}")
+                self.diagnostics.error('parse-error', line_num, 1, str(e))
+                continue
                 
-        # Infer categories from the file structure after parsing
-        self.infer_categories_from_file()
+            if file_type and document is not None:
+                document.bind_last(file_type)
+            if current_category and file_type and file_type.startswith('.'):
+                self.sectioned_extensions.add(file_type)
+                if current_category == 'other':
+                    self.extension_categories.discard(file_type)
+                else:
+                    self.extension_categories.assign(file_type, current_category)
                 
     def _parse_line(self, line: str) -> None:
         """Parse a single line from the .dircolors file."""
@@ -137,24 +430,29 @@ class DirColorsParser:
             self.comments.append(line)
             return
             
-        # Split line and comment
-        if '#' in line:
-            line_part, comment = line.split('#', 1)
+        self._parse_definition(line)
+        
+    def _parse_definition(self, line: str, line_num: int = 0,
+                          raw: Optional[str] = None) -> Optional[str]:
+        """Parse a stripped, non-comment line. Returns the defined file type.
+        
+        Problems are recorded in self.diagnostics against line_num, with
+        columns counted in raw, the line before stripping.
+        """
+        line_part, comment = split_comment(line)
+        if comment is not None:
             line_part = line_part.strip()
             comment = comment.strip()
-        else:
-            line_part = line
-            comment = None
             
         if not line_part:
-            return
+            return None
             
         # Parse terminal type definitions
         if line_part.startswith('TERM '):
             term_type = line_part[5:].strip()
             if term_type:
                 self.terminal_types.append(term_type)
-            return
+            return None
             
         # Parse color definitions
         # Format: TYPE color_code or *.ext color_code
@@ -168,75 +466,126 @@ class DirColorsParser:
                 color_code=color_code,
                 comment=comment
             )
+            if (color_code not in _valid_color_codes
+                    or (file_type[0] not in '.*' and file_type.upper() not in self.KNOWN_KEYWORDS)):
+                self._check_definition(file_type, color_code, line_num, raw or line)
+            return file_type
+            
+        self.diagnostics.warning(
+            'missing-color-code', line_num, _column(raw or line, parts[0]) + len(parts[0]),
+            f"No color code given for {parts[0]}"
+        )
+        return None
+        
+    def _check_definition(self, file_type: str, color_code: str,
+                          line_num: int, raw: str) -> None:
+        """Record diagnostics for a definition that failed the fast checks."""
+        keyword = file_type.upper()
+        if file_type[0] not in '.*' and keyword not in self.KNOWN_KEYWORDS:
+            self.diagnostics.warning(
+                'unknown-keyword', line_num, _column(raw, file_type),
+                f"Unknown keyword: {file_type}"
+            )
+        if keyword in self.NON_COLOR_KEYWORDS or color_code == 'target':
+            return
+        if _COLOR_CODE_RE.match(color_code):
+            if len(_valid_color_codes) < 4096:
+                _valid_color_codes.add(color_code)
+            return
+        is_valid, error = validate_color_code(color_code)
+        if not is_valid:
+            column = _column(raw, color_code, raw.find(file_type) + len(file_type))
+            self.diagnostics.warning('invalid-color-code', line_num, column,
+                                     f"{file_type}: {error}")
+            
+    def write_file(self, filepath: Path) -> SaveResult:
+        """Write the configuration to a .dircolors file.
+        
+        The configuration is serialized in memory first. If the target still
+        holds exactly that content it is not touched; otherwise it is replaced
+        atomically. A file loaded with parse_file keeps its layout and
+        comments, with only the edited lines re-rendered.
+        """
+        if self.document is not None:
+            data = self.document.render()
+        else:
+            data = self.generate().encode('utf-8')
             
-    def write_file(self, filepath: Path) -> None:
-        """Write the configuration to a .dircolors file."""
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                # Write header comments
-                f.write("# Configuration file for dircolors\n")
-                f.write("# Generated by Dircolor Editor\n\n")
-                
-                # Write terminal types
-                if self.terminal_types:
-                    f.write("# Terminal type definitions\n")
-                    for term_type in self.terminal_types:
-                        f.write(f"TERM {term_type}\n")
-                    f.write("\n")
-                
-                # Write file type definitions (basic types first)
-                f.write("# Basic file types\n")
-                for file_type in self.FILE_TYPES['basic']:
-                    if file_type in self.entries:
-                        entry = self.entries[file_type]
-                        self._write_entry(f, entry)
-                f.write("\n")
-                
-                # Write directory and link types
-                f.write("# Directories and links\n")
-                for category in ['directories', 'links']:
-                    for file_type in self.FILE_TYPES[category]:
-                        if file_type in self.entries:
-                            entry = self.entries[file_type]
-                            self._write_entry(f, entry)
-                f.write("\n")
-                
-                # Write special file types
-                f.write("# Special file types\n")
-                for category in ['special', 'executables', 'permissions']:
-                    for file_type in self.FILE_TYPES[category]:
-                        if file_type in self.entries:
-                            entry = self.entries[file_type]
-                            self._write_entry(f, entry)
-                f.write("\n")
-                
-                # Write file extensions by category
-                for category_name, extensions in self.EXTENSION_CATEGORIES.items():
-                    category_entries = []
-                    for ext in extensions:
-                        if ext in self.entries:
-                            category_entries.append(self.entries[ext])
-                    
-                    if category_entries:
-                        f.write(f"# {category_name.title()} files\n")
-                        for entry in category_entries:
-                            self._write_entry(f, entry)
-                        f.write("\n")
-                
-                # Write remaining extensions (uncategorized)
-                remaining = []
-                for file_type, entry in self.entries.items():
-                    if file_type.startswith('.') and not self._is_categorized(file_type):
-                        remaining.append(entry)
-                
-                if remaining:
-                    f.write("# Other file extensions\n")
-                    for entry in sorted(remaining, key=lambda x: x.file_type):
-                        self._write_entry(f, entry)
-                        
-        except IOError as e:
+            result, self.saved_state = atomic_write(filepath, data, self.saved_state)
+        except OSError as e:
             raise ValueError(f"Could not write to file {filepath}: {e}")
             
+        if self.document is not None:
+            self.document.mark_saved(filepath)
+        return result
+        
+    def generate(self) -> str:
+        """Generate a fresh, categorized .dircolors file."""
+        f = io.StringIO()
+        # Write header comments
+        f.write("# Configuration file for dircolors\n")
+        f.write("# Generated by Dircolor Editor\n\n")
+        
+        # Write terminal types
+        if self.terminal_types:
+            f.write("# Terminal type definitions\n")
+            for term_type in self.terminal_types:
+                f.write(f"TERM {term_type}\n")
+            f.write("\n")
+        
+        # Write file type definitions (basic types first)
+        f.write("# Basic file types\n")
+        for file_type in self.FILE_TYPES['basic']:
+            if file_type in self.entries:
+                entry = self.entries[file_type]
+                self._write_entry(f, entry)
+        f.write("\n")
+        
+        # Write directory and link types
+        f.write("# Directories and links\n")
+        for category in ['directories', 'links']:
+            for file_type in self.FILE_TYPES[category]:
+                if file_type in self.entries:
+                    entry = self.entries[file_type]
+                    self._write_entry(f, entry)
+        f.write("\n")
+        
+        # Write special file types
+        f.write("# Special file types\n")
+        for category in ['special', 'executables', 'permissions']:
+            for file_type in self.FILE_TYPES[category]:
+                if file_type in self.entries:
+                    entry = self.entries[file_type]
+                    self._write_entry(f, entry)
+        f.write("\n")
+        
+        # Write file extensions by category
+        for category_name, extensions in self.extension_categories.items():
+            category_entries = []
+            for ext in extensions:
+                if ext in self.entries:
+                    category_entries.append(self.entries[ext])
+            
+            if category_entries:
+                f.write(f"# {category_name.title()} files\n")
+                for entry in category_entries:
+                    self._write_entry(f, entry)
+                f.write("\n")
+        
+        # Write remaining extensions (uncategorized)
+        remaining = []
+        for file_type, entry in self.entries.items():
+            if file_type.startswith('.') and not self._is_categorized(file_type):
+                remaining.append(entry)
+        
+        if remaining:
+            # "Other files" marks these as uncategorized when the file is reloaded
+            f.write("# Other files\n")
+            for entry in sorted(remaining, key=lambda x: x.file_type):
+                self._write_entry(f, entry)
+        return f.getvalue()
+            
     def _write_entry(self, f, entry: ColorEntry) -> None:
         """Write a single color entry to the file."""
         if entry.comment:
@@ -246,27 +595,90 @@ class DirColorsParser:
             
     def _is_categorized(self, extension: str) -> bool:
         """Check if an extension is already categorized."""
-        for extensions in self.EXTENSION_CATEGORIES.values():
-            if extension in extensions:
-                return True
-        return False
+        return extension in self.extension_categories
         
     def get_entry(self, file_type: str) -> Optional[ColorEntry]:
         """Get a color entry by file type."""
         return self.entries.get(file_type)
         
+    def get_resolver(self):
+        """Get a ColorResolver for the current entries.
+        
+        The compiled resolver is reused until the entries change.
+        """
+        from resolver import ColorResolver
+        
+        if self._resolver is None or self._resolver.version != self.version:
+            self._resolver = ColorResolver(self.entries.values(), self.version)
+        return self._resolver
+        
+    def to_ls_colors(self) -> str:
+        """Get the LS_COLORS value for the current entries, as dircolors -b sets it.
+        
+        The value is serialized once and then patched entry by entry.
+        """
+        from ls_colors import LsColorsSerializer
+        
+        if self._ls_colors is None:
+            self._ls_colors = LsColorsSerializer(self.entries.values())
+        return self._ls_colors.value
+        
+    def shell_snippet(self, shell: str = 'sh') -> str:
+        """Get a shell command setting LS_COLORS, like dircolors -b or -c."""
+        from ls_colors import shell_snippet
+        
+        return shell_snippet(self.to_ls_colors(), shell)
+        
     def set_entry(self, file_type: str, color_code: str, comment: Optional[str] = None) -> None:
         """Set or update a color entry."""
+        self.version += 1
         self.entries[file_type] = ColorEntry(
             file_type=file_type,
             color_code=color_code,
             comment=comment
         )
-        
+        entry = self.entries[file_type]
+        if self.document is not None:
+            if self.document.has_entry(file_type):
+                self.document.set_entry(file_type, entry.color_code, entry.comment)
+            else:
+                after, section = self._document_position(file_type)
+                self.document.set_entry(file_type, entry.color_code, entry.comment,
+                                        after=after, section=section)
+        if self._ls_colors is not None:
+            self._ls_colors.set_entry(file_type, entry.color_code)
+            
     def remove_entry(self, file_type: str) -> bool:
         """Remove a color entry. Returns True if entry existed."""
+        self.version += 1
+        if self.document is not None:
+            self.document.remove_entry(file_type)
+        if self._ls_colors is not None:
+            self._ls_colors.remove_entry(file_type)
         return self.entries.pop(file_type, None) is not None
         
+    def _document_position(self, file_type: str) -> Tuple[Optional[str], Optional[str]]:
+        """Choose where a new or moved line goes in the document.
+        
+        Returns (after, section): the entry to insert after, or the section
+        header to append under when no sibling entry exists in the document.
+        """
+        if not file_type.startswith('.'):
+            return None, None
+        # Siblings under a section comment keep the category on reload
+        self.sectioned_extensions.add(file_type)
+        category = self.extension_categories.category_of(file_type) or 'other'
+        if category == 'other':
+            siblings = [ext for ext in self.entries
+                        if ext.startswith('.') and ext not in self.extension_categories]
+        else:
+            siblings = self.extension_categories.extensions(category)
+        for sibling in reversed(siblings):
+            if (sibling != file_type and sibling in self.sectioned_extensions
+                    and self.document.has_entry(sibling)):
+                return sibling, None
+        return None, f"# {category.title()} files"
+        
     def move_extension_to_category(self, extension: str, target_category: str) -> bool:
         """Move an extension to a different category."""
         
@@ -278,26 +690,20 @@ class DirColorsParser:
         if not entry:
             return False
             
-        # Remove from current category if it exists in predefined categories
-        found_in_category = None
-        for category_name, extensions in self.EXTENSION_CATEGORIES.items():
-            if extension in extensions:
-                extensions.remove(extension)
-                found_in_category = category_name
-                break
-                
         # Add to target category if it exists
-        if target_category in self.EXTENSION_CATEGORIES:
-            if extension not in self.EXTENSION_CATEGORIES[target_category]:
-                self.EXTENSION_CATEGORIES[target_category].append(extension)
-                return True
-            else:
-                return True
+        if self.extension_categories.has_category(target_category):
+            self.extension_categories.assign(extension, target_category)
         elif target_category == 'other':
             # Handle 'other' category - just remove from predefined categories
-            return True
-
-        return False
+            self.extension_categories.discard(extension)
+        else:
+            return False
+            
+        # Move the line under the new category's section comment
+        if self.document is not None:
+            after, section = self._document_position(extension)
+            self.document.move_entry(extension, after=after, section=section)
+        return True
         
     def get_categories(self) -> Dict[str, List[str]]:
         """Get file types organized by categories."""
@@ -309,13 +715,13 @@ class DirColorsParser:
             if existing:
                 categories[category] = existing
                 
-        # File extensions - organize by current EXTENSION_CATEGORIES state
-        for category, extensions in self.EXTENSION_CATEGORIES.items():
+        # File extensions - organize by the current category index
+        for category, extensions in self.extension_categories.items():
             existing = [ext for ext in extensions if ext in self.entries]
             if existing:
                 categories[f"{category}_extensions"] = existing
                 
-        # Uncategorized extensions - anything not in current EXTENSION_CATEGORIES
+        # Uncategorized extensions - anything not in the category index
         uncategorized = []
         for file_type in self.entries:
             if file_type.startswith('.') and not self._is_categorized(file_type):
@@ -324,27 +730,119 @@ class DirColorsParser:
             categories['other_extensions'] = sorted(uncategorized)
             
         return categories
+        
+    def get_category_colors(self) -> Dict[str, Tuple[int, int, int]]:
+        """Get the foreground color each kind of file is listed in.
+        
+        Built-in file types are their own kind; each extension category is
+        represented by its most common foreground. Entries without a
+        foreground color are left out.
+        """
+        from collections import Counter
+        from color_utils import parse_color_code
+        
+        colors = {}
+        for category, file_types in self.get_categories().items():
+            foregrounds = [parse_color_code(self.entries[ft].color_code).foreground
+                           for ft in file_types]
+            if category.endswith('_extensions'):
+                counts = Counter(rgb for rgb in foregrounds if rgb is not None)
+                if counts:
+                    colors[category[:-len('_extensions')]] = counts.most_common(1)[0][0]
+            else:
+                for file_type, rgb in zip(file_types, foregrounds):
+                    if rgb is not None:
+                        colors[file_type] = rgb
+        return colors
 
 # Utility functions
-def load_default_dircolors() -> DirColorsParser:
-    """Load the system default dircolors configuration."""
+
+# Valid SGR parameter lists: semicolon separated numbers from 0 to 255
+_COLOR_CODE_RE = re.compile(
+    r'(?:0*(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d))(?:;0*(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d))*\Z'
+)
+
+# Color codes already checked against _COLOR_CODE_RE; themes reuse a few
+# codes many times, so this keeps validation off the per-line cost
+_valid_color_codes = set()
+
+# Section comment generate writes above uncategorized extensions
+_OTHER_SECTION_RE = re.compile(r'#\s*other\s+files\b')
+
+def _column(raw: str, token: str, start: int = 0) -> int:
+    """1-based column of token in raw, searching from start."""
+    position = raw.find(token, max(start, 0))
+    return position + 1 if position >= 0 else 1
+
+# Parsed `dircolors --print-database` output for this session, keyed by
+# the binary's resolved path, size and mtime
+_default_database_cache: Dict[Tuple, Dict[str, Any]] = {}
+
+def _dircolors_binary() -> Optional[Tuple[str, Tuple]]:
+    """Locate dircolors and build the cache key identifying the binary."""
+    import shutil
+    
+    binary = shutil.which('dircolors')
+    if binary is None:
+        return None
+    binary = os.path.realpath(binary)
+    try:
+        st = os.stat(binary)
+    except OSError:
+        return None
+    return binary, (binary, st.st_size, st.st_mtime_ns)
+
+def _read_default_database(binary: str) -> Optional[Dict[str, Any]]:
+    """Run dircolors and parse its default database into a cache payload."""
+    import subprocess
+    
+    result = subprocess.run([binary, '--print-database'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    version = subprocess.run([binary, '--version'], capture_output=True, text=True)
+    
+    parser = DirColorsParser()
+    parser._parse_stream(result.stdout.split('\n'))
+    payload = parser._cache_payload()
+    payload['version'] = version.stdout.split('\n', 1)[0].strip()
+    return payload
+
+def load_default_dircolors(cache=None) -> DirColorsParser:
+    """Load the system default dircolors configuration.
+    
+    The parsed database is kept in memory for the session and, when a
+    ParseCache is given, on disk across sessions, so dircolors only runs
+    again after the binary changes.
+    """
     import subprocess
     
     parser = DirColorsParser()
     
     try:
-        # Get default dircolors database
-        result = subprocess.run(['dircolors', '--print-database'], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            lines = result.stdout.split('\n')
-            for line in lines:
-                parser._parse_line(line)
-    except (subprocess.SubprocessError, FileNotFoundError):
-        # Fallback to basic defaults if dircolors command fails
-        parser.set_entry('DIR', '01;34')
-        parser.set_entry('LINK', '01;36')
-        parser.set_entry('EXEC', '01;32')
+        located = _dircolors_binary()
+        if located is None:
+            raise FileNotFoundError('dircolors')
+        binary, key = located
+        
+        payload = _default_database_cache.get(key)
+        if payload is None and cache is not None:
+            payload = cache.load_record('dircolors --print-database', key)
+        if payload is None:
+            payload = _read_default_database(binary)
+            if payload is not None and cache is not None:
+                cache.store_record('dircolors --print-database', key, payload)
+        if payload is not None:
+            _default_database_cache[key] = payload
+            parser._restore_payload(payload)
+            return parser
+    except (subprocess.SubprocessError, OSError):
+        pass
+        
+    # Fallback to basic defaults if dircolors command fails
+    parser.set_entry('DIR', '01;34')
+    parser.set_entry('LINK', '01;36')
+    parser.set_entry('EXEC', '01;32')
         
     return parser
 
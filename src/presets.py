@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from color_utils import ColorMode, parse_color_code
+from parser import DirColorsParser
+
+# Presets shipped with the editor
+BUNDLED_PRESET_DIR = Path(__file__).parent.parent / 'data' / 'presets'
+
+# File name suffix of preset files
+PRESET_SUFFIX = '.dircolors'
+
+# Parse cache record holding the preset manifest; bump the version when
+# the record layout changes
+MANIFEST_RECORD = 'preset manifest'
+MANIFEST_VERSION = 1
+
+# Order of color modes from narrowest to widest
+_MODE_ORDER = (ColorMode.BASIC_8, ColorMode.EXTENDED_256, ColorMode.RGB_TRUECOLOR)
+
+def system_preset_dirs() -> List[Path]:
+    """Get the system-wide preset directories, most important first.
+    
+    These are dircolor-editor/presets under each of $XDG_DATA_DIRS.
+    """
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    return [Path(d) / 'dircolor-editor' / 'presets' for d in data_dirs.split(':') if d]
+
+class PresetInfo(NamedTuple):
+    """What the preset picker shows about a preset, without loading it."""
+    name: str
+    title: str
+    description: str
+    # ColorMode value of the widest color the preset uses
+    mode: str
+    entries: int
+    path: Path
+
+def _read_header(path: Path) -> Tuple[Optional[str], str]:
+    """Read the title and description from a preset's leading comments.
+    
+    They are given as '# Title: ...' and '# Description: ...' lines before
+    the first setting.
+    """
+    title = None
+    description = ''
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith('#'):
+                break
+            key, separator, value = line[1:].partition(':')
+            key = key.strip().lower()
+            if separator and key in ('title', 'name'):
+                title = value.strip()
+            elif separator and key == 'description':
+                description = value.strip()
+    return title, description
+
+def describe_preset(path: Path, cache=None) -> Tuple[str, str, str, int]:
+    """Index a preset file: (title, description, color mode, entry count)."""
+    title, description = _read_header(path)
+    parser = DirColorsParser()
+    parser.parse_file(path, cache=cache)
+    widest = 0
+    for code in {entry.color_code for entry in parser.entries.values()}:
+        widest = max(widest, _MODE_ORDER.index(parse_color_code(code).mode))
+    name = path.name[:-len(PRESET_SUFFIX)]
+    return title or name, description, _MODE_ORDER[widest].value, len(parser.entries)
+
+class PresetLibrary:
+    """Theme presets found in preset directories.
+    
+    scan() only lists the directories; presets that are new or changed
+    since the manifest kept in the ParseCache, or without a cache since
+    the previous scan, are indexed, all others are described from the
+    manifest. Preset bodies are parsed by load() when
+    one is picked. A preset in a later directory replaces one of the same
+    name in an earlier directory.
+    """
+    
+    def __init__(self, directories: Sequence[Path], cache=None):
+        self.directories = [Path(directory) for directory in directories]
+        self.cache = cache
+        self.presets: Dict[str, PresetInfo] = {}
+        # Files that could not be indexed, as messages
+        self.errors: List[str] = []
+        # Presets indexed by the last scan instead of taken from the manifest
+        self.indexed = 0
+        # Manifest of the last scan: path -> (size, mtime_ns, *description)
+        self._manifest: Dict[str, tuple] = {}
+        
+    @classmethod
+    def from_config(cls, config, cache=None) -> 'PresetLibrary':
+        """Create a library of the bundled, system-wide and user presets."""
+        directories = [BUNDLED_PRESET_DIR]
+        directories.extend(reversed(system_preset_dirs()))
+        directories.append(config.config_dir / 'presets')
+        return cls(directories, cache)
+        
+    def scan(self) -> int:
+        """Find the presets on disk; returns how many there are."""
+        stored = None
+        if self.cache is not None:
+            stored = self.cache.load_record(MANIFEST_RECORD, (MANIFEST_VERSION,))
+        # Without a stored manifest, rescans reuse the one kept in memory
+        manifest = stored or self._manifest
+        
+        updated = {}
+        presets = {}
+        self.errors = []
+        self.indexed = 0
+        for directory in self.directories:
+            try:
+                items = sorted(os.scandir(directory), key=lambda item: item.name)
+            except OSError:
+                continue
+            for item in items:
+                if not item.name.endswith(PRESET_SUFFIX) or item.name == PRESET_SUFFIX:
+                    continue
+                try:
+                    if not item.is_file():
+                        continue
+                    st = item.stat()
+                    record = manifest.get(item.path)
+                    if record is None or record[0] != st.st_size or record[1] != st.st_mtime_ns:
+                        record = (st.st_size, st.st_mtime_ns) + describe_preset(Path(item.path), self.cache)
+                        self.indexed += 1
+                except (OSError, ValueError) as e:
+                    self.errors.append(f"Could not read preset {item.path}: {e}")
+                    continue
+                updated[item.path] = record
+                name = item.name[:-len(PRESET_SUFFIX)]
+                presets[name] = PresetInfo(name, *record[2:], Path(item.path))
+                
+        if self.cache is not None and updated != stored:
+            self.cache.store_record(MANIFEST_RECORD, (MANIFEST_VERSION,), updated)
+        self._manifest = updated
+        self.presets = presets
+        return len(presets)
+        
+    def get(self, name: str) -> Optional[PresetInfo]:
+        """Get a preset's manifest entry by name."""
+        return self.presets.get(name)
+        
+    def load(self, name: str) -> DirColorsParser:
+        """Parse the full body of a preset."""
+        info = self.presets.get(name)
+        if info is None:
+            raise ValueError(f"Unknown preset: {name}")
+        parser = DirColorsParser()
+        parser.parse_file(info.path, cache=self.cache)
+        return parser
+        
+    def __iter__(self) -> Iterator[PresetInfo]:
+        return iter(sorted(self.presets.values(), key=lambda info: info.title.lower()))
+        
+    def __len__(self) -> int:
+        return len(self.presets)
\ No newline at end of file
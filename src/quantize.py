@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+from bisect import bisect_left
+from typing import List, Sequence, Tuple
+
+from colorspace import rgb_to_oklab, rgb_to_oklab_array
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: batch lookups search new cells one at a time without it
+    np = None
+
+# Bits of each RGB channel used to pick a lookup table cell
+LUT_BITS = 6
+
+_SHIFT = 8 - LUT_BITS
+_CELLS = 1 << LUT_BITS
+# Marks lookup table cells that have not been searched yet
+_UNSET = 0xFF
+
+# Cells searched per NumPy distance matrix, bounding its memory use
+_SEARCH_CHUNK = 4096
+
+class PaletteQuantizer:
+    """Finds the perceptually nearest color of a small palette.
+    
+    Distances are measured in OKLab. Answers come from a 64x64x64 byte
+    lookup table over the top LUT_BITS bits of each channel; a cell is
+    searched the first time a color falls into it, using the cell's
+    center, and is a single index afterwards.
+    """
+    
+    def __init__(self, colors: Sequence[Tuple[int, int, int]], indexes: Sequence[int]):
+        if not 0 < len(colors) < _UNSET or len(colors) != len(indexes):
+            raise ValueError("A palette needs 1 to 254 colors, each with an index")
+        self.colors = tuple(colors)
+        self.indexes = tuple(indexes)
+        self._labs = [rgb_to_oklab(*rgb) for rgb in self.colors]
+        # Palette positions by lightness, to search outwards from a color's
+        self._by_lightness = sorted(range(len(self._labs)), key=lambda p: self._labs[p][0])
+        self._lightness = [self._labs[p][0] for p in self._by_lightness]
+        self._lut = bytearray([_UNSET]) * (_CELLS ** 3)
+        
+    def nearest(self, r: int, g: int, b: int) -> int:
+        """Get the palette index of the color nearest to an RGB color."""
+        if (r | g | b) & ~0xFF:
+            r, g, b = (min(max(c, 0), 255) for c in (r, g, b))
+        cell = (r >> _SHIFT) << (2 * LUT_BITS) | (g >> _SHIFT) << LUT_BITS | (b >> _SHIFT)
+        position = self._lut[cell]
+        if position == _UNSET:
+            position = self._lut[cell] = self._search(r >> _SHIFT, g >> _SHIFT, b >> _SHIFT)
+        return self.indexes[position]
+        
+    def _search(self, r: int, g: int, b: int) -> int:
+        """Find the palette position nearest to the center of a cell."""
+        half = ((1 << _SHIFT) - 1) / 2
+        L, A, B = rgb_to_oklab(*((c << _SHIFT) + half for c in (r, g, b)))
+        labs, order, lightness = self._labs, self._by_lightness, self._lightness
+        count = len(order)
+        high = bisect_left(lightness, L)
+        low = high - 1
+        best = 0
+        best_dist = float('inf')
+        # Visit colors by lightness difference alone, which never exceeds
+        # the full distance, and stop once it rules out everything left
+        while low >= 0 or high < count:
+            if high >= count or (low >= 0 and L - lightness[low] <= lightness[high] - L):
+                gap = L - lightness[low]
+                position = order[low]
+                low -= 1
+            else:
+                gap = lightness[high] - L
+                position = order[high]
+                high += 1
+            if gap * gap > best_dist:
+                break
+            pl, pa, pb = labs[position]
+            dist = (L - pl) ** 2 + (A - pa) ** 2 + (B - pb) ** 2
+            if dist < best_dist or (dist == best_dist and position < best):
+                best_dist = dist
+                best = position
+        return best
+        
+    def nearest_many(self, colors: Sequence[Tuple[int, int, int]]) -> List[int]:
+        """Get the palette indexes of many RGB colors.
+        
+        Cells not searched yet are found first, all in one vectorized
+        pass when NumPy is available.
+        """
+        mask = (1 << LUT_BITS) - 1
+        cells = []
+        for r, g, b in colors:
+            if (r | g | b) & ~0xFF:
+                r, g, b = (min(max(c, 0), 255) for c in (r, g, b))
+            cells.append((r >> _SHIFT) << (2 * LUT_BITS) | (g >> _SHIFT) << LUT_BITS | (b >> _SHIFT))
+            
+        lut = self._lut
+        missing = sorted({cell for cell in cells if lut[cell] == _UNSET})
+        if missing and np is not None:
+            self._search_cells(missing)
+        else:
+            for cell in missing:
+                lut[cell] = self._search(cell >> (2 * LUT_BITS), (cell >> LUT_BITS) & mask,
+                                         cell & mask)
+                
+        indexes = self.indexes
+        return [indexes[lut[cell]] for cell in cells]
+        
+    def _search_cells(self, cells: List[int]) -> None:
+        """Fill lookup table cells with NumPy distance matrices."""
+        mask = (1 << LUT_BITS) - 1
+        labs = np.array(self._labs)
+        half = ((1 << _SHIFT) - 1) / 2
+        for start in range(0, len(cells), _SEARCH_CHUNK):
+            chunk = np.array(cells[start:start + _SEARCH_CHUNK])
+            centers = np.stack([
+                chunk >> (2 * LUT_BITS), (chunk >> LUT_BITS) & mask, chunk & mask,
+            ], axis=1) * (1 << _SHIFT) + half
+            diff = rgb_to_oklab_array(centers)[:, None, :] - labs[None, :, :]
+            nearest = np.einsum('ijk,ijk->ij', diff, diff).argmin(axis=1)
+            for cell, position in zip(chunk.tolist(), nearest.tolist()):
+                self._lut[cell] = position
+                
+    def filled(self) -> int:
+        """Count the lookup table cells searched so far."""
+        return len(self._lut) - self._lut.count(_UNSET)
\ No newline at end of file
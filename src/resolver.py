@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+import os
+import stat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from parser import ColorEntry, KEYWORD_INDICATORS
+
+# Colors GNU ls uses for indicators that LS_COLORS leaves unset
+GNU_DEFAULT_INDICATORS = {
+    'lc': '\033[', 'rc': 'm', 'rs': '0',
+    'di': '01;34', 'ln': '01;36', 'pi': '33', 'so': '01;35',
+    'bd': '01;33', 'cd': '01;33', 'ex': '01;32', 'do': '01;35',
+    'su': '37;41', 'sg': '30;43', 'st': '37;44', 'ow': '34;42',
+    'tw': '30;42', 'cl': '\033[K',
+}
+
+# ls compares suffixes with c_strncasecmp, which only folds ASCII letters
+_ASCII_FOLD = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+# Trie key holding the (order, color code) of a pattern ending at a node;
+# never a single character, so it cannot clash with a child
+_TERMINAL = ''
+
+def _fold(text: str) -> str:
+    """Lowercase ASCII letters only."""
+    return text.lower() if text.isascii() else text.translate(_ASCII_FOLD)
+
+def _has_capability(path) -> bool:
+    """Check whether a file carries file capabilities."""
+    try:
+        return bool(os.getxattr(path, 'security.capability', follow_symlinks=False))
+    except (OSError, AttributeError):
+        return False
+
+class ColorResolver:
+    """Works out the color `ls --color` gives a file under a configuration.
+    
+    File type keywords become ls indicators, with ls's built-in colors for
+    the ones left unset, and regular files are then matched against the
+    .ext and *pattern suffix entries. As in GNU ls, of all the patterns
+    that match a name the one defined last wins, and patterns match ASCII
+    case-insensitively unless another pattern differing only in case has
+    a different color.
+    
+    A .ext pattern with no other dot can only match the part of a name
+    from its last dot, so those are looked up in dicts; all other patterns
+    are compiled into tries over reversed names.
+    """
+    
+    def __init__(self, entries: Iterable[ColorEntry], version: int = 0):
+        # Version of the parser entries this resolver was compiled from
+        self.version = version
+        self.indicators: Dict[str, str] = dict(GNU_DEFAULT_INDICATORS)
+        patterns: List[Tuple[str, str]] = []
+        for entry in entries:
+            key = entry.file_type
+            if key.startswith('.'):
+                patterns.append((key, entry.color_code))
+            elif key.startswith('*'):
+                patterns.append((key[1:], entry.color_code))
+            else:
+                indicator = KEYWORD_INDICATORS.get(key.upper())
+                if indicator is not None:
+                    self.indicators[indicator] = entry.color_code
+                    
+        self._colored = {indicator for indicator, code in self.indicators.items()
+                         if code not in ('', '0', '00')}
+        # LINK target: color links like the file they point to
+        self.link_as_target = self.indicators.get('ln') == 'target'
+        
+        # extension -> (definition order, color code)
+        self._exact_ext: Dict[str, Tuple[int, str]] = {}
+        self._folded_ext: Dict[str, Tuple[int, str]] = {}
+        self._exact_trie: Dict = {}
+        self._folded_trie: Dict = {}
+        # Longest pattern in the tries; only this much of a name is walked
+        self._trie_depth = -1
+        self._compile(patterns)
+        
+    def _compile(self, patterns: List[Tuple[str, str]]) -> None:
+        """Apply ls's duplicate and case rules, then build the lookup tables."""
+        # Patterns equal ignoring case, most recently defined first
+        groups: Dict[str, List[list]] = {}
+        for order in range(len(patterns) - 1, -1, -1):
+            suffix, code = patterns[order]
+            # [suffix, code, order, ignored, exact]
+            groups.setdefault(_fold(suffix), []).append([suffix, code, order, False, False])
+            
+        for group in groups.values():
+            for i, newer in enumerate(group):
+                if newer[3]:
+                    continue
+                case_ignored = False
+                for older in group[i + 1:]:
+                    if older[3]:
+                        continue
+                    if older[0] == newer[0]:
+                        older[3] = True
+                    elif older[1] == newer[1]:
+                        # Case variants with the same color collapse into one
+                        older[3] = True
+                        case_ignored = True
+                    else:
+                        newer[4] = older[4] = True
+                if case_ignored:
+                    newer[4] = False
+                    
+            for suffix, code, order, ignored, exact in group:
+                if not ignored:
+                    self._add_pattern(suffix, code, order, exact)
+                    
+    def _add_pattern(self, suffix: str, code: str, order: int, exact: bool) -> None:
+        """Add one suffix pattern to the dicts or tries."""
+        key = suffix if exact else _fold(suffix)
+        if key.startswith('.') and key.count('.') == 1:
+            table = self._exact_ext if exact else self._folded_ext
+            table[key] = (order, code)
+            return
+            
+        node = self._exact_trie if exact else self._folded_trie
+        for char in reversed(key):
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = (order, code)
+        self._trie_depth = max(self._trie_depth, len(key))
+        
+    @staticmethod
+    def _walk(node: Dict, name: str, best: Optional[Tuple[int, str]]) -> Optional[Tuple[int, str]]:
+        """Walk a reversed-name trie, keeping the latest defined match."""
+        hit = node.get(_TERMINAL)
+        if hit is not None and (best is None or hit[0] > best[0]):
+            best = hit
+        for char in reversed(name):
+            node = node.get(char)
+            if node is None:
+                break
+            hit = node.get(_TERMINAL)
+            if hit is not None and (best is None or hit[0] > best[0]):
+                best = hit
+        return best
+        
+    def match_suffix(self, name: str) -> Optional[str]:
+        """Get the color of the suffix pattern ls would use for name, if any."""
+        best = None
+        dot = name.rfind('.')
+        if dot >= 0:
+            ext = name[dot:]
+            best = self._exact_ext.get(ext)
+            hit = self._folded_ext.get(_fold(ext))
+            if hit is not None and (best is None or hit[0] > best[0]):
+                best = hit
+        if self._trie_depth >= 0:
+            tail = name[-self._trie_depth:] if self._trie_depth else ''
+            if self._exact_trie:
+                best = self._walk(self._exact_trie, tail, best)
+            if self._folded_trie:
+                best = self._walk(self._folded_trie, _fold(tail), best)
+        return best[1] if best is not None else None
+        
+    def is_colored(self, indicator: str) -> bool:
+        """Check whether an indicator has a color other than the default."""
+        return indicator in self._colored
+        
+    def color_of(self, indicator: str) -> Optional[str]:
+        """Get the color code set for an indicator such as 'di'."""
+        return self.indicators.get(indicator)
+        
+    def resolve(self, name: str, indicator: str = 'fi') -> Optional[str]:
+        """Get the color for a file named name of an already known type.
+        
+        indicator is the two-letter ls code of the file's type; only
+        regular files ('fi') are matched against suffix patterns.
+        """
+        if indicator == 'ln' and self.link_as_target:
+            indicator = 'fi'
+        elif indicator == 'or' and not (self.link_as_target or self.is_colored('or')):
+            indicator = 'ln'
+        if indicator == 'fi':
+            code = self.match_suffix(name)
+            if code is not None:
+                return code
+        return self.indicators.get(indicator)
+        
+    def resolve_names(self, names: Iterable[str]) -> List[Optional[str]]:
+        """Get the colors of many regular files by name.
+        
+        A name's color only depends on the part from its last dot and on
+        its last trie-depth characters, so results are memoized on
+        whichever of the two contains the other. Extensions contain exactly
+        one dot, at their start, so the two kinds of key never collide.
+        """
+        match_suffix = self.match_suffix
+        default = self.indicators.get('fi')
+        depth = self._trie_depth
+        memo: Dict = {}
+        results = []
+        append = results.append
+        for name in names:
+            dot = name.rfind('.')
+            if dot >= 0 and len(name) - dot >= depth:
+                key = name[dot:]
+            else:
+                key = name[-depth:] if depth > 0 else ''
+            code = memo.get(key, memo)
+            if code is memo:
+                if len(memo) >= 65536:
+                    memo.clear()
+                code = match_suffix(name)
+                if code is None:
+                    code = default
+                memo[key] = code
+            append(code)
+        return results
+        
+    def classify(self, st: os.stat_result, path=None) -> str:
+        """Get the ls indicator for a file from its lstat result.
+        
+        path is only needed to check file capabilities when CAPABILITY is
+        colored.
+        """
+        mode = st.st_mode
+        if stat.S_ISREG(mode):
+            if mode & stat.S_ISUID and 'su' in self._colored:
+                return 'su'
+            if mode & stat.S_ISGID and 'sg' in self._colored:
+                return 'sg'
+            if 'ca' in self._colored and path is not None and _has_capability(path):
+                return 'ca'
+            if mode & 0o111 and 'ex' in self._colored:
+                return 'ex'
+            if st.st_nlink > 1 and 'mh' in self._colored:
+                return 'mh'
+            return 'fi'
+        if stat.S_ISDIR(mode):
+            if mode & stat.S_ISVTX and mode & stat.S_IWOTH and 'tw' in self._colored:
+                return 'tw'
+            if mode & stat.S_IWOTH and 'ow' in self._colored:
+                return 'ow'
+            if mode & stat.S_ISVTX and 'st' in self._colored:
+                return 'st'
+            return 'di'
+        if stat.S_ISLNK(mode):
+            return 'ln'
+        if stat.S_ISFIFO(mode):
+            return 'pi'
+        if stat.S_ISSOCK(mode):
+            return 'so'
+        if stat.S_ISBLK(mode):
+            return 'bd'
+        if stat.S_ISCHR(mode):
+            return 'cd'
+        if stat.S_ISDOOR(mode):
+            return 'do'
+        return 'or'
+        
+    def resolve_path(self, path) -> Optional[str]:
+        """Get the color ls would give an existing path."""
+        name = os.fspath(path)
+        try:
+            st = os.lstat(name)
+        except OSError:
+            return self.indicators.get('mi') if 'mi' in self._colored else None
+            
+        if stat.S_ISLNK(st.st_mode):
+            try:
+                target = os.stat(name)
+            except OSError:
+                return self.resolve(name, 'or')
+            if self.link_as_target:
+                indicator = self.classify(target, name)
+                return self.resolve(os.readlink(name), indicator)
+            return self.indicators.get('ln')
+            
+        return self.resolve(name, self.classify(st, name))
+        
+    def resolve_paths(self, paths: Iterable) -> List[Optional[str]]:
+        """Get the colors of many paths."""
+        return [self.resolve_path(path) for path in paths]
\ No newline at end of file
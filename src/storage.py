@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+@dataclass
+class SaveResult:
+    """Outcome of saving a file."""
+    path: Path
+    digest: str
+    bytes_written: int = 0
+    elapsed: float = 0.0
+    skipped: bool = False
+    
+    def describe(self) -> str:
+        """Short human readable summary for the status bar."""
+        if self.skipped:
+            return f"No changes to save: {self.path}"
+        return f"Saved: {self.path} ({self.bytes_written} bytes in {self.elapsed * 1000:.1f} ms)"
+
+@dataclass
+class SavedState:
+    """Fingerprint of a file as last read or written by the application."""
+    path: Path
+    digest: str
+    stat: Tuple[int, int]
+    
+    def matches(self, path: Path, digest: str) -> bool:
+        """Check whether path still holds exactly the given content."""
+        if resolve_target(path) != self.path or digest != self.digest:
+            return False
+        try:
+            return file_stat(self.path) == self.stat
+        except OSError:
+            return False
+
+def new_hasher():
+    """Create the incremental hasher used for content fingerprints."""
+    return hashlib.blake2b(digest_size=16)
+
+def content_digest(data: bytes) -> str:
+    """Fingerprint file content."""
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+def file_digest(f: BinaryIO, chunk_size: int = 65536) -> str:
+    """Fingerprint the rest of a binary file without reading it all at once."""
+    hasher = new_hasher()
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+def file_stat(path: Path) -> Tuple[int, int]:
+    """Get the (size, mtime) pair used to detect changes made by others."""
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+def resolve_target(path: Path) -> Path:
+    """Resolve symlinks so a linked ~/.dircolors is updated, not replaced."""
+    return Path(path).expanduser().resolve()
+
+def saved_state(path: Path, digest: str) -> SavedState:
+    """Record the state of a file that was just read or written."""
+    target = resolve_target(path)
+    return SavedState(target, digest, file_stat(target))
+
+def atomic_write(path: Path, data: bytes,
+                 previous: Optional[SavedState] = None) -> Tuple[SaveResult, SavedState]:
+    """Write data to path atomically.
+    
+    When previous shows the file already holds this exact content it is left
+    untouched, so its mtime does not change. Otherwise data goes to a temp
+    file in the same directory, is fsynced, and renamed over the target.
+    """
+    start = time.perf_counter()
+    digest = content_digest(data)
+    target = resolve_target(path)
+    
+    if previous is not None and previous.matches(target, digest):
+        result = SaveResult(Path(path), digest, elapsed=time.perf_counter() - start, skipped=True)
+        return result, previous
+        
+    try:
+        mode = os.stat(target).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+        
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(target.parent)
+    
+    result = SaveResult(Path(path), digest, len(data), time.perf_counter() - start)
+    return result, saved_state(target, digest)
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename by syncing its directory, where supported."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
\ No newline at end of file
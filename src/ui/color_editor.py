@@ -410,9 +410,7 @@ class ColorEditor(Gtk.Box):
             int(rgba.blue * 255)
         )
         
-        if not self.color_info:
-            self.color_info = parse_color_code("")
-        self.color_info.foreground = rgb
+        self.color_info = (self.color_info or parse_color_code("")).replace(foreground=rgb)
         
         self.fg_rgb_label.set_text(f"RGB: {rgb}")
         self.fg_clear_button.set_visible(True)
@@ -430,9 +428,7 @@ class ColorEditor(Gtk.Box):
             int(rgba.blue * 255)
         )
         
-        if not self.color_info:
-            self.color_info = parse_color_code("")
-        self.color_info.background = rgb
+        self.color_info = (self.color_info or parse_color_code("")).replace(background=rgb)
         
         self.bg_rgb_label.set_text(f"RGB: {rgb}")
         self.bg_clear_button.set_visible(True)
@@ -441,7 +437,7 @@ class ColorEditor(Gtk.Box):
     def on_fg_clear(self, button):
         """Clear foreground color."""
         if self.color_info:
-            self.color_info.foreground = None
+            self.color_info = self.color_info.replace(foreground=None)
         self.fg_rgb_label.set_text("RGB: (none)")
         self.fg_clear_button.set_visible(False)
         self.rebuild_color_code()
@@ -449,7 +445,7 @@ class ColorEditor(Gtk.Box):
     def on_bg_clear(self, button):
         """Clear background color."""
         if self.color_info:
-            self.color_info.background = None
+            self.color_info = self.color_info.replace(background=None)
         self.bg_rgb_label.set_text("RGB: (none)")
         self.bg_clear_button.set_visible(False)
         self.rebuild_color_code()
@@ -3,8 +3,9 @@
 import gi
 gi.require_version('Gtk', '4.0')
 
-from gi.repository import Gtk, GObject, Gdk
-from typing import Optional
+from gi.repository import Gtk, GObject, Gdk, GLib
+from typing import Callable, Optional
+import itertools
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -19,6 +20,9 @@ class FileTypeTreeView(Gtk.ScrolledWindow):
         'extension-moved': (GObject.SIGNAL_RUN_FIRST, None, (str, str)),
     }
     
+    # Extension rows added per main loop iteration when filling progressively
+    ROWS_PER_IDLE = 500
+    
     def __init__(self):
         super().__init__()
         
@@ -49,6 +53,12 @@ class FileTypeTreeView(Gtk.ScrolledWindow):
         column.pack_start(text_renderer, True)
         column.add_attribute(text_renderer, "text", 0)
         
+        # Warning shown on entries that failed the contrast audit
+        warning_renderer = Gtk.CellRendererPixbuf()
+        warning_renderer.set_property("icon-name", "dialog-warning-symbolic")
+        column.pack_end(warning_renderer, False)
+        column.set_cell_data_func(warning_renderer, self._render_warning)
+        
         self.tree_view.append_column(column)
         
         # Selection handling
@@ -67,6 +77,12 @@ class FileTypeTreeView(Gtk.ScrolledWindow):
         # Track expansion state
         self.expanded_paths = set()
         
+        # Bumped by every update so stale progressive fills stop
+        self.populate_generation = 0
+        
+        # File types marked as hard to read
+        self.flagged = set()
+        
         # Icon mappings
         self.setup_icon_mappings()
         
@@ -283,8 +299,17 @@ class FileTypeTreeView(Gtk.ScrolledWindow):
                     
         return 'other'  # Default category
         
-    def update_data(self, parser: DirColorsParser):
-        """Update the tree view with data from parser."""
+    def update_data(self, parser: DirColorsParser, progressive: bool = False,
+                    on_done: Optional[Callable[[], None]] = None):
+        """Update the tree view with data from parser.
+        
+        With progressive set, extension rows are added in chunks from the
+        main loop so large files do not freeze the window; on_done is called
+        once the tree is complete.
+        """
+        self.populate_generation += 1
+        generation = self.populate_generation
+        
         # Save current expansion state
         self.save_expansion_state()
         
@@ -357,6 +382,7 @@ class FileTypeTreeView(Gtk.ScrolledWindow):
             'other_extensions': ('Other', 'text-x-generic-symbolic')
         }
         
+        pending_rows = []
         for category_key, (display_name, icon) in ext_categories.items():
             if category_key in categories:
                 category_iter = self.store.append(ext_iter, [
@@ -364,11 +390,37 @@ class FileTypeTreeView(Gtk.ScrolledWindow):
                 ])
                 
                 for extension in sorted(categories[category_key]):
-                    ext_icon = self._get_extension_icon(extension)
-                    self.store.append(category_iter, [
-                        extension, extension, ext_icon, False
-                    ])
+                    pending_rows.append((category_iter, extension))
+                    
+        if progressive:
+            rows = iter(pending_rows)
+            GLib.idle_add(self._append_extension_rows, rows, generation, fs_iter, on_done)
+            return
+            
+        self._add_extension_rows(pending_rows)
+        self._finish_update(fs_iter, on_done)
+        
+    def _add_extension_rows(self, rows):
+        """Append (category_iter, extension) rows to the store."""
+        for category_iter, extension in rows:
+            ext_icon = self._get_extension_icon(extension)
+            self.store.append(category_iter, [
+                extension, extension, ext_icon, False
+            ])
+            
+    def _append_extension_rows(self, rows, generation, fs_iter, on_done):
+        """Idle callback adding the next chunk of extension rows."""
+        if generation != self.populate_generation:
+            return False
+        chunk = list(itertools.islice(rows, self.ROWS_PER_IDLE))
+        self._add_extension_rows(chunk)
+        if len(chunk) == self.ROWS_PER_IDLE:
+            return True
+        self._finish_update(fs_iter, on_done)
+        return False
         
+    def _finish_update(self, fs_iter, on_done):
+        """Expand rows once the tree is fully populated."""
         # Expand file system objects by default
         path = self.store.get_path(fs_iter)
         self.tree_view.expand_row(path, False)
@@ -376,6 +428,18 @@ class FileTypeTreeView(Gtk.ScrolledWindow):
         # Restore previous expansion state
         self.restore_expansion_state()
         
+        if on_done is not None:
+            on_done()
+            
+    def _render_warning(self, column, renderer, model, tree_iter, data=None):
+        """Show the warning icon only on flagged rows."""
+        renderer.set_visible(model[tree_iter][1] in self.flagged)
+        
+    def set_flagged(self, file_types):
+        """Mark the file types that failed the contrast audit."""
+        self.flagged = set(file_types)
+        self.tree_view.queue_draw()
+        
     def _format_file_type_name(self, file_type: str) -> str:
         """Format file type name for display."""
         display_names = {
@@ -6,7 +6,10 @@ gi.require_version('Adw', '1')
 
 from gi.repository import Gtk, Adw, Gio, GLib
 from pathlib import Path
+from typing import Optional
 import os
+import threading
+import time
 
 import sys
 from pathlib import Path
@@ -17,11 +20,20 @@ parent_dir = current_dir.parent
 sys.path.insert(0, str(parent_dir))
 
 from parser import DirColorsParser, load_default_dircolors
+from parse_cache import ParseCache
+from palettes import PaletteRegistry, parse_hex_color
+from presets import PresetLibrary
+from color_utils import confusable_pairs, get_palette_profile, set_palette_profile
+from contrast import ContrastAuditor
+from distinct import assign_distinct_colors
 from ui.file_type_tree import FileTypeTreeView
 from ui.color_editor import ColorEditor
 from ui.preview_panel import PreviewPanel
 from config import app_config
 
+class LoadCancelled(Exception):
+    """Raised inside a background load that a newer load has superseded."""
+
 class MainWindow(Gtk.ApplicationWindow):
     """Main application window with three-panel layout."""
     
@@ -29,8 +41,22 @@ class MainWindow(Gtk.ApplicationWindow):
         super().__init__(application=application)
         
         self.parser = DirColorsParser()
+        self.parse_cache = ParseCache.from_config(app_config)
+        self.presets = PresetLibrary.from_config(app_config, self.parse_cache)
+        self.palettes = PaletteRegistry()
+        self.palettes.load_directory(app_config.config_dir / 'palettes')
+        profile = self.palettes.get(app_config.get('palette_profile', 'vga'))
+        if profile is not None:
+            set_palette_profile(profile)
+        self.contrast = ContrastAuditor(
+            self.audit_backgrounds(),
+            app_config.get('contrast_min_ratio', 4.5),
+            app_config.get('contrast_min_lc', 60.0),
+        )
         self.current_file = None
         self.modified = False
+        # Bumped for every load so results of superseded loads are dropped
+        self.load_generation = 0
         
         self.setup_ui()
         self.setup_actions()
@@ -74,17 +100,38 @@ class MainWindow(Gtk.ApplicationWindow):
         file_menu.append("Open...", "win.open")
         file_menu.append("Save", "win.save")
         file_menu.append("Save As...", "win.save_as")
+        file_menu.append("Import LS_COLORS...", "win.import_ls_colors")
+        file_menu.append("Load Preset...", "win.load_preset")
         menu_model.append_submenu("File", file_menu)
         
+        export_menu = Gio.Menu()
+        export_menu.append("Copy LS_COLORS", "win.copy_ls_colors")
+        export_menu.append("Copy for sh/bash/zsh", "win.copy_shell::sh")
+        export_menu.append("Copy for csh/tcsh", "win.copy_shell::csh")
+        export_menu.append("Copy for fish", "win.copy_shell::fish")
+        menu_model.append_submenu("Export", export_menu)
+        
         edit_menu = Gio.Menu()
         edit_menu.append("Add Extension...", "win.add_extension")
         edit_menu.append("Remove Selected", "win.remove_selected")
         edit_menu.append("Reset to Default", "win.reset")
+        edit_menu.append("Generate Distinct Colors", "win.generate_colors::truecolor")
+        edit_menu.append("Generate Distinct Colors (256)", "win.generate_colors::256")
         menu_model.append_submenu("Edit", edit_menu)
         
         view_menu = Gio.Menu()
         view_menu.append("Refresh Preview", "win.refresh_preview")
         view_menu.append("Set Background Color...", "win.set_bg_color")
+        palette_menu = Gio.Menu()
+        for profile in self.palettes:
+            palette_menu.append(profile.title, f"win.palette::{profile.name}")
+        view_menu.append_submenu("Terminal Palette", palette_menu)
+        vision_menu = Gio.Menu()
+        vision_menu.append("Normal Vision", "win.cvd::none")
+        vision_menu.append("Protanopia", "win.cvd::protanopia")
+        vision_menu.append("Deuteranopia", "win.cvd::deuteranopia")
+        vision_menu.append("Tritanopia", "win.cvd::tritanopia")
+        view_menu.append_submenu("Color Vision", vision_menu)
         menu_model.append_submenu("View", view_menu)
         
         menu_model.append("About", "win.about")
@@ -186,6 +233,23 @@ class MainWindow(Gtk.ApplicationWindow):
         save_as_action.connect("activate", lambda a, p: self.save_as_file())
         self.add_action(save_as_action)
         
+        import_action = Gio.SimpleAction.new("import_ls_colors", None)
+        import_action.connect("activate", lambda a, p: self.import_ls_colors())
+        self.add_action(import_action)
+        
+        preset_action = Gio.SimpleAction.new("load_preset", None)
+        preset_action.connect("activate", lambda a, p: self.choose_preset())
+        self.add_action(preset_action)
+        
+        # Export actions
+        copy_ls_colors_action = Gio.SimpleAction.new("copy_ls_colors", None)
+        copy_ls_colors_action.connect("activate", lambda a, p: self.copy_ls_colors())
+        self.add_action(copy_ls_colors_action)
+        
+        copy_shell_action = Gio.SimpleAction.new("copy_shell", GLib.VariantType.new("s"))
+        copy_shell_action.connect("activate", lambda a, p: self.copy_ls_colors(p.get_string()))
+        self.add_action(copy_shell_action)
+        
         # Edit actions
         add_ext_action = Gio.SimpleAction.new("add_extension", None)
         add_ext_action.connect("activate", lambda a, p: self.add_extension())
@@ -199,6 +263,10 @@ class MainWindow(Gtk.ApplicationWindow):
         reset_action.connect("activate", lambda a, p: self.reset_to_default())
         self.add_action(reset_action)
         
+        generate_action = Gio.SimpleAction.new("generate_colors", GLib.VariantType.new("s"))
+        generate_action.connect("activate", lambda a, p: self.generate_colors(p.get_string() == "256"))
+        self.add_action(generate_action)
+        
         # View actions
         refresh_action = Gio.SimpleAction.new("refresh_preview", None)
         refresh_action.connect("activate", lambda a, p: self.preview_panel.update_preview(self.parser))
@@ -208,6 +276,17 @@ class MainWindow(Gtk.ApplicationWindow):
         bg_color_action.connect("activate", lambda a, p: self.set_background_color())
         self.add_action(bg_color_action)
         
+        palette_action = Gio.SimpleAction.new_stateful(
+            "palette", GLib.VariantType.new("s"),
+            GLib.Variant.new_string(get_palette_profile().name))
+        palette_action.connect("change-state", self.on_palette_changed)
+        self.add_action(palette_action)
+        
+        cvd_action = Gio.SimpleAction.new_stateful(
+            "cvd", GLib.VariantType.new("s"), GLib.Variant.new_string("none"))
+        cvd_action.connect("change-state", self.on_cvd_changed)
+        self.add_action(cvd_action)
+        
         # Help actions
         about_action = Gio.SimpleAction.new("about", None)
         about_action.connect("activate", lambda a, p: self.show_about())
@@ -262,9 +341,15 @@ class MainWindow(Gtk.ApplicationWindow):
         user_dircolors = Path.home() / '.dircolors'
         if user_dircolors.exists():
             self.load_file(user_dircolors)
+        elif os.environ.get('LS_COLORS'):
+            # Start from the colors the user's shell already uses
+            self.parser.load_ls_colors(os.environ['LS_COLORS'])
+            self.refresh_ui()
+            self.show_diagnostics(self.parser.diagnostics)
+            self.update_status("Loaded LS_COLORS from the environment")
         else:
             # Load system defaults
-            self.parser = load_default_dircolors()
+            self.parser = load_default_dircolors(cache=self.parse_cache)
             self.refresh_ui()
             self.update_status("Loaded system defaults")
             
@@ -279,25 +364,97 @@ class MainWindow(Gtk.ApplicationWindow):
         self.preview_panel.set_background_color(rgba)
             
     def load_file(self, filepath: Path):
-        """Load a .dircolors file."""
+        """Load a .dircolors file in the background.
+        
+        Parsing runs on a worker thread so the window stays responsive; the
+        result is applied on the main loop. Starting another load cancels
+        this one.
+        """
+        self.load_generation += 1
+        generation = self.load_generation
+        self.update_status(f"Loading: {filepath}")
+        
+        thread = threading.Thread(
+            target=self._load_file_worker, args=(filepath, generation), daemon=True
+        )
+        thread.start()
+        
+    def _load_file_worker(self, filepath: Path, generation: int):
+        """Parse filepath on a worker thread and hand the result to the main loop."""
+        last_report = [0.0]
+        
+        def on_progress(bytes_read, total):
+            if generation != self.load_generation:
+                raise LoadCancelled()
+            now = time.monotonic()
+            if now - last_report[0] >= 0.1 and total:
+                last_report[0] = now
+                percent = bytes_read * 100 // total
+                GLib.idle_add(self._on_load_progress, filepath, generation, percent)
+                
+        parser = DirColorsParser()
         try:
-            self.parser.parse_file(filepath)
-            self.current_file = filepath
-            self.modified = False
-            self.refresh_ui()
-            self.update_status(f"Loaded: {filepath}")
-            self.update_title()
+            parser.parse_file(filepath, cache=self.parse_cache, progress=on_progress)
+        except LoadCancelled:
+            return
         except Exception as e:
-            self.show_error(f"Failed to load file: {e}")
-            
+            GLib.idle_add(self._on_load_failed, generation, e)
+            return
+        GLib.idle_add(self._on_load_finished, filepath, generation, parser)
+        
+    def _on_load_progress(self, filepath: Path, generation: int, percent: int):
+        """Show parse progress in the status bar."""
+        if generation == self.load_generation:
+            self.update_status(f"Loading: {filepath} ({percent}%)")
+        return False
+        
+    def _on_load_failed(self, generation: int, error: Exception):
+        """Report a failed background load."""
+        if generation == self.load_generation:
+            self.update_status("Load failed")
+            self.show_error(f"Failed to load file: {error}")
+        return False
+        
+    def _on_load_finished(self, filepath: Path, generation: int, parser: DirColorsParser):
+        """Apply a finished background load unless it was superseded."""
+        if generation != self.load_generation:
+            return False
+        self.parser = parser
+        self.current_file = filepath
+        self.set_modified(False)
+        self.preview_panel.update_preview(self.parser)
+        
+        loaded = f"Loaded: {filepath}"
+        if parser.diagnostics:
+            loaded += f" ({parser.diagnostics.describe()})"
+        self.file_tree.update_data(
+            self.parser, progressive=True,
+            on_done=lambda: self.update_status(loaded)
+        )
+        self.update_status(f"{loaded} (building tree...)")
+        self.show_diagnostics(parser.diagnostics)
+        self.audit_contrast()
+        return False
+        
+    def show_diagnostics(self, diagnostics):
+        """List parse problems in the status bar tooltip."""
+        if not diagnostics:
+            self.status_label.set_tooltip_text(None)
+            return
+        lines = [str(diagnostic) for diagnostic in diagnostics]
+        if diagnostics.suppressed:
+            lines.append(f"... {diagnostics.suppressed} more not shown")
+            lines.append("")
+            lines.extend(diagnostics.summary())
+        self.status_label.set_tooltip_text("\n".join(lines))
+        
     def save_file(self):
         """Save the current configuration."""
         if self.current_file:
             try:
-                self.parser.write_file(self.current_file)
-                self.modified = False
-                self.save_button.set_sensitive(False)
-                self.update_status(f"Saved: {self.current_file}")
+                result = self.parser.write_file(self.current_file)
+                self.set_modified(False)
+                self.update_status(result.describe())
                 self.update_title()
             except Exception as e:
                 self.show_error(f"Failed to save file: {e}")
@@ -329,11 +486,10 @@ class MainWindow(Gtk.ApplicationWindow):
             if file:
                 filepath = Path(file.get_path())
                 try:
-                    self.parser.write_file(filepath)
+                    result = self.parser.write_file(filepath)
                     self.current_file = filepath
-                    self.modified = False
-                    self.save_button.set_sensitive(False)
-                    self.update_status(f"Saved: {filepath}")
+                    self.set_modified(False)
+                    self.update_status(result.describe())
                     self.update_title()
                 except Exception as e:
                     self.show_error(f"Failed to save file: {e}")
@@ -345,10 +501,12 @@ class MainWindow(Gtk.ApplicationWindow):
             # TODO: Ask to save changes
             pass
             
-        self.parser = load_default_dircolors()
+        self.load_generation += 1
+        self.parser = load_default_dircolors(cache=self.parse_cache)
         self.current_file = None
         self.modified = False
         self.refresh_ui()
+        self.show_diagnostics(self.parser.diagnostics)
         self.update_status("New configuration created")
         self.update_title()
         
@@ -382,10 +540,193 @@ class MainWindow(Gtk.ApplicationWindow):
                 self.load_file(filepath)
         dialog.destroy()
         
+    def import_ls_colors(self):
+        """Import colors from a shell script or dircolors -b/-c output."""
+        dialog = Gtk.FileChooserNative(
+            title="Import LS_COLORS from a shell file",
+            transient_for=self,
+            action=Gtk.FileChooserAction.OPEN
+        )
+        dialog.set_current_folder(Gio.File.new_for_path(str(Path.home())))
+        dialog.connect("response", self.on_import_dialog_response)
+        dialog.show()
+        
+    def on_import_dialog_response(self, dialog, response):
+        """Handle import dialog response."""
+        if response == Gtk.ResponseType.ACCEPT:
+            file = dialog.get_file()
+            if file:
+                filepath = Path(file.get_path())
+                try:
+                    text = filepath.read_text(encoding='utf-8', errors='replace')
+                    self.load_generation += 1
+                    self.parser.load_shell_ls_colors(text)
+                    self.current_file = None
+                    self.refresh_ui()
+                    self.show_diagnostics(self.parser.diagnostics)
+                    self.set_modified(True)
+                    self.update_status(f"Imported LS_COLORS from {filepath}")
+                except (OSError, ValueError) as e:
+                    self.show_error(f"Failed to import LS_COLORS: {e}")
+        dialog.destroy()
+        
+    def choose_preset(self):
+        """Pick a theme preset to start from.
+        
+        Only the preset manifest is read to fill the list; the chosen
+        preset is parsed when it is loaded.
+        """
+        self.presets.scan()
+        if not len(self.presets):
+            self.show_error("No presets found. Add .dircolors files to "
+                            f"{app_config.config_dir / 'presets'}")
+            return
+            
+        dialog = Gtk.Dialog(title="Load Preset")
+        dialog.set_transient_for(self)
+        dialog.set_modal(True)
+        dialog.set_default_size(480, 420)
+        dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        load_button = dialog.add_button("Load", Gtk.ResponseType.OK)
+        load_button.add_css_class("suggested-action")
+        
+        content_area = dialog.get_content_area()
+        content_area.set_margin_start(12)
+        content_area.set_margin_end(12)
+        content_area.set_margin_top(12)
+        content_area.set_margin_bottom(12)
+        
+        list_box = Gtk.ListBox()
+        list_box.set_selection_mode(Gtk.SelectionMode.SINGLE)
+        names = []
+        for info in self.presets:
+            row_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+            row_box.set_margin_start(6)
+            row_box.set_margin_end(6)
+            row_box.set_margin_top(6)
+            row_box.set_margin_bottom(6)
+            title = Gtk.Label()
+            title.set_markup(f"<b>{GLib.markup_escape_text(info.title)}</b>")
+            title.set_halign(Gtk.Align.START)
+            row_box.append(title)
+            details = f"{info.mode}, {info.entries} entries"
+            if info.description:
+                details = f"{info.description} ({details})"
+            detail_label = Gtk.Label(label=details)
+            detail_label.set_halign(Gtk.Align.START)
+            detail_label.set_wrap(True)
+            detail_label.add_css_class("dim-label")
+            row_box.append(detail_label)
+            list_box.append(row_box)
+            names.append(info.name)
+        list_box.select_row(list_box.get_row_at_index(0))
+        list_box.connect("row-activated", lambda box, row: dialog.response(Gtk.ResponseType.OK))
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(list_box)
+        content_area.append(scrolled)
+        
+        def on_response(dialog, response):
+            row = list_box.get_selected_row()
+            if response == Gtk.ResponseType.OK and row is not None:
+                self.load_preset(names[row.get_index()])
+            dialog.destroy()
+            
+        dialog.connect("response", on_response)
+        dialog.present()
+        
+    def load_preset(self, name: str):
+        """Replace the current configuration with a preset."""
+        try:
+            parser = self.presets.load(name)
+        except (OSError, ValueError) as e:
+            self.show_error(f"Failed to load preset: {e}")
+            return
+        self.load_generation += 1
+        self.parser = parser
+        self.current_file = None
+        self.refresh_ui()
+        self.show_diagnostics(self.parser.diagnostics)
+        self.set_modified(True)
+        self.update_status(f"Loaded preset: {self.presets.get(name).title}")
+        
+    def copy_ls_colors(self, shell: Optional[str] = None):
+        """Copy the LS_COLORS value, or a shell snippet setting it, to the clipboard."""
+        if shell is None:
+            text = self.parser.to_ls_colors()
+            what = "LS_COLORS"
+        else:
+            text = self.parser.shell_snippet(shell)
+            what = f"LS_COLORS for {shell}"
+        self.get_clipboard().set(text)
+        self.update_status(f"Copied {what} to the clipboard ({len(text)} characters)")
+        
+    def on_palette_changed(self, action, value):
+        """Preview colors as a terminal with another palette shows them."""
+        profile = self.palettes.get(value.get_string())
+        if profile is None:
+            return
+        action.set_state(value)
+        set_palette_profile(profile)
+        app_config.set('palette_profile', profile.name)
+        app_config.save_config()
+        
+        self.preview_panel.update_preview(self.parser)
+        self.audit_contrast()
+        selected_type = self.file_tree.get_selected_file_type()
+        if selected_type:
+            self.on_file_type_selected(self.file_tree, selected_type)
+        self.update_status(f"Previewing the {profile.title} palette")
+        
+    def on_cvd_changed(self, action, value):
+        """Simulate a color vision deficiency in the preview.
+        
+        Kinds of files whose colors become hard to tell apart are listed
+        in the status bar tooltip.
+        """
+        action.set_state(value)
+        kind = value.get_string()
+        self.preview_panel.set_cvd_kind(None if kind == "none" else kind)
+        self.preview_panel.update_preview(self.parser)
+        if kind == "none":
+            self.status_label.set_tooltip_text(None)
+            self.update_status("Previewing normal color vision")
+            return
+            
+        pairs = confusable_pairs(self.parser.get_category_colors(), kind)
+        if pairs:
+            self.status_label.set_tooltip_text("\n".join(
+                f"{first} and {second} look alike" for first, second, _ in pairs))
+            self.update_status(f"Simulating {kind}: {len(pairs)} "
+                               f"pair{'s' if len(pairs) != 1 else ''} of file kinds look alike")
+        else:
+            self.status_label.set_tooltip_text(None)
+            self.update_status(f"Simulating {kind}: all kinds of files stay distinguishable")
+            
+    def audit_backgrounds(self):
+        """Get the backgrounds entries should be readable on."""
+        backgrounds = [app_config.get_background_rgb()]
+        for color in app_config.get('contrast_backgrounds', []):
+            try:
+                backgrounds.append(parse_hex_color(color))
+            except (AttributeError, ValueError):
+                print(f"Warning: Ignoring contrast background {color!r}")
+        return backgrounds
+        
+    def audit_contrast(self):
+        """Flag entries that are hard to read in the tree.
+        
+        Only color codes not audited before are measured, so this is cheap
+        to repeat after edits.
+        """
+        self.file_tree.set_flagged(self.contrast.audit(self.parser.entries.values()))
+        
     def refresh_ui(self):
         """Refresh all UI components."""
         self.file_tree.update_data(self.parser)
         self.preview_panel.update_preview(self.parser)
+        self.audit_contrast()
         
     def on_file_type_selected(self, tree_view, file_type):
         """Handle file type selection in the tree."""
@@ -393,7 +734,11 @@ class MainWindow(Gtk.ApplicationWindow):
         if entry:
             self.color_editor.set_color_code(entry.color_code)
             self.color_editor.set_sensitive(True)
-            self.update_status(f"Editing: {file_type} = {entry.color_code}")
+            status = f"Editing: {file_type} = {entry.color_code}"
+            result = self.contrast.results.get(file_type)
+            if result is not None and not result.passed:
+                status += f" (hard to read: {result.describe()})"
+            self.update_status(status)
         else:
             self.color_editor.clear()
             self.color_editor.set_sensitive(False)
@@ -403,8 +748,13 @@ class MainWindow(Gtk.ApplicationWindow):
         """Handle color changes from the editor."""
         selected_type = self.file_tree.get_selected_file_type()
         if selected_type:
-            self.parser.set_entry(selected_type, color_code)
+            # Keep the entry's comment so the saved line only changes its code
+            entry = self.parser.get_entry(selected_type)
+            comment = entry.comment if entry else None
+            self.parser.set_entry(selected_type, color_code, comment)
             self.preview_panel.update_preview(self.parser)
+            self.contrast.update_entry(selected_type, color_code)
+            self.file_tree.set_flagged(self.contrast.failing)
             self.set_modified(True)
             
     def on_extension_moved(self, tree_view, extension, target_category):
@@ -506,6 +856,8 @@ class MainWindow(Gtk.ApplicationWindow):
                 app_config.set_background_color(
                     color.red, color.green, color.blue, color.alpha
                 )
+                self.contrast.set_backgrounds(self.audit_backgrounds())
+                self.audit_contrast()
                 
                 self.update_status(f"Background color updated and saved")
             dialog.destroy()
@@ -687,7 +1039,27 @@ class MainWindow(Gtk.ApplicationWindow):
             
     def reset_to_default(self):
         """Reset to default configuration."""
-        self.parser = load_default_dircolors()
+        self.load_generation += 1
+        self.parser = load_default_dircolors(cache=self.parse_cache)
+        self.refresh_ui()
+        self.show_diagnostics(self.parser.diagnostics)
+        self.set_modified(True)
+        self.update_status("Reset to default configuration")
+        
+    def generate_colors(self, palette_256: bool = False):
+        """Give each extension category a distinct color, readable on the background."""
+        try:
+            generated = assign_distinct_colors(
+                self.parser, self.audit_backgrounds(), palette_256,
+                app_config.get('contrast_min_ratio', 4.5),
+                app_config.get('contrast_min_lc', 60.0),
+            )
+        except ValueError as e:
+            self.show_error(f"Could not generate colors: {e}")
+            return
         self.refresh_ui()
         self.set_modified(True)
-        self.update_status("Reset to default configuration")
\ No newline at end of file
+        self.update_status(
+            f"Colored {len(generated.extensions)} extensions in {len(generated.categories)} "
+            f"categories (closest categories {generated.min_distance:.2f} apart)"
+        )
\ No newline at end of file
@@ -9,8 +9,8 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from parser import DirColorsParser
-from color_utils import parse_color_code
+from parser import DirColorsParser, KEYWORD_INDICATORS
+from color_utils import parse_color_code, simulate_cvd
 
 class PreviewPanel(Gtk.ScrolledWindow):
     """Preview panel showing simulated terminal output."""
@@ -64,6 +64,9 @@ class PreviewPanel(Gtk.ScrolledWindow):
         
         self.set_child(main_box)
         
+        # Color vision deficiency simulated in the preview, or None
+        self.cvd_kind = None
+        
         # Sample files for preview
         self.sample_files = [
             ("📁", "Documents", "DIR"),
@@ -115,20 +118,29 @@ class PreviewPanel(Gtk.ScrolledWindow):
         
         buffer.insert_at_cursor(header_text)
         
-        # Add sample files with colors
+        # Add sample files with the colors ls would give them
+        resolver = parser.get_resolver()
+        samples = []
         for icon, filename, file_type in self.sample_files:
-            # Get color entry for this file type
-            entry = parser.get_entry(file_type)
+            indicator = KEYWORD_INDICATORS.get(file_type, 'fi')
+            color_code = resolver.resolve(filename, indicator)
+            samples.append((icon, filename, parse_color_code(color_code) if color_code else None))
             
-            if entry:
-                color_info = parse_color_code(entry.color_code)
-                
+        # Simulate all colors shown in one batch
+        shown = {}
+        if self.cvd_kind is not None:
+            colors = list({rgb for _, _, info in samples if info is not None
+                           for rgb in (info.foreground, info.background) if rgb is not None})
+            shown = dict(zip(colors, simulate_cvd(colors, self.cvd_kind)))
+            
+        for icon, filename, color_info in samples:
+            if color_info is not None:
                 # Create text tag for this file
                 tag = buffer.create_tag()
                 
                 # Apply foreground color
                 if color_info.foreground:
-                    r, g, b = color_info.foreground
+                    r, g, b = shown.get(color_info.foreground, color_info.foreground)
                     from gi.repository import Gdk
                     rgba = Gdk.RGBA()
                     rgba.red = r/255.0
@@ -139,7 +151,7 @@ class PreviewPanel(Gtk.ScrolledWindow):
                     
                 # Apply background color
                 if color_info.background:
-                    r, g, b = color_info.background
+                    r, g, b = shown.get(color_info.background, color_info.background)
                     from gi.repository import Gdk
                     rgba = Gdk.RGBA()
                     rgba.red = r/255.0
@@ -178,6 +190,10 @@ class PreviewPanel(Gtk.ScrolledWindow):
                 buffer.insert_at_cursor(text)
                 
                 
+    def set_cvd_kind(self, kind):
+        """Simulate a color vision deficiency in the preview, or None for normal vision."""
+        self.cvd_kind = kind
+        
     def refresh_preview(self):
         """Refresh the preview display."""
         # This would be called from the main window with current parser
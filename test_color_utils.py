@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def test_parse_cache():
+    """Test that parsed codes are shared, immutable and counted."""
+    print("Testing parse_color_code cache...")
+    
+    from color_utils import (parse_color_code, parse_cache_info, clear_parse_cache,
+                             ColorMode, Style)
+    
+    clear_parse_cache()
+    info = parse_color_code("01;38;5;208")
+    assert info.styles == (Style.BOLD,)
+    assert info.fg_256 == 208
+    assert info.mode == ColorMode.EXTENDED_256
+    
+    # Surrounding whitespace does not make a new entry
+    assert parse_color_code(" 01;38;5;208\n") is info
+    stats = parse_cache_info()
+    assert (stats.hits, stats.misses, stats.currsize) == (1, 1, 1)
+    
+    try:
+        info.foreground = (0, 0, 0)
+        assert False, "ColorInfo was modified"
+    except AttributeError:
+        pass
+        
+    # replace() copies, leaving the cached object alone
+    changed = info.replace(foreground=None)
+    assert changed.foreground is None and changed.styles == info.styles
+    assert info.foreground is not None
+    assert changed.original_code == info.original_code
+    
+    # A large truecolor theme stays cached between passes
+    clear_parse_cache()
+    codes = [f"38;2;{i % 256};{i // 256};7" for i in range(5000)]
+    first = [parse_color_code(code) for code in codes]
+    assert all(parse_color_code(code) is info for code, info in zip(codes, first))
+    assert parse_cache_info().misses == len(codes)
+    
+    clear_parse_cache()
+    assert parse_cache_info().currsize == 0
+    
+    print("parse_color_code cache test OK")
+
+def test_palette_tables():
+    """Test the precomputed palettes and their reverse lookups."""
+    print("Testing palette tables...")
+    
+    from color_utils import (PALETTE_256, color_256_to_rgb, get_color_palette_256,
+                             rgb_to_256_color, _rgb_to_basic_color, parse_color_code)
+    
+    assert len(PALETTE_256) == 256
+    assert color_256_to_rgb(9) == (255, 0, 0)
+    assert color_256_to_rgb(16) == (0, 0, 0)
+    assert color_256_to_rgb(208) == (255, 135, 0)
+    assert color_256_to_rgb(244) == (128, 128, 128)
+    assert color_256_to_rgb(300) == (128, 128, 128)
+    assert get_color_palette_256() == list(PALETTE_256)
+    assert parse_color_code("48;5;208").background == (255, 135, 0)
+    
+    # Extended palette colors map back to their own index
+    for index in range(16, 256):
+        assert rgb_to_256_color(*PALETTE_256[index]) == index
+    assert _rgb_to_basic_color(255, 255, 0) == 93
+    assert _rgb_to_basic_color(0, 0, 120) == 34
+    assert _rgb_to_basic_color(140, 130, 120) == 90
+    
+    print("Palette tables test OK")
+
+def test_nearest_color():
+    """Test perceptual quantization to the 8, 16 and 256 color palettes."""
+    print("Testing nearest color quantization...")
+    
+    from color_utils import nearest_color_index, build_color_code, ColorMode, Style
+    from quantize import PaletteQuantizer
+    
+    # Grays between the cube and the ramp pick the closer one
+    assert nearest_color_index(94, 94, 94) == 59
+    assert nearest_color_index(250, 100, 10) == 202
+    assert nearest_color_index(255, 60, 60, colors=16) == 9
+    assert nearest_color_index(160, 20, 20, colors=8) == 1
+    assert build_color_code((250, 100, 10), mode=ColorMode.EXTENDED_256) == "38;5;202"
+    assert build_color_code((250, 100, 10), (0, 0, 120), mode=ColorMode.BASIC_8) == "91;44"
+    # The editor's spelling: styles as given, '00' for nothing set
+    assert build_color_code(styles=[Style.UNDERLINE, Style.BOLD], mode=ColorMode.BASIC_8) == "4;1"
+    assert build_color_code() == "00"
+    
+    try:
+        nearest_color_index(0, 0, 0, colors=88)
+        assert False, "unsupported palette accepted"
+    except ValueError:
+        pass
+        
+    # Lookup cells are searched once, and out of range channels are clamped
+    quantizer = PaletteQuantizer([(0, 0, 0), (255, 255, 255)], [7, 9])
+    assert quantizer.filled() == 0
+    assert quantizer.nearest(200, 210, 220) == 9
+    assert quantizer.nearest(201, 209, 221) == 9
+    assert quantizer.filled() == 1
+    assert quantizer.nearest(-5, 20, 300) == 7
+    
+    print("Nearest color quantization test OK")
+
+def test_sgr_parsing():
+    """Test the SGR state machine on the full parameter grammar."""
+    print("Testing SGR parsing...")
+    
+    from color_utils import (parse_sgr, parse_color_code, PackedSGR, STYLE_BITS, Style,
+                             COLOR_DEFAULT, INDEXED_COLOR, TRUECOLOR, ColorMode)
+    
+    bold, underline = STYLE_BITS[Style.BOLD], STYLE_BITS[Style.UNDERLINE]
+    assert parse_sgr("01;31") == PackedSGR(bold, 1, COLOR_DEFAULT, COLOR_DEFAULT)
+    assert parse_sgr("01;93;48;5;93") == PackedSGR(bold, 11, INDEXED_COLOR | 93, COLOR_DEFAULT)
+    # Sub-parameter forms, with and without a color space id
+    assert parse_sgr("38:2::10:20:30;48:2:1:2:3") == PackedSGR(
+        0, TRUECOLOR | 0x0A141E, TRUECOLOR | 0x010203, COLOR_DEFAULT)
+    assert parse_sgr("38:5:9:1;1") == PackedSGR(bold, INDEXED_COLOR | 9)
+    # Underline color, underline styles and resets
+    assert parse_sgr("58;5;196;4:3").underline == INDEXED_COLOR | 196
+    assert parse_sgr("4:2").styles == STYLE_BITS[Style.DOUBLE_UNDERLINE]
+    assert parse_sgr("4;4:0").styles == 0
+    assert parse_sgr("01;04;22").styles == underline
+    assert parse_sgr("21;53;24").styles == STYLE_BITS[Style.OVERLINE]
+    assert parse_sgr("31;41;39") == PackedSGR(0, COLOR_DEFAULT, 1)
+    assert parse_sgr("01;31;0;32") == PackedSGR(0, 2)
+    # Malformed parameters are skipped without losing the rest
+    assert parse_sgr("38;5;300;32") == PackedSGR(0, 2)
+    assert parse_sgr("x;01;38;2;1;2") == PackedSGR(bold)
+    assert parse_sgr("1;;4") == PackedSGR(underline)
+    # Leading zeros, surrounding spaces and truncated extended colors
+    assert parse_sgr("0001;38;2;010;020;0030") == PackedSGR(bold, TRUECOLOR | 0x0A141E)
+    assert parse_sgr(" 01;48;5;0009 ") == PackedSGR(bold, COLOR_DEFAULT, INDEXED_COLOR | 9)
+    assert parse_sgr("31;38;5") == parse_sgr("31;38;2;1;2") == PackedSGR(0, 1)
+    
+    info = parse_color_code("01;53;58:2::255:0:0")
+    assert info.styles == (Style.BOLD, Style.OVERLINE)
+    assert info.underline_color == (255, 0, 0)
+    assert info.mode == ColorMode.RGB_TRUECOLOR
+    assert info.replace(styles=[Style.ITALIC]).packed.styles == STYLE_BITS[Style.ITALIC]
+    
+    print("SGR parsing test OK")
+
+def test_palette_profiles():
+    """Test switching palette profiles and loading palette files."""
+    print("Testing palette profiles...")
+    
+    import json
+    import tempfile
+    from color_utils import (parse_color_code, set_palette_profile, get_palette_profile,
+                             nearest_color_index, _rgb_to_basic_color, color_256_to_rgb)
+    from palettes import PaletteRegistry, DEFAULT_PROFILE
+    
+    registry = PaletteRegistry()
+    assert {'vga', 'xterm', 'gnome', 'tango', 'konsole', 'solarized'} <= set(registry.profiles)
+    info = parse_color_code("01;31;48;5;208")
+    assert info.foreground == (128, 0, 0)
+    
+    try:
+        set_palette_profile(registry.get('tango'))
+        # The cached object shows the new colors; the cube does not change
+        assert parse_color_code("01;31;48;5;208") is info
+        assert info.foreground == (204, 0, 0)
+        assert info.background == (255, 135, 0)
+        assert color_256_to_rgb(9) == (239, 41, 41)
+        assert _rgb_to_basic_color(204, 0, 0) == 31
+        assert nearest_color_index(240, 40, 40, colors=16) == 9
+    finally:
+        set_palette_profile(DEFAULT_PROFILE)
+    assert get_palette_profile() is DEFAULT_PROFILE
+    assert info.foreground == (128, 0, 0)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        colors = ["#%02x%02x%02x" % (i * 16, i * 16, i * 16) for i in range(16)]
+        (Path(tmp) / 'gray.json').write_text(json.dumps({"title": "Grays", "colors": colors}))
+        (Path(tmp) / 'short.json').write_text(json.dumps({"colors": colors[:8]}))
+        (Path(tmp) / 'broken.json').write_text("{")
+        # Colors that are not [r, g, b] lists of integers
+        for name, bad in (('ints', 7), ('nulls', None), ('floats', [1.0, 2, 3]),
+                          ('flags', [True, 0, 0]), ('pairs', [1, 2])):
+            (Path(tmp) / f'{name}.json').write_text(json.dumps({"colors": colors[:15] + [bad]}))
+        assert registry.load_directory(Path(tmp)) == 1
+        assert registry.get('gray').title == "Grays"
+        assert registry.get('gray').palette_256[15] == (240, 240, 240)
+        assert len(registry.errors) == 7
+        assert any('nulls.json' in error and 'None' in error for error in registry.errors)
+        
+    print("Palette profiles test OK")
+
+def test_cvd_simulation():
+    """Test color vision deficiency simulation and confusable pairs."""
+    print("Testing CVD simulation...")
+    
+    import color_utils
+    from color_utils import simulate_cvd, confusable_pairs
+    from parser import DirColorsParser
+    
+    colors = [(255, 0, 0), (0, 255, 0), (128, 128, 128), (0, 0, 255)]
+    assert simulate_cvd(colors, 'protanopia') == [(109, 95, 0), (255, 229, 0), (128, 128, 128), (0, 89, 255)]
+    assert simulate_cvd([], 'tritanopia') == []
+    try:
+        simulate_cvd(colors, 'achromatopsia')
+        assert False, "unknown deficiency accepted"
+    except ValueError:
+        pass
+        
+    named = {'red': (180, 80, 40), 'green': (110, 130, 30), 'blue': (40, 80, 200), 'gray': (120, 120, 120)}
+    assert confusable_pairs(named, 'protanopia') == []
+    assert [pair[:2] for pair in confusable_pairs(named, 'deuteranopia')] == [('red', 'green')]
+    assert [pair[:2] for pair in confusable_pairs(named, 'tritanopia')] == [('green', 'gray')]
+    
+    # The batched and per-color paths agree
+    if color_utils.np is not None:
+        many = [(i, 255 - i, (i * 7) % 256) for i in range(256)]
+        batched = {kind: simulate_cvd(many, kind) for kind in color_utils.CVD_MATRICES}
+        numpy, color_utils.np = color_utils.np, None
+        try:
+            for kind, expected in batched.items():
+                assert simulate_cvd(many, kind) == expected
+            assert [pair[:2] for pair in confusable_pairs(named, 'deuteranopia')] == [('red', 'green')]
+        finally:
+            color_utils.np = numpy
+            
+    parser = DirColorsParser()
+    parser._parse_stream(["DIR 01;34", "LINK 01;36", "FILE 00", ".tar 01;31", ".zip 01;31", ".gz 32"])
+    assert parser.get_category_colors() == {'DIR': (0, 0, 128), 'LINK': (0, 128, 128), 'archives': (128, 0, 0)}
+    
+    print("CVD simulation test OK")
+
+def test_canonical_codes():
+    """Test canonical color codes and sharing of equivalent codes."""
+    print("Testing canonical color codes...")
+    
+    from color_utils import canonical_color_code, parse_sgr, format_sgr
+    from parser import DirColorsParser
+    
+    for code in ("01;34", "1;34", "34;01", "00;01;34", " 01;34 "):
+        assert canonical_color_code(code) == "1;34"
+    assert canonical_color_code("01;34") is canonical_color_code("34;1")
+    assert canonical_color_code("") == canonical_color_code("00") == "0"
+    assert canonical_color_code("01;31;00") == "0"
+    assert canonical_color_code("1;22;4") == "4"
+    assert canonical_color_code("38:2::10:20:30;4:2") == "21;38;2;10;20;30"
+    assert canonical_color_code("93;100;48;5;7;58:5:9") == "93;48;5;7;58;5;9"
+    assert canonical_color_code("target") == "target"
+    # Parameters parse_sgr does not model keep the code as written
+    for code in ("51;34", "4:3", "01;04:3;31", "38;5;300;32", "38;6;1", "38:2:1:2:3:4:5:6", "1;x"):
+        assert canonical_color_code(f" {code} ") == code
+    assert canonical_color_code("51;34") != canonical_color_code("34")
+    assert canonical_color_code("4:3") != canonical_color_code("4")
+    
+    # The canonical form means the same as the original
+    for code in ("05;07;38;5;196;40", "91;104;21", "53;38;2;1;2;3"):
+        assert parse_sgr(canonical_color_code(code)) == parse_sgr(code)
+        assert format_sgr(parse_sgr(code)) == canonical_color_code(code)
+        
+    parser = DirColorsParser()
+    parser._parse_stream([".a 01;34", ".b 01;34", ".c 34;1", "LINK target"])
+    a, b, c = (parser.get_entry(ext) for ext in ('.a', '.b', '.c'))
+    assert a.color_code is b.color_code
+    assert a.color_code != c.color_code and a.canonical_code is c.canonical_code
+    assert parser.get_entry('LINK').canonical_code == "target"
+    
+    print("Canonical color codes test OK")
+
+if __name__ == '__main__':
+    try:
+        test_parse_cache()
+        print()
+        test_palette_tables()
+        print()
+        test_nearest_color()
+        print()
+        test_sgr_parsing()
+        print()
+        test_palette_profiles()
+        print()
+        test_cvd_simulation()
+        print()
+        test_canonical_codes()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
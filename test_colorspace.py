@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def sample_colors():
+    """A grid over the RGB cube plus the colors just around its corners."""
+    levels = list(range(0, 256, 17)) + [1, 2, 127, 128, 253, 254]
+    return [(r, g, b) for r in levels for g in levels for b in levels]
+
+def test_reference_values():
+    """Test conversions against published values and colorsys."""
+    print("Testing color space reference values...")
+    
+    import colorsys
+    from colorspace import rgb_to_oklab, rgb_to_oklch, rgb_to_hsl, rgb_to_hsv, srgb_to_linear
+    
+    def close(a, b, tolerance=1e-6):
+        return all(abs(x - y) < tolerance for x, y in zip(a, b))
+        
+    assert srgb_to_linear(0) == 0.0 and srgb_to_linear(255) == 1.0
+    assert abs(srgb_to_linear(128) - 0.2158605) < 1e-6
+    # OKLab reference values from Ottosson's definition
+    assert close(rgb_to_oklab(255, 255, 255), (1.0, 0.0, 0.0), 1e-4)
+    assert close(rgb_to_oklab(0, 0, 0), (0.0, 0.0, 0.0))
+    assert close(rgb_to_oklab(255, 0, 0), (0.627955, 0.224863, 0.125846))
+    assert close(rgb_to_oklch(0, 0, 255), (0.452014, 0.313214, 264.052021))
+    assert rgb_to_oklch(128, 128, 128)[1] < 1e-6
+    
+    for rgb in sample_colors():
+        r, g, b = (c / 255.0 for c in rgb)
+        h, l, s = colorsys.rgb_to_hls(r, g, b)
+        assert close(rgb_to_hsl(*rgb), (h * 360.0, s, l), 1e-9), rgb
+        h, s, v = colorsys.rgb_to_hsv(r, g, b)
+        assert close(rgb_to_hsv(*rgb), (h * 360.0, s, v), 1e-9), rgb
+        
+    print("Color space reference values test OK")
+
+def test_round_trips():
+    """Test that every space converts back to the exact sRGB color."""
+    print("Testing color space round trips...")
+    
+    import colorspace
+    from colorspace import SPACES, convert, to_rgb8
+    
+    colors = sample_colors()
+    for space in SPACES:
+        for rgb in colors:
+            back = convert(convert(rgb, 'rgb', space), space, 'rgb')
+            assert all(abs(x - y) < 1e-9 for x, y in zip(back, rgb)), (space, rgb, back)
+            assert to_rgb8(*back) == rgb
+            
+    if colorspace.np is not None:
+        np = colorspace.np
+        from colorspace import convert_array, to_rgb8_array
+        
+        # A dense grid over the cube, including its faces
+        levels = np.append(np.arange(0, 256, 3), 254)
+        cube = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+        for space in SPACES:
+            converted = convert_array(cube, 'rgb', space)
+            back = convert_array(converted, space, 'rgb')
+            assert np.abs(back - cube).max() < 1e-9, space
+            assert (to_rgb8_array(back) == cube).all(), space
+            # The batch agrees with the scalar conversion
+            for position in range(0, len(cube), 4099):
+                expected = convert(tuple(cube[position].tolist()), 'rgb', space)
+                assert np.allclose(converted[position], expected, rtol=0, atol=1e-9), space
+                
+    print("Color space round trips test OK")
+
+def test_convert():
+    """Test converting between any two spaces and outside the gamut."""
+    print("Testing color space conversion...")
+    
+    import colorspace
+    from colorspace import (SPACES, convert, oklch_to_rgb, rgb_to_oklch, rgb_to_hsl, hsl_to_rgb,
+                            to_rgb8, linear_to_rgb)
+                            
+    rgb = (200, 120, 30)
+    for source in SPACES:
+        color = convert(rgb, 'rgb', source)
+        for target in SPACES:
+            expected = convert(rgb, 'rgb', target)
+            assert all(abs(x - y) < 1e-9 for x, y in zip(convert(color, source, target), expected))
+            
+    try:
+        convert(rgb, 'rgb', 'cmyk')
+        assert False, "an unknown space should be rejected"
+    except ValueError:
+        pass
+        
+    # A 10% lighter color keeps its hue
+    L, c, h = rgb_to_oklch(*rgb)
+    lighter = to_rgb8(*oklch_to_rgb(L * 1.1, c, h))
+    assert rgb_to_oklch(*lighter)[0] > L
+    assert abs(rgb_to_oklch(*lighter)[2] - h) < 2.0
+    h, s, l = rgb_to_hsl(*rgb)
+    assert to_rgb8(*hsl_to_rgb(h + 360.0, s, l)) == rgb
+    
+    # Colors outside the gamut convert without errors and clip when rounded
+    vivid = oklch_to_rgb(0.9, 0.4, 140.0)
+    assert min(vivid) < 0 or max(vivid) > 255
+    assert all(0 <= c <= 255 for c in to_rgb8(*vivid))
+    assert to_rgb8(*linear_to_rgb(-0.5, 0.5, 1.5)) == (0, 188, 255)
+    assert convert((-20, 300, 5), 'rgb', 'oklab')[0] > 0
+    if colorspace.np is not None:
+        from colorspace import convert_array
+        out = convert_array([(0.9, 0.4, 140.0), (0.5, 0.0, 0.0)], 'oklch', 'rgb')
+        assert colorspace.np.isfinite(out).all()
+        assert colorspace.np.allclose(out[1], convert((0.5, 0.0, 0.0), 'oklch', 'rgb'))
+        
+    print("Color space conversion test OK")
+
+if __name__ == '__main__':
+    try:
+        test_reference_values()
+        print()
+        test_round_trips()
+        print()
+        test_convert()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
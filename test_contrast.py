@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def test_contrast_measures():
+    """Test WCAG and APCA contrast against reference values."""
+    print("Testing contrast measures...")
+    
+    import contrast
+    from contrast import wcag_contrast, apca_contrast
+    
+    assert abs(wcag_contrast((0, 0, 0), (255, 255, 255)) - 21.0) < 1e-9
+    assert abs(wcag_contrast((119, 119, 119), (255, 255, 255)) - 4.48) < 0.01
+    assert wcag_contrast((10, 20, 30), (10, 20, 30)) == 1.0
+    # Reference values from the APCA-W3 0.0.98G-4g calculator
+    assert round(apca_contrast((0, 0, 0), (255, 255, 255)), 1) == 106.0
+    assert round(apca_contrast((255, 255, 255), (0, 0, 0)), 1) == -107.9
+    assert round(apca_contrast((136, 136, 136), (255, 255, 255)), 1) == 63.1
+    assert apca_contrast((30, 30, 30), (32, 32, 32)) == 0.0
+    
+    if contrast.np is not None:
+        texts = [(r, 255 - r, (r * 7) % 256) for r in range(0, 256, 5)]
+        backs = [((r * 3) % 256, r, 40) for r in range(0, 256, 5)]
+        ratios, lcs = contrast.contrast_arrays(texts, backs)
+        for text, back, ratio, lc in zip(texts, backs, ratios, lcs):
+            assert abs(ratio - wcag_contrast(text, back)) < 1e-9
+            assert abs(lc - apca_contrast(text, back)) < 1e-9
+            
+    print("Contrast measures test OK")
+
+def test_contrast_audit():
+    """Test auditing a theme and re-auditing after edits."""
+    print("Testing contrast audit...")
+    
+    from contrast import ContrastAuditor
+    from parser import DirColorsParser
+    
+    parser = DirColorsParser()
+    parser._parse_stream([
+        "TERM xterm",
+        "DIR 01;34",
+        "LINK target",
+        "FILE 00",
+        ".txt 38;2;240;240;240",
+        ".log 38;2;240;240;240",
+        ".bak 07;38;2;240;240;240",
+        ".tmp 38;2;40;40;40;48;2;250;250;250",
+        ".swp 08;34",
+    ])
+    
+    auditor = ContrastAuditor([(26, 26, 26)])
+    assert auditor.audit(parser.entries.values()) == {'DIR'}
+    assert set(auditor.results) == {'DIR', 'FILE', '.txt', '.log', '.bak', '.tmp', '.swp'}
+    assert auditor.results['FILE'] is None
+    assert auditor.results['.txt'].passed and auditor.results['.txt'].lc < -60
+    # Reverse video and own backgrounds are measured as shown
+    assert auditor.results['.bak'].passed and auditor.results['.bak'].lc > 60
+    assert auditor.results['.tmp'].passed
+    assert auditor.results['.swp'] is None
+    
+    # An edit measures only its new code
+    measured = len(auditor._cache)
+    auditor.update_entry('.txt', '38;2;50;50;50')
+    parser.set_entry('.txt', '38;2;50;50;50')
+    assert len(auditor._cache) == measured + 1
+    assert auditor.failing == {'DIR', '.txt'}
+    assert auditor.audit(parser.entries.values()) == {'DIR', '.txt'}
+    assert len(auditor._cache) == measured + 1
+    auditor.remove_entry('.txt')
+    assert auditor.failing == {'DIR'}
+    
+    # Every background must be readable
+    auditor.set_backgrounds([(26, 26, 26), (255, 255, 255)])
+    assert auditor.audit(parser.entries.values()) == {'DIR', '.txt', '.log', '.bak'}
+    
+    print("Contrast audit test OK")
+
+if __name__ == '__main__':
+    try:
+        test_contrast_measures()
+        print()
+        test_contrast_audit()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
@@ -51,6 +51,118 @@ def test_color_utils():
     
     print("Color utils test OK")
 
+def test_category_inference():
+    """Test that section comments assign extensions to categories."""
+    print("Testing category inference...")
+    
+    import tempfile
+    from parser import DirColorsParser
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        theme = Path(tmp) / 'theme.dircolors'
+        theme.write_text(
+            "TERM xterm*\n"
+            "DIR 01;34\n"
+            "# Code files\n"
+            ".cs 01;33 # C sharp\n"
+            ".zip 01;31\n"
+            "# Misc files\n"
+            ".foo 00;32\n"
+        )
+        parser = DirColorsParser()
+        parser.parse_file(theme)
+        
+    categories = parser.get_categories()
+    assert parser.terminal_types == ['xterm*']
+    assert parser.get_entry('.cs').comment == 'C sharp'
+    assert '.cs' in categories['code_extensions']
+    assert '.zip' in categories['code_extensions']
+    assert '.foo' in categories['other_extensions']
+    print(f"Code extensions: {categories['code_extensions']}")
+    
+    print("Category inference test OK")
+
+def test_stock_database_categories():
+    """Test that the stock dircolors database keeps the default categories."""
+    print("Testing stock database categories...")
+    
+    import shutil
+    import subprocess
+    from parser import DirColorsParser
+    
+    # Excerpt of `dircolors -p`, whose comments mention files but are not
+    # category sections
+    excerpt = [
+        "MISSING 00 # ... and the files they point to",
+        "# This is for files with execute permission:",
+        "EXEC 01;32",
+        "# List any file extensions like '.gz' or '.tar' that you would like ls",
+        " # archives or compressed (bright red)",
+        ".tar 01;31",
+        ".arj 01;31",
+        "# image formats",
+        ".jpg 01;35",
+        "# audio formats",
+        ".flac 00;36",
+        "# backup files",
+        ".bak 00;90",
+    ]
+    parser = DirColorsParser()
+    parser._parse_stream(excerpt)
+    categories = parser.get_categories()
+    assert categories['archives_extensions'] == ['.tar']
+    assert categories['images_extensions'] == ['.jpg']
+    assert categories['audio_extensions'] == ['.flac']
+    assert categories['other_extensions'] == ['.arj', '.bak']
+    
+    # An explicit "Other files" section still marks extensions uncategorized
+    parser = DirColorsParser()
+    parser._parse_stream(["# Other files", ".zip 01;31"])
+    assert parser.get_categories()['other_extensions'] == ['.zip']
+    
+    # The full database categorizes every default extension it defines
+    binary = shutil.which('dircolors')
+    if binary is not None:
+        text = subprocess.run([binary, '--print-database'], capture_output=True,
+                              text=True, check=True).stdout
+        parser = DirColorsParser()
+        parser._parse_stream(text.split('\n'))
+        categories = parser.get_categories()
+        extensions = [ft for ft in parser.entries if ft.startswith('.')]
+        for category, defaults in DirColorsParser.EXTENSION_CATEGORIES.items():
+            expected = [ext for ext in defaults if ext in parser.entries]
+            assert sorted(categories.get(f"{category}_extensions", [])) == sorted(expected), category
+        categorized = sum(len(exts) for name, exts in categories.items()
+                          if name.endswith('_extensions') and name != 'other_extensions')
+        assert categorized > 0
+        assert len(categories['other_extensions']) == len(extensions) - categorized
+        print(f"Stock database: {categorized} categorized, "
+              f"{len(categories['other_extensions'])} other extensions")
+        
+    print("Stock database categories test OK")
+
+def test_category_index():
+    """Test per-parser category state and moving extensions."""
+    print("Testing category index...")
+    
+    from parser import DirColorsParser
+    
+    first = DirColorsParser()
+    second = DirColorsParser()
+    first.set_entry(".zip", "01;31")
+    second.set_entry(".zip", "01;31")
+    
+    assert first.move_extension_to_category(".zip", "documents")
+    assert first.extension_categories.category_of(".zip") == "documents"
+    assert second.extension_categories.category_of(".zip") == "archives"
+    assert ".zip" in DirColorsParser.EXTENSION_CATEGORIES['archives']
+    
+    assert first.move_extension_to_category(".zip", "other")
+    assert first.get_categories()['other_extensions'] == ['.zip']
+    assert not first.move_extension_to_category(".zip", "no-such-category")
+    
+    print("Category index test OK")
+
 def test_file_operations():
     """Test file operations."""
     print("Testing file operations...")
@@ -75,13 +187,54 @@ def test_file_operations():
     
     print("File operations test OK")
 
+def test_parse_progress():
+    """Test progress reporting and cancelling a parse from the callback."""
+    print("Testing parse progress...")
+    
+    import tempfile
+    from parser import DirColorsParser
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'big.dircolors'
+        path.write_text(''.join(f".ext{i} 01;{31 + i % 7}\n" for i in range(5000)))
+        size = path.stat().st_size
+        
+        reports = []
+        parser = DirColorsParser()
+        parser.parse_file(path, progress=lambda done, total: reports.append((done, total)))
+        assert len(parser.entries) == 5000
+        assert reports[-1] == (size, size)
+        assert [done for done, _ in reports] == sorted(done for done, _ in reports)
+        
+        class Stop(Exception):
+            pass
+            
+        def cancel(done, total):
+            raise Stop()
+            
+        try:
+            DirColorsParser().parse_file(path, progress=cancel)
+            assert False, "parse was not cancelled"
+        except Stop:
+            pass
+            
+    print("Parse progress test OK")
+
 if __name__ == '__main__':
     try:
         test_parser()
         print()
         test_color_utils()
         print()
+        test_category_inference()
+        print()
+        test_stock_database_categories()
+        print()
+        test_category_index()
+        print()
         test_file_operations()
+        print()
+        test_parse_progress()
         print("\nAll tests passed!")
         
     except Exception as e:
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def test_parse_diagnostics():
+    """Test that bad lines are reported with their position."""
+    print("Testing parse diagnostics...")
+    
+    from parser import DirColorsParser
+    from diagnostics import Severity
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'theme.dircolors'
+        path.write_text(
+            "COLOR tty\n"
+            "DIR 01;34 # directories\n"
+            "*# 00;90\n"
+            "  FOO 01;31\n"
+            ".x 01;999\n"
+            ".y\n"
+        )
+        parser = DirColorsParser()
+        parser.parse_file(path)
+        
+        assert parser.get_entry("*#").color_code == "00;90"
+        assert parser.get_entry("DIR").comment == "directories"
+        assert [(d.line, d.column, d.severity) for d in parser.diagnostics] == [
+            (4, 3, Severity.WARNING),
+            (5, 4, Severity.WARNING),
+            (6, 3, Severity.WARNING),
+        ]
+        assert parser.diagnostics.describe() == "3 warnings"
+        
+        # A clean file leaves nothing behind
+        path.write_text("DIR 01;34\nLINK target\n.py 38;5;208\n")
+        parser.parse_file(path)
+        assert not parser.diagnostics
+        
+    print("Parse diagnostics test OK")
+
+def test_diagnostics_are_bounded():
+    """Test that repeated problems are capped, counted and cached."""
+    print("Testing bounded diagnostics...")
+    
+    from parser import DirColorsParser
+    from parse_cache import ParseCache
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'hostile.dircolors'
+        path.write_text("BOGUS 01;31\n.bad xyz\n" * 50000)
+        cache = ParseCache(Path(tmp) / 'cache')
+        
+        parser = DirColorsParser()
+        parser.parse_file(path, cache=cache)
+        diagnostics = parser.diagnostics
+        assert len(diagnostics) == 100000
+        assert len(diagnostics.diagnostics) == 2 * diagnostics.per_kind
+        assert diagnostics.suppressed == 100000 - 2 * diagnostics.per_kind
+        assert diagnostics.summary()[0].endswith("50000 occurrences, first on line 1")
+        
+        cached = DirColorsParser()
+        cached.parse_file(path, cache=cache)
+        assert cache.hits == 1
+        assert cached.diagnostics.diagnostics == diagnostics.diagnostics
+        assert cached.diagnostics.summary() == diagnostics.summary()
+        
+    print("Bounded diagnostics test OK")
+
+if __name__ == '__main__':
+    try:
+        test_parse_diagnostics()
+        print()
+        test_diagnostics_are_bounded()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def check_generated(generated, categories, background):
+    """Check readability and that shades stay nearest their own category."""
+    from contrast import ContrastAuditor
+    from colorspace import rgb_to_oklab
+    
+    def distance(a, b):
+        a, b = rgb_to_oklab(*a), rgb_to_oklab(*b)
+        return sum((x - y) ** 2 for x, y in zip(a, b)) ** 0.5
+        
+    assert set(generated.categories) == set(categories)
+    assert len(set(generated.categories.values())) == len(categories)
+    auditor = ContrastAuditor([background])
+    assert all(result.passed for result in auditor.measure(generated.codes().values()).values())
+    for name, extensions in categories.items():
+        base = generated.categories[name]
+        for extension in extensions:
+            own = distance(generated.extensions[extension], base)
+            assert all(own < distance(generated.extensions[extension], other)
+                       for other_name, other in generated.categories.items() if other_name != name)
+            
+def test_generate_distinct_colors():
+    """Test choosing category colors and extension shades."""
+    print("Testing distinct color generation...")
+    
+    import distinct
+    from distinct import generate_distinct_colors
+    
+    categories = {f"c{i}": [f".e{i}_{j}" for j in range(12)] for i in range(10)}
+    for background in ((26, 26, 26), (250, 250, 250)):
+        generated = generate_distinct_colors(categories, [background])
+        check_generated(generated, categories, background)
+        assert generated.min_distance > 0.1
+        
+    generated = generate_distinct_colors(categories, [(26, 26, 26)], palette_256=True)
+    check_generated(generated, categories, (26, 26, 26))
+    assert all(code.startswith("38;5;") and int(code[5:]) >= 16 for code in generated.codes().values())
+    
+    if distinct.np is not None:
+        numpy, distinct.np = distinct.np, None
+        try:
+            generated = generate_distinct_colors(categories, [(26, 26, 26)])
+            check_generated(generated, categories, (26, 26, 26))
+        finally:
+            distinct.np = numpy
+            
+    try:
+        generate_distinct_colors(categories, [(26, 26, 26)], min_ratio=30)
+        assert False, "impossible contrast accepted"
+    except ValueError:
+        pass
+        
+    print("Distinct color generation test OK")
+
+def test_assign_distinct_colors():
+    """Test recoloring a parser's extensions."""
+    print("Testing distinct color assignment...")
+    
+    from distinct import assign_distinct_colors
+    from parser import DirColorsParser
+    
+    parser = DirColorsParser()
+    parser._parse_stream(["DIR 01;34", ".tar 01;31 # tarballs", ".zip 04;31;48;5;236", ".jpg 35",
+                          ".py 01;33"])
+    generated = assign_distinct_colors(parser, [(26, 26, 26)], palette_256=True)
+    
+    assert set(generated.categories) == {'archives', 'images', 'code'}
+    assert parser.get_entry('DIR').color_code == '01;34'
+    assert parser.get_entry('.tar').comment == 'tarballs'
+    assert parser.get_entry('.tar').color_code != parser.get_entry('.jpg').color_code
+    # Styles and backgrounds are kept; only the foreground is replaced
+    fresh = generated.codes()
+    assert parser.get_entry('.tar').color_code == "01;" + fresh['.tar']
+    assert parser.get_entry('.zip').color_code == f"04;{fresh['.zip']};48;5;236"
+    assert parser.get_entry('.jpg').color_code == fresh['.jpg']
+    
+    # Parameters the editor does not model stay as written
+    code = "38;2;10;20;30"
+    replace = {'.a': ("01;04:3;51;31;48;5;17", "01;04:3;51;38;2;10;20;30;48;5;17"),
+               '.b': ("01;48;5;31", "01;48;5;31;38;2;10;20;30"),
+               '.c': ("38:5:9;4", "38;2;10;20;30;4"),
+               '.d': ("31;00;01", "31;00;01;38;2;10;20;30"),
+               '.e': ("", code)}
+    generated = generated._replace(extensions={ext: (10, 20, 30) for ext in replace},
+                                   palette_256=False)
+    codes = generated.codes({ext: existing for ext, (existing, _) in replace.items()})
+    assert codes == {ext: expected for ext, (_, expected) in replace.items()}
+    
+    print("Distinct color assignment test OK")
+
+if __name__ == '__main__':
+    try:
+        test_generate_distinct_colors()
+        print()
+        test_assign_distinct_colors()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
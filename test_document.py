@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+SAMPLE = (
+    "# My theme\n"
+    "TERM xterm*\n"
+    "\n"
+    "DIR   01;34   # directories\n"
+    "LINK 01;36\n"
+    "# Code files\n"
+    ".py 01;33\n"
+    ".js 01;33\n"
+    "# Archive files\n"
+    ".zip 01;31"
+)
+
+def load(tmp: str):
+    """Write the sample theme and parse it."""
+    from parser import DirColorsParser
+    
+    path = Path(tmp) / 'theme.dircolors'
+    path.write_text(SAMPLE)
+    parser = DirColorsParser()
+    parser.parse_file(path)
+    return parser, path
+
+def test_round_trip():
+    """Test that saving an unedited file keeps it byte for byte."""
+    print("Testing lossless round trip...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        parser, path = load(tmp)
+        parser.write_file(path)
+        assert path.read_text() == SAMPLE
+        
+        copy = Path(tmp) / 'copy.dircolors'
+        parser.write_file(copy)
+        assert copy.read_text() == SAMPLE
+        
+    print("Round trip test OK")
+
+def test_edit_patches_single_line():
+    """Test that editing an entry only changes its color code."""
+    print("Testing single entry patch...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        parser, path = load(tmp)
+        parser.set_entry("DIR", "01;35", "directories")
+        
+        dirty = [line.render() for line in parser.document.lines if line.dirty]
+        assert dirty == ["DIR   01;35   # directories\n"]
+        
+        parser.write_file(path)
+        assert path.read_text() == SAMPLE.replace("01;34", "01;35")
+        assert not parser.document.dirty
+        
+    print("Single entry patch test OK")
+
+def test_insert_remove_and_move():
+    """Test structural edits and that they survive a reload."""
+    print("Testing insert, remove and move...")
+    
+    from parser import DirColorsParser
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        parser, path = load(tmp)
+        parser.set_entry(".ts", "01;33")
+        parser.remove_entry("LINK")
+        assert parser.move_extension_to_category(".zip", "code")
+        parser.write_file(path)
+        
+        text = path.read_text()
+        assert "LINK" not in text
+        assert text.startswith("# My theme\nTERM xterm*\n\nDIR   01;34")
+        
+        reloaded = DirColorsParser()
+        reloaded.parse_file(path)
+        assert reloaded.get_entry(".ts").color_code == "01;33"
+        assert reloaded.extension_categories.category_of(".zip") == "code"
+        assert reloaded.extension_categories.category_of(".ts") is None
+        
+    print("Insert, remove and move test OK")
+
+def test_comment_rule_and_line_endings():
+    """Test keys containing '#' and moving lines with CRLF endings."""
+    print("Testing comment rule and line endings...")
+    
+    from parser import DirColorsParser
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'theme.dircolors'
+        path.write_bytes(b"DIR 01;34\r\n*# 00;90 # backups\r\n# Code files\r\n.py 01;33\r\n")
+        parser = DirColorsParser()
+        parser.parse_file(path)
+        assert parser.get_entry("*#").color_code == "00;90"
+        
+        parser.set_entry("*#", "00;37", "backups")
+        parser.document.move_entry("DIR", after=".py")
+        parser.write_file(path)
+        
+        data = path.read_bytes()
+        assert b"*# 00;37 # backups\r\n" in data
+        assert data.endswith(b".py 01;33\r\nDIR 01;34\r\n"), data
+        assert b"\n" not in data.replace(b"\r\n", b"")
+        
+    print("Comment rule and line endings test OK")
+
+if __name__ == '__main__':
+    try:
+        test_round_trip()
+        print()
+        test_edit_patches_single_line()
+        print()
+        test_insert_remove_and_move()
+        print()
+        test_comment_rule_and_line_endings()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
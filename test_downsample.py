@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def test_downsample_codes():
+    """Test converting codes for 256, 16 and 8 color terminals."""
+    print("Testing code downsampling...")
+    
+    from downsample import downsample_codes
+    
+    codes = ["01;38;2;250;100;10", "38;5;208;48;5;9", "01;94;104", "target", "00", ""]
+    assert downsample_codes(codes, 256) == [
+        "01;38;5;202", "38;5;208;48;5;9", "01;94;104", "target", "00", "",
+    ]
+    assert downsample_codes(codes, 16) == ["01;91", "91;101", "01;94;104", "target", "00", ""]
+    assert downsample_codes(codes, 8) == ["01;33", "37;41", "01;34;44", "target", "00", ""]
+    # A 256-color index that looks like a parameter is not converted again
+    assert downsample_codes(["38;5;38;2;1;2;3"], 256) == ["38;5;38;2;1;2;3"]
+    
+    # ':' sub-parameter forms, with and without a color space id
+    colon = ["01;38:2::250:100:10", "38:2:250:100:10", "38:5:208;48:5:9", "48:2:0:1:2:3"]
+    assert downsample_codes(colon, 256) == [
+        "01;38;5;202", "38;5;202", "38:5:208;48:5:9", "48;5;232",
+    ]
+    assert downsample_codes(colon, 16) == ["01;91", "91", "91;101", "40"]
+    assert downsample_codes(colon, 8) == ["01;33", "33", "37;41", "40"]
+    # Sub-parameters of other parameters are kept
+    assert downsample_codes(["4:3;38:2:1:2"], 8) == ["4:3;38:2:1:2"]
+    
+    # Underline colors are converted too, always in the indexed form
+    underline = ["4:3;58;2;250;100;10", "58:5:208", "58;5;12"]
+    assert downsample_codes(underline, 256) == ["4:3;58;5;202", "58:5:208", "58;5;12"]
+    assert downsample_codes(underline, 16) == ["4:3;58;5;9", "58;5;9", "58;5;12"]
+    assert downsample_codes(underline, 8) == ["4:3;58;5;3", "58;5;7", "58;5;4"]
+    
+    try:
+        downsample_codes(codes, 88)
+        assert False, "unsupported palette accepted"
+    except ValueError:
+        pass
+        
+    print("Code downsampling test OK")
+
+def test_downsample_file():
+    """Test writing a converted copy of a theme."""
+    print("Testing theme downsampling...")
+    
+    from downsample import downsample_file
+    from color_utils import get_quantizer
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'truecolor.dircolors'
+        target = Path(tmp) / '256.dircolors'
+        source.write_text(
+            "# Archive files\n"
+            ".tar   38;2;250;100;10   # tarballs\n"
+            "DIR 01;34\n"
+            "OPTIONS -F\n"
+        )
+        downsample_file(source, target, 256)
+        assert target.read_text() == (
+            "# Archive files\n"
+            ".tar   38;5;202   # tarballs\n"
+            "DIR 01;34\n"
+            "OPTIONS -F\n"
+        )
+        assert "38;2;" in source.read_text()
+        
+    # Batch lookups agree with single ones
+    quantizer = get_quantizer(16)
+    colors = [(i * 37 % 256, i * 91 % 256, i * 53 % 256) for i in range(500)]
+    assert quantizer.nearest_many(colors) == [quantizer.nearest(*c) for c in colors]
+    
+    print("Theme downsampling test OK")
+
+if __name__ == '__main__':
+    try:
+        test_downsample_codes()
+        print()
+        test_downsample_file()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
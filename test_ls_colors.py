@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def make_parser(lines):
+    """Build a parser from .dircolors lines."""
+    from parser import DirColorsParser
+    
+    parser = DirColorsParser()
+    parser._parse_stream(lines)
+    return parser
+
+def test_export_matches_dircolors():
+    """Test that exported LS_COLORS matches dircolors -b and -c."""
+    print("Testing LS_COLORS export...")
+    
+    parser = make_parser([
+        "TERM xterm*",
+        "DIR 01;34",
+        ".a:b 01;31",
+        "*x=y 32",
+        "LINK target",
+        "OPTIONS -F",
+        "COLOR tty",
+        "*q't 33",
+        ".bs\\\\: 35",
+    ])
+    
+    value = "di=01;34:*.a\\:b=01;31:*x\\=y=32:ln=target:*q't=33:*.bs\\\\\\:=35:"
+    assert parser.to_ls_colors() == value
+    # Expected snippets were produced by dircolors 9.1
+    assert parser.shell_snippet('bash') == (
+        "LS_COLORS='di=01;34:*.a\\:b=01;31:*x\\=y=32:ln=target:*q'\\''t=33:*.bs\\\\\\:=35:';\n"
+        "export LS_COLORS\n"
+    )
+    assert parser.shell_snippet('csh') == (
+        "setenv LS_COLORS 'di=01;34:*.a\\:b=01;31:*x\\=y=32:ln=target:*q'\\''t=33:*.bs\\\\\\:=35:'\n"
+    )
+    assert parser.shell_snippet('fish') == (
+        "set -gx LS_COLORS 'di=01;34:*.a\\\\:b=01;31:*x\\\\=y=32:ln=target:*q\\'t=33:*.bs\\\\\\\\\\\\:=35:'\n"
+    )
+    
+    try:
+        parser.shell_snippet('cmd')
+        assert False, "unknown shell accepted"
+    except ValueError:
+        pass
+        
+    print("LS_COLORS export test OK")
+
+def test_incremental_export():
+    """Test that edits patch the cached value correctly."""
+    print("Testing incremental LS_COLORS export...")
+    
+    from ls_colors import LsColorsSerializer
+    
+    parser = make_parser(["DIR 01;34", ".gz 01;31", ".py 01;33", "EXEC 01;32"])
+    assert parser.to_ls_colors() == "di=01;34:*.gz=01;31:*.py=01;33:ex=01;32:"
+    
+    parser.set_entry(".gz", "01;35")
+    parser.remove_entry(".py")
+    parser.set_entry("*README", "04")
+    value = parser.to_ls_colors()
+    assert value == "di=01;34:*.gz=01;35:ex=01;32:*README=04:"
+    assert value == LsColorsSerializer(parser.entries.values()).value
+    
+    # Unchanged edits keep the cached string
+    parser.set_entry("DIR", "01;34")
+    assert parser.to_ls_colors() is value
+    
+    # Padded codes are patched in as the entry stores them
+    parser.set_entry(".tar", " 01;35 ")
+    value = parser.to_ls_colors()
+    assert "*.tar=01;35:" in value
+    assert value == LsColorsSerializer(parser.entries.values()).value
+    
+    print("Incremental LS_COLORS export test OK")
+
+def test_import_ls_colors():
+    """Test importing LS_COLORS values into entries."""
+    print("Testing LS_COLORS import...")
+    
+    from parser import DirColorsParser
+    
+    value = "rs=0:di=01;34:*.a\\:b=01;31:*x\\=y=32:ln=target:*q't=33:*~=00;90:mh=00::bogus:zz=1"
+    parser = DirColorsParser()
+    parser.load_ls_colors(value)
+    
+    assert list(parser.entries) == ['RESET', 'DIR', '.a:b', '*x=y', 'LINK', "*q't", '*~', 'MULTIHARDLINK']
+    assert parser.get_entry('.a:b').color_code == '01;31'
+    assert [(d.column, d.message) for d in parser.diagnostics] == [
+        (71, "No '=' in LS_COLORS item: bogus"),
+        (77, "Unknown LS_COLORS indicator: zz"),
+    ]
+    # Exporting again gives back the understood items
+    assert parser.to_ls_colors() == value[:value.index('::') + 1]
+    assert parser.document is None
+    
+    print("LS_COLORS import test OK")
+
+def test_import_shell_snippets():
+    """Test finding LS_COLORS in shell code."""
+    print("Testing shell snippet import...")
+    
+    from parser import DirColorsParser
+    from ls_colors import extract_ls_colors
+    
+    parser = make_parser(["DIR 01;34", "*q't 33", ".a:b 01;31", ".bs\\\\: 35"])
+    value = parser.to_ls_colors()
+    for shell in ('sh', 'csh', 'fish'):
+        imported = DirColorsParser()
+        imported.load_shell_ls_colors("# generated\n" + parser.shell_snippet(shell))
+        assert imported.to_ls_colors() == value, shell
+        
+    assert extract_ls_colors('export LS_COLORS="di=1:ex=\\"x"  # rc') == 'di=1:ex="x'
+    assert extract_ls_colors("LS_COLORS=di=01\\;34 ls") == 'di=01;34'
+    assert extract_ls_colors("LS_COLORS='di=1'\nexport LS_COLORS='di=2'") == 'di=2'
+    assert extract_ls_colors('eval "$(dircolors -b)"') is None
+    
+    try:
+        DirColorsParser().load_shell_ls_colors("echo hi")
+        assert False, "missing assignment accepted"
+    except ValueError:
+        pass
+        
+    print("Shell snippet import test OK")
+
+if __name__ == '__main__':
+    try:
+        test_export_matches_dircolors()
+        print()
+        test_incremental_export()
+        print()
+        test_import_ls_colors()
+        print()
+        test_import_shell_snippets()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def test_cache_hit_matches_parse():
+    """Test that a cached load gives the same result as a fresh parse."""
+    print("Testing parse cache...")
+    
+    from parser import DirColorsParser
+    from parse_cache import ParseCache
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        theme = Path(tmp) / 'theme.dircolors'
+        theme.write_text(
+            "TERM xterm*\n"
+            "DIR 01;34 # dirs\n"
+            "# Code files\n"
+            ".zip 01;31\n"
+            "# Misc files\n"
+            ".py 01;33\n"
+        )
+        cache = ParseCache(Path(tmp) / 'cache')
+        
+        fresh = DirColorsParser()
+        fresh.parse_file(theme, cache=cache)
+        cached = DirColorsParser()
+        cached.parse_file(theme, cache=cache)
+        assert (cache.misses, cache.hits) == (1, 1)
+        
+        assert cached.entries == fresh.entries
+        assert cached.terminal_types == fresh.terminal_types
+        assert cached.get_categories() == fresh.get_categories()
+        
+        # Edits and saves still work on the cached document
+        cached.set_entry("DIR", "01;35", "dirs")
+        cached.write_file(theme)
+        assert theme.read_text().splitlines()[1] == "DIR 01;35 # dirs"
+        
+        # The changed file is parsed again
+        reloaded = DirColorsParser()
+        reloaded.parse_file(theme, cache=cache)
+        assert cache.misses == 2
+        assert reloaded.get_entry("DIR").color_code == "01;35"
+        
+        # A document built after the file changed binds the lines it holds now
+        late = DirColorsParser()
+        late.parse_file(theme, cache=cache)
+        assert cache.hits == 2
+        theme.write_text("# moved\n" + theme.read_text())
+        late.set_entry(".zip", "01;32")
+        late.write_file(theme)
+        lines = theme.read_text().splitlines()
+        assert lines[0] == "# moved"
+        assert lines[4] == ".zip 01;32"
+        
+    print("Parse cache test OK")
+
+def test_cache_eviction_and_disable():
+    """Test the size bound and turning the cache off."""
+    print("Testing parse cache eviction...")
+    
+    from parser import DirColorsParser
+    from parse_cache import ParseCache
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(Path(tmp) / 'cache', max_bytes=1)
+        for i in range(3):
+            theme = Path(tmp) / f'theme{i}.dircolors'
+            theme.write_text(f"DIR 01;3{i}\n")
+            DirColorsParser().parse_file(theme, cache=cache)
+        assert len(list(cache.cache_dir.glob('*.marshal'))) == 0
+        
+        disabled = ParseCache(Path(tmp) / 'off', enabled=False)
+        DirColorsParser().parse_file(theme, cache=disabled)
+        assert not disabled.cache_dir.exists()
+        
+    print("Parse cache eviction test OK")
+
+def test_default_database_cache():
+    """Test that the dircolors default database is only read once."""
+    print("Testing default database cache...")
+    
+    import subprocess
+    import parser
+    from parse_cache import ParseCache
+    
+    if parser._dircolors_binary() is None:
+        print("dircolors not installed, skipping")
+        return
+        
+    calls = []
+    real_run = subprocess.run
+    
+    def counting_run(*args, **kwargs):
+        calls.append(args[0])
+        return real_run(*args, **kwargs)
+        
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(Path(tmp) / 'cache')
+        parser._default_database_cache.clear()
+        subprocess.run = counting_run
+        try:
+            first = parser.load_default_dircolors(cache=cache)
+            assert len(calls) == 2  # --print-database and --version
+            
+            # Same session: served from memory
+            second = parser.load_default_dircolors(cache=cache)
+            # New session: served from disk
+            parser._default_database_cache.clear()
+            third = parser.load_default_dircolors(cache=cache)
+            assert len(calls) == 2
+        finally:
+            subprocess.run = real_run
+            
+        assert first.entries == second.entries == third.entries
+        assert first.terminal_types == third.terminal_types
+        
+        # Categories survive the read and the disk cache
+        expected = {}
+        for category, defaults in parser.DirColorsParser.EXTENSION_CATEGORIES.items():
+            expected[f"{category}_extensions"] = sorted(ext for ext in defaults if ext in first.entries)
+        for loaded in (first, third):
+            categories = loaded.get_categories()
+            for name, extensions in expected.items():
+                assert sorted(categories.get(name, [])) == extensions, name
+        for name in ('archives', 'images', 'audio', 'video'):
+            assert expected[f"{name}_extensions"], name
+        second.set_entry("DIR", "01;35")
+        assert third.get_entry("DIR").color_code != "01;35"
+        
+    print("Default database cache test OK")
+
+if __name__ == '__main__':
+    try:
+        test_cache_hit_matches_parse()
+        print()
+        test_cache_eviction_and_disable()
+        print()
+        test_default_database_cache()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def test_bundled_presets():
+    """Test that the bundled presets are indexed."""
+    print("Testing bundled presets...")
+    
+    from presets import PresetLibrary, BUNDLED_PRESET_DIR
+    
+    library = PresetLibrary([BUNDLED_PRESET_DIR])
+    assert library.scan() == 3
+    assert [info.title for info in library] == ["Dark Theme", "Default", "High Contrast"]
+    info = library.get('high_contrast')
+    assert info.mode == "8-bit" and info.entries == 5
+    assert library.load('high_contrast').get_entry('DIR').color_code == '01;93;40'
+    
+    print("Bundled presets test OK")
+
+def test_preset_manifest():
+    """Test that rescans only index new or changed presets."""
+    print("Testing preset manifest...")
+    
+    import os
+    import tempfile
+    from parse_cache import ParseCache
+    from presets import PresetLibrary
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        system, user, cache_dir = tmp / 'system', tmp / 'user', tmp / 'cache'
+        system.mkdir()
+        user.mkdir()
+        (system / 'ocean.dircolors').write_text(
+            "# Title: Ocean\n# Description: Blues and greens\nDIR 01;34\n.py 38;5;37\n")
+        (system / 'sunset.dircolors').write_text("DIR 01;33\n.jpg 38;2;250;120;60\n.png 35\n")
+        (system / 'notes.txt').write_text("not a preset")
+        (user / 'ocean.dircolors').write_text("# Title: My Ocean\nDIR 01;36\n")
+        
+        library = PresetLibrary([system, user, tmp / 'missing'], ParseCache(cache_dir))
+        assert library.scan() == 2
+        assert library.indexed == 3
+        assert library.get('ocean').title == "My Ocean"
+        sunset = library.get('sunset')
+        assert (sunset.title, sunset.mode, sunset.entries) == ("sunset", "RGB", 3)
+        
+        # A fresh library reads the manifest instead of the presets
+        library = PresetLibrary([system, user], ParseCache(cache_dir))
+        assert library.scan() == 2
+        assert library.indexed == 0
+        assert library.get('sunset') == sunset
+        
+        (system / 'sunset.dircolors').write_text("# Title: Dusk\nDIR 01;33\n")
+        os.utime(system / 'sunset.dircolors', ns=(0, 1))
+        library.scan()
+        assert library.indexed == 1
+        assert library.get('sunset').title == "Dusk"
+        assert library.load('sunset').get_entry('DIR').color_code == '01;33'
+        
+        try:
+            library.load('missing')
+            assert False, "unknown preset loaded"
+        except ValueError:
+            pass
+            
+        # Without a cache, rescans index only what changed since the last one
+        for stamp, cache in enumerate((None, ParseCache(cache_dir, enabled=False)), 2):
+            library = PresetLibrary([system, user], cache)
+            library.scan()
+            assert library.indexed == 3
+            library.scan()
+            assert library.indexed == 0
+            assert library.get('sunset').title == "Dusk"
+            os.utime(user / 'ocean.dircolors', ns=(0, stamp))
+            library.scan()
+            assert library.indexed == 1
+            
+    print("Preset manifest test OK")
+
+if __name__ == '__main__':
+    try:
+        test_bundled_presets()
+        print()
+        test_preset_manifest()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
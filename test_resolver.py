@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def make_parser(lines):
+    """Build a parser from .dircolors lines."""
+    from parser import DirColorsParser
+    
+    parser = DirColorsParser()
+    parser._parse_stream(lines)
+    return parser
+
+def test_suffix_matching():
+    """Test GNU ls suffix rules: last definition wins, case folding."""
+    print("Testing suffix matching...")
+    
+    resolver = make_parser([
+        ".gz 01;31",
+        "*.tar.gz 01;33",
+        "*~ 00;90",
+        "*README 04",
+        ".JPG 01;35",
+        ".jpg 01;36",
+        ".Md 01;32",
+        ".md 01;32",
+        "*.bz2 00;31",
+        ".bz2 00;32",
+    ]).get_resolver()
+    
+    assert resolver.resolve("a.tar.gz") == "01;33"
+    assert resolver.resolve("a.GZ") == "01;31"
+    assert resolver.resolve("notes~") == "00;90"
+    assert resolver.resolve("readme") == "04"
+    # Case variants with different colors only match exactly
+    assert resolver.resolve("x.JPG") == "01;35"
+    assert resolver.resolve("x.jpg") == "01;36"
+    assert resolver.resolve("x.Jpg") is None
+    # Case variants with the same color still match any case
+    assert resolver.resolve("x.MD") == "01;32"
+    # .ext and *.ext are the same pattern; the later one wins
+    assert resolver.resolve("x.bz2") == "00;32"
+    assert resolver.resolve("plain") is None
+    
+    # Only regular files use suffixes; unset types use ls's defaults
+    assert resolver.resolve("src.gz", "di") == "01;34"
+    assert resolver.resolve("fifo.gz", "pi") == "33"
+    assert resolver.resolve("gone.gz", "or") == "01;36"
+    
+    print("Suffix matching test OK")
+
+def test_file_type_classification():
+    """Test classifying real files from lstat."""
+    print("Testing file type classification...")
+    
+    resolver = make_parser([
+        "DIR 01;34", "LINK 01;36", "ORPHAN 40;31;01", "EXEC 01;32",
+        "SETUID 37;41", "OTHER_WRITABLE 34;42", "STICKY_OTHER_WRITABLE 30;42",
+        "MULTIHARDLINK 00;44", "MISSING 05", ".gz 01;31",
+    ]).get_resolver()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / 'dir').mkdir()
+        (root / 'ow').mkdir()
+        os.chmod(root / 'ow', 0o777)
+        (root / 'tw').mkdir()
+        os.chmod(root / 'tw', 0o1777)
+        (root / 'a.gz').write_text("")
+        (root / 'run.gz').write_text("")
+        os.chmod(root / 'run.gz', 0o755)
+        (root / 'su').write_text("")
+        os.chmod(root / 'su', 0o4755)
+        (root / 'hard').write_text("")
+        os.link(root / 'hard', root / 'hard2')
+        (root / 'link').symlink_to('a.gz')
+        (root / 'orphan').symlink_to('nowhere')
+        os.mkfifo(root / 'fifo')
+        
+        expected = {
+            'dir': '01;34', 'ow': '34;42', 'tw': '30;42', 'a.gz': '01;31',
+            'run.gz': '01;32', 'su': '37;41', 'hard': '00;44', 'link': '01;36',
+            'orphan': '40;31;01', 'fifo': '33', 'missing': '05',
+        }
+        paths = [root / name for name in expected]
+        assert resolver.resolve_paths(paths) == list(expected.values())
+        
+        # LINK target colors links like the files they point to
+        target = make_parser(["LINK target", ".gz 01;31"]).get_resolver()
+        assert target.resolve_path(root / 'link') == '01;31'
+        assert target.resolve_path(root / 'orphan') is None
+        
+    print("File type classification test OK")
+
+def test_batch_and_caching():
+    """Test batch resolution and reuse of the compiled resolver."""
+    print("Testing batch resolution...")
+    
+    parser = make_parser([".gz 01;31", "*.tar.gz 01;33", "*~ 00;90", "FILE 00"])
+    resolver = parser.get_resolver()
+    assert parser.get_resolver() is resolver
+    
+    names = ["a.gz", "b.tar.gz", "c", "d~", ".gz", "e.GZ", "f.tar.gz~"] * 3
+    assert resolver.resolve_names(names) == [resolver.resolve(name) for name in names]
+    assert resolver.resolve("c") == "00"
+    
+    parser.set_entry(".gz", "01;35")
+    assert parser.get_resolver() is not resolver
+    assert parser.get_resolver().resolve("a.gz") == "01;35"
+    
+    print("Batch resolution test OK")
+
+if __name__ == '__main__':
+    try:
+        test_suffix_matching()
+        print()
+        test_file_type_classification()
+        print()
+        test_batch_and_caching()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
\ No newline at end of file
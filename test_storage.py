@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+def test_skip_unchanged_save():
+    """Test that saving identical content does not touch the file."""
+    print("Testing skip-if-unchanged save...")
+    
+    from parser import DirColorsParser
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'theme.dircolors'
+        path.write_text("DIR 01;34\n.txt 00;32\n")
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        
+        parser = DirColorsParser()
+        parser.parse_file(path)
+        result = parser.write_file(path)
+        assert result.skipped
+        assert os.stat(path).st_mtime_ns == 1_000_000_000
+        
+        parser.set_entry("DIR", "01;35")
+        result = parser.write_file(path)
+        assert not result.skipped
+        assert result.bytes_written == len(path.read_bytes())
+        assert os.stat(path).st_mtime_ns != 1_000_000_000
+        print(result.describe())
+        
+        # Changes made by someone else are never silently kept
+        path.write_text("DIR 00;31\n")
+        result = parser.write_file(path)
+        assert not result.skipped
+        assert path.read_text() == "DIR 01;35\n.txt 00;32\n"
+        
+    print("Skip-if-unchanged test OK")
+
+def test_atomic_write_keeps_links_and_mode():
+    """Test that atomic writes update a symlink's target and keep its mode."""
+    print("Testing atomic write...")
+    
+    from storage import atomic_write
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / 'dotfiles.dircolors'
+        target.write_text("old\n")
+        os.chmod(target, 0o600)
+        link = Path(tmp) / '.dircolors'
+        link.symlink_to(target)
+        
+        result, state = atomic_write(link, b"new\n")
+        assert result.bytes_written == 4
+        assert link.is_symlink()
+        assert target.read_text() == "new\n"
+        assert os.stat(target).st_mode & 0o777 == 0o600
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ['.dircolors', 'dotfiles.dircolors']
+        
+        result, state = atomic_write(link, b"new\n", state)
+        assert result.skipped
+        
+    print("Atomic write test OK")
+
+if __name__ == '__main__':
+    try:
+        test_skip_unchanged_save()
+        print()
+        test_atomic_write_keeps_links_and_mode()
+        print("\nAll tests passed!")
+        
+    except Exception as e:
+        print(f"Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)